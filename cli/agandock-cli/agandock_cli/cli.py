@@ -1,6 +1,11 @@
 import argparse
+import getpass
 import os
-from agandock_cli.scripts.docking_utils import run_docking_pipeline, handle_posebusters, run_plip_analysis
+import time
+from agandock_cli.scripts.experiment_catalogue import STAGES, STATUSES, list_experiments, rebuild_catalogue, remove_missing
+from agandock_cli.scripts.job_queue import (JOB_STATUSES, JOB_DEMANDS, PRIORITIES, WORKERS_ENV, submit_job, ensure_worker,
+                                            get_job, list_jobs, read_job_events, cancel_job, queue_usage, run_worker)
+from agandock_cli.scripts.profiling import profiled
 
 def main():
     parser = argparse.ArgumentParser(description="CLI for docking and filtration.")
@@ -9,12 +14,20 @@ def main():
     # Subparser for docking
     docking_parser = subparsers.add_parser('run_docking', help='Run the docking pipeline')
     docking_parser.add_argument('folder_name', type=str, help='Folder to save results')
-    docking_parser.add_argument('--pdb_file', type=str, required=True, help='Path to the PDB file')
-    docking_parser.add_argument('--pdbqt_file', type=str, required=True, help='Path to the PDBQT file')
-    docking_parser.add_argument('--config_file', type=str, required=True, help='Path to the config file')
+    docking_parser.add_argument('--pdb_file', type=str, help='Path to the PDB file')
+    docking_parser.add_argument('--pdbqt_file', type=str, help='Path to the PDBQT file')
+    docking_parser.add_argument('--config_file', type=str, help='Path to the config file')
+    docking_parser.add_argument('--receptor', type=str, nargs=3, action='append', metavar=('PDB', 'PDBQT', 'CONFIG'), help='Dock an ensemble: repeat once per receptor conformation instead of --pdb_file, --pdbqt_file and --config_file')
+    docking_parser.add_argument('--hierarchical', action='store_true', help='Dock every ligand with the fast search, then re-dock the best of them with the detail search')
+    docking_parser.add_argument('--top_fraction', type=float, help='Fraction of the fast tier re-docked with --hierarchical (default: 0.1)')
+    docking_parser.add_argument('--dynamic_factor', type=float, help='With --hierarchical, re-dock the ligands scoring below mean - factor * std of the fast tier (instead of --top_fraction)')
     docking_parser.add_argument('--input_type', type=str, required=True, choices=["Multiple SMILES", "Single SMILES"], help='Type of input (e.g., Multiple SMILES, Single SMILES)')
     docking_parser.add_argument('--input_csv', type=str, help='Path to the input CSV file for SMILES (required if input_type is Multiple SMILES)')
     docking_parser.add_argument('--input_smiles', type=str, help='Single SMILES string (required if input_type is Single SMILES)')
+    docking_parser.add_argument('--profile', action='store_true', help='Save cProfile stats, subprocess timings and a hotspot summary in the experiment folder')
+    docking_parser.add_argument('--background', action='store_true', help='Queue the run for the background worker and print its job ID')
+    docking_parser.add_argument('--priority', type=str, default='normal', choices=PRIORITIES, help='Scheduling priority of a --background job')
+    docking_parser.add_argument('--cpus', type=int, help=f"CPUs for the stage worker pools, requested from the scheduler with --background (default: all, {JOB_DEMANDS['docking']['cpus']} with --background)")
 
     # Subparser for filtering
     filter_parser = subparsers.add_parser('run_filter', help='Run the filtration process')
@@ -22,47 +35,245 @@ def main():
     filter_parser.add_argument('lower_range', type=float, help='Lower affinity threshold')
     filter_parser.add_argument('higher_range', type=float, help='Higher affinity threshold')
     filter_parser.add_argument('--pdb_file', type=str, required=True, help='Path to the PDB file (for PoseBusters)')
+    filter_parser.add_argument('--profile', action='store_true', help='Save cProfile stats, subprocess timings and a hotspot summary in the experiment folder')
+    filter_parser.add_argument('--background', action='store_true', help='Queue the run for the background worker and print its job ID')
+    filter_parser.add_argument('--priority', type=str, default='normal', choices=PRIORITIES, help='Scheduling priority of a --background job')
+    filter_parser.add_argument('--cpus', type=int, help=f"CPUs for the stage worker pools, requested from the scheduler with --background (default: all, {JOB_DEMANDS['posebusters']['cpus']} with --background)")
 
     # Subparser for PLIP analysis
     plip_parser = subparsers.add_parser('run_plip', help='Run PLIP analysis')
     plip_parser.add_argument('folder_name', type=str, help='Folder containing results for PLIP analysis')
-    plip_parser.add_argument('--pdb_file', type=str, required=True, help='Path to the PDB file (receptor)')
+    plip_parser.add_argument('--pdb_file', type=str, help='Unused, the receptor PDB is taken from the experiment folder (accepted for older scripts)')
     plip_parser.add_argument('--lower_range', type=float, help='Lower affinity threshold for filtering ligands')
     plip_parser.add_argument('--higher_range', type=float, help='Higher affinity threshold for filtering ligands')
     plip_parser.add_argument('--use_pb_filtered_ligands', action='store_true', help='Use PoseBusters filtered ligands for PLIP analysis')
+    plip_parser.add_argument('--write_reports', action='store_true', help='Also write per-ligand PLIP XML/TXT reports')
+    plip_parser.add_argument('--profile', action='store_true', help='Save cProfile stats, subprocess timings and a hotspot summary in the experiment folder')
+    plip_parser.add_argument('--background', action='store_true', help='Queue the run for the background worker and print its job ID')
+    plip_parser.add_argument('--priority', type=str, default='normal', choices=PRIORITIES, help='Scheduling priority of a --background job')
+    plip_parser.add_argument('--cpus', type=int, help=f"CPUs for the stage worker pools, requested from the scheduler with --background (default: all, {JOB_DEMANDS['plip']['cpus']} with --background)")
+
+    # Subparser for interaction fingerprint search
+    ifp_parser = subparsers.add_parser('search_ifp', help='Find poses whose PLIP interactions resemble a reference ligand')
+    ifp_parser.add_argument('folder_name', type=str, help='Folder containing PLIP results')
+    ifp_parser.add_argument('--reference', type=str, required=True, help='Name of the reference ligand')
+    ifp_parser.add_argument('--top_k', type=int, default=10, help='Number of similar poses to report')
+    ifp_parser.add_argument('--output_csv', type=str, help='Also save the hits to this CSV file')
+
+    # Subparser for the experiment catalogue
+    list_parser = subparsers.add_parser('list_experiments', help='List, search and filter experiments from the catalogue')
+    list_parser.add_argument('--search', type=str, help='Match experiment or receptor names starting with this text (case-insensitive)')
+    list_parser.add_argument('--receptor_hash', type=str, help='Only experiments docked against this receptor (hash or prefix)')
+    list_parser.add_argument('--stage', type=str, choices=STAGES, help='Stage used by --status')
+    list_parser.add_argument('--status', type=str, choices=STATUSES, help='Only experiments whose --stage has this status')
+    list_parser.add_argument('--max_best_score', type=float, help='Only experiments whose best docking score is at most this value')
+    list_parser.add_argument('--order_by', type=str, default='created', choices=['created', 'name', 'best_score', 'library_size', 'updated'], help='Sort column')
+    list_parser.add_argument('--limit', type=int, help='Show at most this many experiments')
+    list_parser.add_argument('--rebuild', type=str, metavar='DIR', help='First index the experiment folders found in DIR')
+    list_parser.add_argument('--prune', action='store_true', help='First remove experiments whose folder no longer exists')
+
+    # Subparsers for the background job queue
+    jobs_parser = subparsers.add_parser('jobs', help='List background jobs or follow one')
+    jobs_parser.add_argument('--job_id', type=str, help='Show the status and progress events of this job')
+    jobs_parser.add_argument('--status', type=str, choices=JOB_STATUSES, help='Only jobs with this status')
+    jobs_parser.add_argument('--owner', type=str, help='Only jobs submitted by this user')
+    jobs_parser.add_argument('--limit', type=int, default=20, help='Show at most this many jobs')
+    jobs_parser.add_argument('--cancel', type=str, metavar='JOB_ID', help='Cancel a queued or running job')
+    worker_parser = subparsers.add_parser('worker', help='Run queued background jobs')
+    worker_parser.add_argument('--max_jobs', type=int, help='Most jobs run at the same time (default: as the host budget allows)')
+    worker_parser.add_argument('--once', action='store_true', help='Exit when the queue is empty')
 
     args = parser.parse_args()
 
+    # The pipeline pulls in pandas, RDKit and OpenBabel; import it only for the commands that run it so --help stays fast
+    if args.command in ('run_docking', 'run_filter', 'run_plip') and not args.background:
+        from agandock_cli.scripts.pipeline import (run_docking, run_ensemble_docking, run_hierarchical_docking, run_posebusters,
+                                                   run_plip_analysis)
+        if args.cpus:
+            os.environ[WORKERS_ENV] = str(args.cpus)
+    elif args.command == 'search_ifp':
+        from agandock_cli.scripts.docking_utils import search_interaction_fingerprints
+
     if args.command == 'run_docking':
         if args.input_type == "Multiple SMILES" and not args.input_csv:
             parser.error("--input_csv is required when --input_type is Multiple SMILES")
         if args.input_type == "Single SMILES" and not args.input_smiles:
             parser.error("--input_smiles is required when --input_type is Single SMILES")
+        receptor_files = (args.pdb_file, args.pdbqt_file, args.config_file)
+        if args.receptor and any(receptor_files):
+            parser.error("--receptor cannot be combined with --pdb_file, --pdbqt_file and --config_file")
+        if not args.receptor and not all(receptor_files):
+            parser.error("--pdb_file, --pdbqt_file and --config_file are required unless --receptor is given")
+        if args.hierarchical and args.receptor:
+            parser.error("--hierarchical docks a single receptor, it cannot be combined with --receptor")
+        if not args.hierarchical and (args.top_fraction is not None or args.dynamic_factor is not None):
+            parser.error("--top_fraction and --dynamic_factor only apply with --hierarchical")
+        if args.top_fraction is not None and args.dynamic_factor is not None:
+            parser.error("--top_fraction and --dynamic_factor are alternatives, give at most one of them")
+        if args.top_fraction is not None and not 0 < args.top_fraction <= 1:
+            parser.error("--top_fraction must be greater than 0 and at most 1")
 
         # Convert relative paths to absolute paths
+        input_csv = os.path.abspath(args.input_csv) if args.input_csv else None
+        folder_name = os.path.abspath(args.folder_name)
+        if args.receptor:
+            receptors = [[os.path.abspath(path) for path in receptor] for receptor in args.receptor]
+            if args.background:
+                queue_job(args, 'ensemble', folder_name, receptors=receptors, input_type=args.input_type, input_csv=input_csv,
+                          input_smiles=args.input_smiles)
+                return
+            print(f"Running ensemble docking against {len(receptors)} receptors for folder: {folder_name}")
+            with profiled(folder_name, args.command, args.profile):
+                results = run_ensemble_docking(receptors, args.input_type, input_csv, args.input_smiles, folder_name,
+                                               progress=print_event)
+            print_results("Ensemble Docking Results", results, os.path.join(folder_name, 'output.csv'))
+            print("Ensemble docking completed.")
+            return
         pdb_file = os.path.abspath(args.pdb_file)
         pdbqt_file = os.path.abspath(args.pdbqt_file)
         config_file = os.path.abspath(args.config_file)
-        input_csv = os.path.abspath(args.input_csv) if args.input_csv else None
-        folder_name = os.path.abspath(args.folder_name)
+        if args.hierarchical:
+            # The engine's default top fraction applies unless one is given
+            tiers = {option: value for option, value in (('top_fraction', args.top_fraction), ('dynamic_factor', args.dynamic_factor))
+                     if value is not None}
+            if args.background:
+                queue_job(args, 'hierarchical', folder_name, pdb_file_path=pdb_file, pdbqt_file_path=pdbqt_file,
+                          config_file_path=config_file, input_type=args.input_type, input_csv=input_csv,
+                          input_smiles=args.input_smiles, **tiers)
+                return
+            print(f"Running hierarchical docking pipeline for folder: {folder_name}")
+            with profiled(folder_name, args.command, args.profile):
+                results = run_hierarchical_docking(pdb_file, pdbqt_file, config_file, args.input_type, input_csv,
+                                                   args.input_smiles, folder_name, progress=print_event, **tiers)
+            print_results("Detail Tier Docking Results", results, os.path.join(folder_name, 'output.csv'))
+            print(f"Fast tier results of every ligand: {os.path.join(folder_name, 'tiers', 'fast', 'output.csv')}")
+            print("Hierarchical docking pipeline completed.")
+            return
 
+        if args.background:
+            queue_job(args, 'docking', folder_name, pdb_file_path=pdb_file, pdbqt_file_path=pdbqt_file, config_file_path=config_file,
+                      input_type=args.input_type, input_csv=input_csv, input_smiles=args.input_smiles)
+            return
         print(f"Running docking pipeline for folder: {folder_name}")
-        run_docking_pipeline(pdb_file, pdbqt_file, config_file, args.input_type, input_csv, args.input_smiles, folder_name)
+        with profiled(folder_name, args.command, args.profile):
+            results = run_docking(pdb_file, pdbqt_file, config_file, args.input_type, input_csv, args.input_smiles, folder_name,
+                                  progress=print_event)
+        print_results("Docking Results", results, os.path.join(folder_name, 'output.csv'))
         print("Docking pipeline completed.")
     elif args.command == 'run_filter':
         folder_name = os.path.abspath(args.folder_name)
         pdb_file = os.path.abspath(args.pdb_file)
+        if args.background:
+            queue_job(args, 'posebusters', folder_name, lower_range=args.lower_range, higher_range=args.higher_range, pdb_file_path=pdb_file)
+            return
         print(f"Running filtration for folder: {folder_name} with range: {args.lower_range} to {args.higher_range}")
-        handle_posebusters(folder_name, args.lower_range, args.higher_range, pdb_file)
+        with profiled(folder_name, args.command, args.profile):
+            passed, failed = run_posebusters(folder_name, args.lower_range, args.higher_range, pdb_file, progress=print_event)
+        print_results(f"Compounds that PASSED PoseBusters ({len(passed)})", passed, os.path.join(folder_name, 'output_with_pb.csv'))
+        print_results(f"Compounds that FAILED PoseBusters ({len(failed)})", failed, os.path.join(folder_name, 'output_without_pb.csv'))
         print("Filtration completed.")
     elif args.command == 'run_plip':
         folder_name = os.path.abspath(args.folder_name)
-        pdb_file = os.path.abspath(args.pdb_file)
+        if args.background:
+            queue_job(args, 'plip', folder_name, lower_range=args.lower_range, higher_range=args.higher_range,
+                      use_pb_filtered_ligands=args.use_pb_filtered_ligands, write_reports=args.write_reports)
+            return
         print(f"Running PLIP analysis for folder: {folder_name}")
-        run_plip_analysis(folder_name, pdb_file, args.lower_range, args.higher_range, args.use_pb_filtered_ligands)
-        print("PLIP analysis completed.")
+        with profiled(folder_name, args.command, args.profile):
+            output_path = run_plip_analysis(folder_name, args.lower_range, args.higher_range, args.use_pb_filtered_ligands,
+                                            args.write_reports, progress=print_event)
+        print(f"PLIP analysis completed. Results saved to: {output_path}")
+    elif args.command == 'search_ifp':
+        folder_name = os.path.abspath(args.folder_name)
+        search_interaction_fingerprints(folder_name, args.reference, args.top_k, args.output_csv)
+    elif args.command == 'list_experiments':
+        if args.status and not args.stage:
+            parser.error("--stage is required with --status")
+        if args.prune:
+            print(f"Removed {remove_missing()} missing experiments from the catalogue.")
+        if args.rebuild:
+            print(f"Indexed {rebuild_catalogue(os.path.abspath(args.rebuild))} experiments from {args.rebuild}.")
+        experiments = list_experiments(search=args.search, receptor_hash=args.receptor_hash, stage=args.stage,
+                                       status=args.status, max_best_score=args.max_best_score,
+                                       order_by=args.order_by, descending=args.order_by != 'best_score', limit=args.limit)
+        print_experiments(experiments)
+    elif args.command == 'jobs':
+        if args.cancel:
+            print(f"Cancelled job {args.cancel}." if cancel_job(args.cancel) else f"Job {args.cancel} is not queued or running.")
+        elif args.job_id:
+            job = get_job(args.job_id)
+            if job is None:
+                parser.error(f"Unknown job: {args.job_id}")
+            print_job(job)
+        else:
+            print_usage(queue_usage())
+            print_jobs(list_jobs(status=args.status, owner=args.owner, limit=args.limit))
+    elif args.command == 'worker':
+        budget = queue_usage()['budget']
+        print(f"Worker started with a budget of {budget['cpus']} CPUs, {budget['gpus']} GPUs and {budget['memory_gb']:.0f} GB.", flush=True)
+        run_worker(args.max_jobs, once=args.once)
     else:
         parser.print_help()
 
+def queue_job(args, command, folder_name, **params):
+    job_id = submit_job(command, folder_name, owner=getpass.getuser(), priority=PRIORITIES[args.priority], cpus=args.cpus, **params)
+    if ensure_worker():
+        print("Started a background worker.")
+    print(f"Queued {command} job {job_id} for folder: {folder_name}")
+    print(f"Follow it with: agandock jobs --job_id {job_id}")
+
+def print_event(event):
+    """Console view of the pipeline engine's progress events."""
+    if event.kind == "step" and event.status == "running":
+        print(f"\u001b[1m\u001b[34m{event.step}\u001b[0m")
+    elif event.kind == "message":
+        color = "\u001b[91m" if event.level == "warning" else "\u001b[34m"
+        print(f"\u001b[1m{color}{event.message}\u001b[0m")
+    elif event.kind == "failed":
+        print(f"\u001b[1m\u001b[91mFailed: {event.message}\u001b[0m")
+
+def print_results(title, df, csv_path):
+    print(f"\n--- {title} ---")
+    print(df.to_string(index=False, float_format='{:.2f}'.format))
+    print(f"\nResults saved to: {csv_path}")
+    print("-" * (len(title) + 8))
+
+def print_jobs(jobs):
+    if not jobs:
+        print("No jobs found.")
+        return
+    priority_names = {value: name for name, value in PRIORITIES.items()}
+    for job in jobs:
+        submitted = time.strftime('%Y-%m-%d %H:%M', time.localtime(job['submitted']))
+        resources = f"{job['cpus']} CPU {job['gpus']} GPU {job['memory_gb']:.0f} GB"
+        print(f"{job['id']}  {job['command']:<12} {job['status']:<10} {submitted}  {job['owner'] or '':<12} "
+              f"{priority_names.get(job['priority'], job['priority']):<7} {resources:<18} {job['folder']}")
+
+def print_usage(usage):
+    budget, used = usage['budget'], usage['used']
+    print(f"Host: {used['cpus']}/{budget['cpus']} CPUs, {used['gpus']}/{budget['gpus']} GPUs, "
+          f"{used['memory_gb']:.0f}/{budget['memory_gb']:.0f} GB in use; {usage['running']} running, {usage['queued']} queued")
+
+def print_job(job):
+    """Status of one job followed by the progress events it has written so far."""
+    print(f"Job {job['id']}: {job['command']} of {job['folder']} is {job['status']}")
+    for event in read_job_events(job):
+        print_event(argparse.Namespace(**dict(dict.fromkeys(('step', 'status', 'message', 'level')), **event)))
+    if job['error']:
+        print(f"\u001b[1m\u001b[91m{job['error']}\u001b[0m")
+
+def print_experiments(experiments):
+    if not experiments:
+        print("No experiments found.")
+        return
+    import pandas as pd
+
+    df = pd.DataFrame(experiments)
+    df['created'] = pd.to_datetime(df['created'], unit='s').dt.strftime('%Y-%m-%d %H:%M')
+    df['receptor_hash'] = df['receptor_hash'].str[:12]
+    columns = ['name', 'created', 'receptor', 'receptor_hash', 'library_size', 'num_docked', 'best_score', 'mean_score',
+               'elapsed_seconds', 'docking_status', 'posebusters_status', 'plip_status', 'path']
+    print(df[columns].to_string(index=False, na_rep=''))
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
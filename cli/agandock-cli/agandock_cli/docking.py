@@ -1,5 +1,5 @@
 import os
-from agandock_cli.scripts.docking_utils import run_docking_pipeline, handle_posebusters
+from agandock_cli.scripts.pipeline import run_docking as run_docking_pipeline, run_posebusters as handle_posebusters
 
 def run_docking(folder_name, pdb_file, pdbqt_file, config_file, input_type, input_csv, input_smiles):
     print(f"Running docking pipeline for folder: {folder_name}")
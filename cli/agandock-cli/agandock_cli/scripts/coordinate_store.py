@@ -0,0 +1,200 @@
+import os
+import json
+import shutil
+import numpy as np
+
+from agandock_cli.scripts.pose_archive import open_stage
+
+
+COORDINATE_DIR = "pose_coordinates"
+BOND_TOLERANCE = 0.45  # Å added to the sum of covalent radii when bonds are inferred from distances
+
+# AutoDock atom types -> atomic number
+AD_ELEMENTS = {
+    "H": 1, "HD": 1, "HS": 1, "B": 5, "C": 6, "A": 6, "CG0": 6, "CG1": 6, "G0": 6, "G1": 6,
+    "N": 7, "NA": 7, "NS": 7, "O": 8, "OA": 8, "OS": 8, "F": 9, "Mg": 12, "MG": 12, "Si": 14,
+    "P": 15, "S": 16, "SA": 16, "Cl": 17, "CL": 17, "Ca": 20, "Mn": 25, "Fe": 26, "Zn": 30,
+    "ZN": 30, "Br": 35, "BR": 35, "I": 53,
+}
+COVALENT_RADII = np.full(119, 0.77, dtype=np.float32)
+COVALENT_RADII[[1, 5, 6, 7, 8, 9, 12, 14, 15, 16, 17, 20, 25, 26, 30, 35, 53]] = [
+    0.31, 0.84, 0.76, 0.71, 0.66, 0.57, 1.41, 1.11, 1.07, 1.05, 1.02, 1.76, 1.39, 1.32, 1.22, 1.20, 1.39]
+
+ARRAYS = ("coords", "elements", "types", "atom_offsets", "bonds", "bond_offsets")
+
+
+
+##############################################################################################################################
+""" Build from the docked poses """
+
+def parse_pdbqt_atoms(content):
+    """Coordinates and AutoDock types of the first model of a PDBQT pose."""
+    coords, types = [], []
+    for line in content.split("\n"):
+        if line.startswith(("ATOM", "HETATM")):
+            coords.append((float(line[30:38]), float(line[38:46]), float(line[46:54])))
+            types.append(line[77:79].strip() or line[12:14].strip())
+        elif line.startswith("ENDMDL"):
+            break
+    return np.array(coords, dtype=np.float32).reshape(-1, 3), types
+
+
+def infer_bonds(coords, elements):
+    """Bonded atom pairs (i < j) from interatomic distances and covalent radii."""
+    if len(coords) < 2:
+        return np.empty((0, 2), dtype=np.int32)
+    radii = COVALENT_RADII[elements]
+    dist = np.sqrt(((coords[:, None, :] - coords[None, :, :]) ** 2).sum(axis=2))
+    bonded = np.triu(dist <= radii[:, None] + radii[None, :] + BOND_TOLERANCE, k=1)
+    bonded &= ~((elements[:, None] == 1) & (elements[None, :] == 1))
+    return np.argwhere(bonded).astype(np.int32)
+
+
+def build_pose_coordinates(folder):
+    """
+    Parse the docked poses (model 1 of 6_pdbqt_out) once into flat arrays: float32 coordinates,
+    atomic numbers, AutoDock type codes and bond tables, with per-pose offsets into them. They are
+    saved as .npy files and memory-mapped by PoseCoordinates.
+    """
+    names, coords, elements, types, bonds = [], [], [], [], []
+    atom_counts, bond_counts = [], []
+    type_codes = {}
+    for name, content in open_stage(folder, "6_pdbqt_out").items():
+        pose_coords, pose_types = parse_pdbqt_atoms(content)
+        pose_elements = np.array([AD_ELEMENTS.get(t, AD_ELEMENTS.get(t[:1], 6)) for t in pose_types], dtype=np.uint8)
+        pose_bonds = infer_bonds(pose_coords, pose_elements)
+        names.append(name)
+        coords.append(pose_coords)
+        elements.append(pose_elements)
+        types.append(np.array([type_codes.setdefault(t, len(type_codes)) for t in pose_types], dtype=np.uint8))
+        bonds.append(pose_bonds)
+        atom_counts.append(len(pose_coords))
+        bond_counts.append(len(pose_bonds))
+
+    arrays = {
+        "coords": np.concatenate(coords) if coords else np.empty((0, 3), dtype=np.float32),
+        "elements": np.concatenate(elements) if elements else np.empty(0, dtype=np.uint8),
+        "types": np.concatenate(types) if types else np.empty(0, dtype=np.uint8),
+        "atom_offsets": np.concatenate([[0], np.cumsum(atom_counts)]).astype(np.int64),
+        "bonds": np.concatenate(bonds) if bonds else np.empty((0, 2), dtype=np.int32),
+        "bond_offsets": np.concatenate([[0], np.cumsum(bond_counts)]).astype(np.int64),
+    }
+    directory = os.path.join(folder, "pipeline_files", COORDINATE_DIR)
+    tmp_directory = f"{directory}.{os.getpid()}.tmp"
+    os.makedirs(tmp_directory, exist_ok=True)
+    for key, array in arrays.items():
+        np.save(os.path.join(tmp_directory, f"{key}.npy"), array)
+    with open(os.path.join(tmp_directory, "index.json"), "w") as f:
+        json.dump({"names": names, "types": list(type_codes)}, f)
+    if os.path.exists(directory):
+        shutil.rmtree(directory)
+    os.replace(tmp_directory, directory)
+    print(f"\033[1m\033[34mPose coordinates of {len(names)} ligands saved in: \033[91m{directory}\033[0m")
+    return PoseCoordinates(directory)
+
+
+
+##############################################################################################################################
+""" Memory-mapped pose coordinates """
+
+class PoseCoordinates:
+    """
+    Read-only view of the pose coordinate store. Arrays are memory-mapped, so opening it is cheap and
+    selections only touch the pages of the poses they use. Atom and bond rows of pose i are
+    atom_offsets[i]:atom_offsets[i + 1] and bond_offsets[i]:bond_offsets[i + 1]; bond indices are
+    local to their pose.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        for key in ARRAYS:
+            setattr(self, key, np.load(os.path.join(directory, f"{key}.npy"), mmap_mode="r"))
+        with open(os.path.join(directory, "index.json"), "r") as f:
+            index = json.load(f)
+        self.names = np.array(index["names"], dtype=str)
+        self.type_names = index["types"]
+        self._index = {name: i for i, name in enumerate(index["names"])}
+
+    @classmethod
+    def load(cls, folder):
+        return cls(os.path.join(folder, "pipeline_files", COORDINATE_DIR))
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self._index
+
+    def indices(self, names):
+        """Pose indices of the given ligands, skipping names without a pose."""
+        return np.array([self._index[name] for name in names if name in self._index], dtype=np.int64)
+
+    def _poses(self, names):
+        return np.arange(len(self)) if names is None else self.indices(names)
+
+    def _atom_rows(self, poses):
+        """Atom rows of the given poses and, for each row, the position of its pose in `poses`."""
+        starts, ends = self.atom_offsets[poses], self.atom_offsets[poses + 1]
+        counts = ends - starts
+        owner = np.repeat(np.arange(len(poses)), counts)
+        rows = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts) + np.repeat(starts, counts)
+        return rows, owner
+
+    def atoms(self, name):
+        """(coordinates, atomic numbers) of one pose."""
+        i = self._index[name]
+        rows = slice(self.atom_offsets[i], self.atom_offsets[i + 1])
+        return np.asarray(self.coords[rows]), np.asarray(self.elements[rows])
+
+    def bond_table(self, name):
+        i = self._index[name]
+        return np.asarray(self.bonds[self.bond_offsets[i]:self.bond_offsets[i + 1]])
+
+    def select(self, names=None, heavy_only=False):
+        """Coordinates of the given poses (all by default) as one array, with the pose position of each atom."""
+        rows, owner = self._atom_rows(self._poses(names))
+        if heavy_only:
+            keep = self.elements[rows] > 1
+            rows, owner = rows[keep], owner[keep]
+        return np.asarray(self.coords[rows]), owner
+
+    def centroids(self, names=None):
+        coords, owner = self.select(names, heavy_only=True)
+        counts = np.bincount(owner, minlength=len(self._poses(names)))
+        sums = np.stack([np.bincount(owner, weights=coords[:, k], minlength=len(counts)) for k in range(3)], axis=1)
+        return sums / np.maximum(counts, 1)[:, None]
+
+    def contacts(self, points, cutoff=4.0, names=None, chunk_size=65536):
+        """Number of heavy atoms of each pose within `cutoff` Å of any of `points` (e.g. a residue's atoms)."""
+        coords, owner = self.select(names, heavy_only=True)
+        points = np.asarray(points, dtype=np.float32).reshape(-1, 3)
+        near = np.zeros(len(coords), dtype=bool)
+        lower, upper = points.min(axis=0) - cutoff, points.max(axis=0) + cutoff
+        candidates = np.flatnonzero(((coords >= lower) & (coords <= upper)).all(axis=1))
+        for start in range(0, len(candidates), chunk_size):
+            chunk = candidates[start:start + chunk_size]
+            dist_sq = ((coords[chunk, None, :] - points[None, :, :]) ** 2).sum(axis=2)
+            near[chunk] = (dist_sq <= cutoff ** 2).any(axis=1)
+        return np.bincount(owner[near], minlength=len(self._poses(names)))
+
+    def rmsd(self, other, names=None):
+        """
+        In-place RMSD (same atom order, no superposition) between the poses of the same ligands in two
+        stores, e.g. two docking runs. Ligands missing from either store or with different atom counts
+        get NaN.
+        """
+        names = self.names if names is None else np.asarray(names, dtype=str)
+        result = np.full(len(names), np.nan)
+        mine = np.array([self._index.get(name, -1) for name in names])
+        theirs = np.array([other._index.get(name, -1) for name in names])
+        valid = (mine >= 0) & (theirs >= 0)
+        counts = np.zeros(len(names), dtype=np.int64)
+        counts[valid] = self.atom_offsets[mine[valid] + 1] - self.atom_offsets[mine[valid]]
+        valid &= counts == np.where(valid, other.atom_offsets[theirs + 1] - other.atom_offsets[theirs], -1)
+        if not valid.any():
+            return result
+        rows_a, owner = self._atom_rows(mine[valid])
+        rows_b, _ = other._atom_rows(theirs[valid])
+        sq = ((np.asarray(self.coords[rows_a]) - np.asarray(other.coords[rows_b])) ** 2).sum(axis=1)
+        result[valid] = np.sqrt(np.bincount(owner, weights=sq) / counts[valid])
+        return result
@@ -4,14 +4,10 @@ import csv
 import sys
 import time
 import math
-import torch
-import base64
 import random
 import shutil
-import psutil
 import string
 import logging
-import zipfile
 import subprocess
 import pandas as pd
 import concurrent.futures
@@ -20,11 +16,13 @@ import multiprocessing as mp
 from glob import glob
 from typing import Optional, List
 from rdkit import Chem
-from rdkit.Chem import AllChem, DataStructs, Draw
-from io import BytesIO
-from openbabel import openbabel, pybel
+from rdkit.Chem import AllChem, DataStructs, Draw, Descriptors, Crippen, rdMolDescriptors
 from multiprocessing import Pool, cpu_count
 from concurrent.futures import ThreadPoolExecutor
+from agandock_cli.scripts.results_io import write_results_table
+from agandock_cli.scripts.score_distribution import write_score_distribution
+from agandock_cli.scripts.result_store import write_column_group, read_column_group, docking_view, posebusters_views
+from agandock_cli.scripts.pose_archive import PoseArchive, archive_path, open_stage
 
 try:
     from protonator import protonator
@@ -40,10 +38,25 @@ logging.getLogger('pybel').setLevel(logging.ERROR)
 logging.getLogger("rdkit").setLevel(logging.ERROR)
 sys.stderr = stderr
 
-# Define script base path using environment variable with fallback
-SCRIPT_BASE = os.environ.get("AGANDOCK_SCRIPTS", "/home/shifath/AGANDOCK/main/streamlit/scripts")
+# Directory of the pipeline shell scripts and PLIP (main/nextjs/scripts of the repository)
+SCRIPT_BASE = os.environ.get("AGANDOCK_SCRIPTS", os.path.abspath(os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "..", "main", "nextjs", "scripts")))
+
+def worker_count():
+    """Workers a stage pool may start: the job's CPU allocation under the job queue, otherwise every core."""
+    return int(os.environ.get("AGANDOCK_WORKERS") or os.cpu_count() or 1)
+
+
+
+
+##############################################################################################################################
+""" Check GPU Availability """
 
 def check_availability():
+    # torch takes seconds to import, so it is only loaded when the devices are actually checked
+    import torch
+    import psutil
+
     if "CUDA_VISIBLE_DEVICES" not in os.environ:
         os.environ["CUDA_VISIBLE_DEVICES"] = "0"
 
@@ -51,30 +64,39 @@ def check_availability():
         device = torch.device("cuda")
         gpu_info = os.popen('nvidia-smi --query-gpu=utilization.gpu --format=csv,noheader,nounits').readlines()
         gpu_available = 100 - int(gpu_info[0].strip())
-        gpu_result = f"\u001b[1m\u001b[34mGPU availability: \u001b[91m{gpu_available:.2f}%\u001b[0m"
+        gpu_result = f"\033[1m\033[34mGPU availability: \033[91m{gpu_available:.2f}%\033[0m"
     else:
         device = torch.device("cpu")
         gpu_result = 'GPU is not available, using CPU instead'
 
     cpu_percentage = psutil.cpu_percent()
     cpu_available = 100 - cpu_percentage
-    cpu_result = f"\u001b[1m\u001b[34mCPU availability: \u001b[91m{cpu_available:.2f}%\u001b[0m"
-
+    cpu_result = f"\033[1m\033[34mCPU availability: \033[91m{cpu_available:.2f}%\033[0m"
+    
     print(gpu_result)
     print(cpu_result)
     return device
 
+
+
+##############################################################################################################################
+""" Remove Salt Compounds """
+
 def process_smiles_csv(folder_name, input_csv):
     input_smiles = input_csv if os.path.isabs(input_csv) else os.path.join(folder_name, input_csv)
     if not os.path.exists(input_smiles):
         raise FileNotFoundError(f"File not found: {input_smiles}")
 
     df = pd.read_csv(input_smiles)
-    df_salt = df[df['SMILES'].str.contains('\\.')]
-    df_salt.to_csv(f'{folder_name}/salted_compounds.csv', index=False)
+    # st.markdown(f'<p style="font-size:16px; color:#887b56;">Total compounds loaded: <span style="color: #4973f2; font-size: 20px;"><b>{len(df)}</b></span></p>', unsafe_allow_html=True)
 
-    df_no_salt = df[~df['SMILES'].str.contains('\\.')]
+    df_salt = df[df['SMILES'].str.contains('\.')]
+    # st.markdown(f'<p style="font-size:16px; color:#887b56;">Salts removed: <span style="color: #4973f2; font-size: 20px;"><b>{len(df_salt)}</b></span></p>', unsafe_allow_html=True)
 
+    df_salt.to_csv(f'{folder_name}/salted_compounds.csv', index=False)
+
+    df_no_salt = df[~df['SMILES'].str.contains('\.')]
+    
     def atom_count(smiles):
         try:
             mol = Chem.MolFromSmiles(smiles)
@@ -83,9 +105,24 @@ def process_smiles_csv(folder_name, input_csv):
             return 0
 
     df_no_salt = df_no_salt[df_no_salt['SMILES'].apply(atom_count) <= 50]
-
+    
     return df_no_salt
 
+
+##############################################################################################################################
+""" Convert SMILES to SDF """
+
+def read_smi_file(filename: str, i_from: int, i_to: int) -> List[Chem.Mol]:
+    mol_list = []
+    with open(filename, 'r') as smiles_file:
+        for i, line in enumerate(smiles_file):
+            if i_from <= i < i_to:
+                tokens = line.split()
+                smiles = tokens[0]
+                mol_list.append(Chem.MolFromSmiles(smiles))
+    return mol_list
+
+
 def get_structure(mol: Chem.Mol, num_conformations: int, index: int) -> Optional[Chem.Mol]:
     try:
         if has_protonator:
@@ -111,6 +148,15 @@ def get_structure(mol: Chem.Mol, num_conformations: int, index: int) -> Optional
         print(f"Error processing molecule: {e}")
         return None
 
+def molecules_to_structure(population: List[Chem.Mol], num_conformations: int, index: int, num_cpus: int):
+    with mp.Pool(num_cpus) as pool:
+        args = [(p, num_conformations, index) for p in population]
+        generated_molecules = pool.starmap(get_structure, args)
+
+        names = [''.join(random.choices(string.ascii_uppercase + string.digits, k=6)) for _ in generated_molecules]
+        return generated_molecules, names
+
+
 def molecule_to_sdf(mol: Chem.Mol, output_filename: str, name: Optional[str] = None):
     if name is not None:
         mol.SetProp("_Name", name)
@@ -118,6 +164,7 @@ def molecule_to_sdf(mol: Chem.Mol, output_filename: str, name: Optional[str] = N
     writer.write(mol)
     writer.close()
 
+
 def process_row(row, output_sdf, num_conformations, idx_conformer):
     smiles, mol_name = row['SMILES'], row['Name']
     mol = Chem.MolFromSmiles(smiles)
@@ -127,18 +174,24 @@ def process_row(row, output_sdf, num_conformations, idx_conformer):
             sdf_filename = os.path.join(output_sdf, f"{mol_name}.sdf")
             molecule_to_sdf(mol, sdf_filename, name=mol_name)
 
+
 def convert_smiles_to_sdf_parallel(folder_name, df, num_conformations, idx_conformer=0):
+
     output_sdf = os.path.join(folder_name, "pipeline_files/1_sdf")
     os.makedirs(os.path.join(folder_name, "pipeline_files", "1_sdf"), exist_ok=True)
-
+    
     total = len(df)
-    max_workers = os.cpu_count()
+    max_workers = worker_count()
     with ThreadPoolExecutor(max_workers=max_workers) as executor:
         futures = [executor.submit(process_row, row, output_sdf, num_conformations, idx_conformer) for _, row in df.iterrows()]
 
         for future in concurrent.futures.as_completed(futures):
             future.result()
 
+
+##############################################################################################################################
+""" Format Mol2 Files """
+
 def add_atom_numbers(input_output):
     input_mol2, output_mol2 = input_output
     with open(input_mol2, 'r') as f:
@@ -151,9 +204,9 @@ def add_atom_numbers(input_output):
         if mol2_content[i].startswith('@<TRIPOS>'):
             break
         else:
-            atom_type = mol2_content[i][8:10].strip()
+            atom_type = mol2_content[i][8:10].strip()  # Capture up to three characters for atom type
             if len(atom_type) == 2 and not atom_type[1].isdigit():
-                atom_type = atom_type.capitalize()
+                atom_type = atom_type.capitalize()  # Ensure standard representation (e.g., Cl, Na)
             if atom_type not in atom_counts:
                 atom_counts[atom_type] = 1
             else:
@@ -161,7 +214,7 @@ def add_atom_numbers(input_output):
 
             atom_number = str(atom_counts[atom_type])
             new_atom = f"{atom_type}{atom_number}"
-            mol2_content[i] = f"{mol2_content[i][:8]}{new_atom:<4}{mol2_content[i][11:]}"
+            mol2_content[i] = f"{mol2_content[i][:8]}{new_atom:<4}{mol2_content[i][11:]}"  # Keep alignment consistent
 
     with open(output_mol2, 'w') as f:
         f.writelines(mol2_content)
@@ -174,10 +227,15 @@ def format_mol2_files(folder_name):
     mol2_files = [file for file in os.listdir(input_mol2) if file.endswith('.mol2')]
     input_output_pairs = [(os.path.join(input_mol2, mol2_file), os.path.join(output_mol2, mol2_file)) for mol2_file in mol2_files]
 
-    with Pool() as pool:
+    with Pool(worker_count()) as pool:
         pool.map(add_atom_numbers, input_output_pairs)
 
-    print(f"\u001b[1m\u001b[34mMOL2 files formatted and saved in folder: \u001b[91m{output_mol2}\u001b[0m")
+    print(f"\033[1m\033[34mMOL2 files formatted and saved in folder: \033[91m{output_mol2}\033[0m")
+    
+
+
+##############################################################################################################################
+""" Pass Correct PDBQT files for Docking """
 
 def process_smiles_files_for_check(input_smiles_files):
     output_file = os.path.join(os.path.dirname(input_smiles_files), "smiles.txt")
@@ -245,6 +303,7 @@ def check_pdbqt_files(folder_name, input_csv):
     df4 = process_df_for_check(df3)
     return df4
 
+
 def copy_correct_pdbqt_files(folder_name, input_csv):
     all_pdbqt_files = os.path.join(folder_name, "pipeline_files/3_pdbqt")
     compounds_to_be_dock = os.path.join(folder_name, "pipeline_files/1_compounds_for_docking.csv")
@@ -254,11 +313,11 @@ def copy_correct_pdbqt_files(folder_name, input_csv):
 
     smiles_folder = os.path.join(folder_name, "pipeline_files/4_smiles")
     smiles_count = sum(1 for _ in os.scandir(smiles_folder) if _.is_file())
-
+    
     df1 = pd.read_csv(compounds_to_be_dock)
-
+    
     filtered_out = smiles_count - len(df1)
-
+    
     for compound_name in df1['Name']:
         input_file_path = os.path.join(all_pdbqt_files, f"{compound_name}.pdbqt")
         output_file_path = os.path.join(output_dir, f"{compound_name}.pdbqt")
@@ -268,8 +327,13 @@ def copy_correct_pdbqt_files(folder_name, input_csv):
 
     print(f"\033[1m\033[34mCompounds filtered out using Dice Similarity: \033[91m{filtered_out}\033[0m")
 
-def create_ligands_path_batchwise(folder_name, batch_size=10):
-    output_pdbqt = os.path.join(folder_name, "pipeline_files/5_pdbqt_for_docking")
+
+##############################################################################################################################
+""" Create a ligands paths text file """
+
+def create_ligands_path_batchwise(folder_name, batch_size=10, ligands_dir=None):
+    # Receptors of an ensemble dock the ligands prepared once in the experiment folder (ligands_dir)
+    output_pdbqt = ligands_dir or os.path.join(folder_name, "pipeline_files/5_pdbqt_for_docking")
 
     def chunk_list(input_list, chunk_size):
         return [input_list[i:i + chunk_size] for i in range(0, len(input_list), chunk_size)]
@@ -282,98 +346,140 @@ def create_ligands_path_batchwise(folder_name, batch_size=10):
     ligand_batches = chunk_list(pdbqt_files, batch_size)
 
     for i, ligand_batch in enumerate(ligand_batches):
-        batch_ligands_path = os.path.join(output_pdbqt, "..", f"unidock_pdbqt_batch_{i+1}.txt")
+        batch_ligands_path = os.path.join(folder_name, "pipeline_files", f"unidock_pdbqt_batch_{i+1}.txt")
         with open(batch_ligands_path, "w") as batch_file:
             batch_file.write('\n'.join(os.path.join(output_pdbqt, file) for file in ligand_batch))
 
     batch_files = [f"ligands_batch_{i}.txt" for i in range(len(ligand_batches))]
     return len(batch_files)
 
+
+
+
+##############################################################################################################################
+""" Extract Affinity Values """
+
 def affinity_from_pdbqt_files(folder_name):
-    ligands_pdbqt_out = os.path.join(folder_name, "pipeline_files/6_pdbqt_out")
+    poses = open_stage(folder_name, "6_pdbqt_out")
     results = []
-    pdbqt_files = [f for f in os.listdir(ligands_pdbqt_out) if f.endswith(".pdbqt")]
-    print(f"\u001b[1m\u001b[34mFound {len(pdbqt_files)} PDBQT files in {ligands_pdbqt_out}: {pdbqt_files}\u001b[0m")
-    for filename in pdbqt_files:
-        file_path = os.path.join(ligands_pdbqt_out, filename)
-        with open(file_path, 'r') as file:
-            lines = file.readlines()
-            if len(lines) < 2:
-                print(f"\u001b[1m\u001b[91mWarning: {filename} is empty or has insufficient lines\u001b[0m")
-                continue
-            affinity_line = lines[1]
-            try:
-                affinity_value = float(affinity_line.split()[3])
-                name = filename.replace('_out.pdbqt', '')
-                results.append({'Name': name, 'Affinity': affinity_value})
-            except (IndexError, ValueError) as e:
-                print(f"\u001b[1m\u001b[91mError processing {filename}: {e}\u001b[0m")
-                continue
+    print(f"\033[1m\033[34mFound {len(poses)} docked poses in {poses.path}\033[0m")
+    for name, content in poses.items():
+        lines = content.split('\n', 2)
+        if len(lines) < 2:
+            print(f"\033[1m\033[91mWarning: {name} is empty or has insufficient lines\033[0m")
+            continue
+        affinity_line = lines[1]
+        try:
+            affinity_value = float(affinity_line.split()[3])
+            results.append({'Name': name, 'Affinity': affinity_value})
+        except (IndexError, ValueError) as e:
+            print(f"\033[1m\033[91mError processing {name}: {e}\033[0m")
+            continue
     if not results:
-        print(f"\u001b[1m\u001b[91mNo valid affinity values extracted in {ligands_pdbqt_out}\u001b[0m")
+        print(f"\033[1m\033[91mNo valid affinity values extracted in {poses.path}\033[0m")
     output_file = os.path.join(folder_name, 'pipeline_files/2_extract_affinity_from_pdbqt.csv')
     with open(output_file, 'w', newline='') as csv_file:
         fieldnames = ['Name', 'Affinity']
         writer = csv.DictWriter(csv_file, fieldnames=fieldnames)
         writer.writeheader()
         writer.writerows(results)
-    print(f"\u001b[1m\u001b[34mAffinity values extracted and saved in folder: \u001b[91m{output_file}\u001b[0m")
+    write_column_group(folder_name, "docking", pd.DataFrame(results, columns=fieldnames))
+    print(f"\033[1m\033[34mAffinity values extracted and saved in folder: \033[91m{output_file}\033[0m")
 
-def extraction_based_on_threshold(folder_name, threshold, factor):
-    source_dir = os.path.join(folder_name, "pipeline_files/6_pdbqt_out")
-    affinity_score_path = os.path.join(folder_name, 'pipeline_files', '2_extract_affinity_from_pdbqt.csv')
 
-    df = pd.read_csv(affinity_score_path)
 
-    destination_dir = os.path.join(folder_name, "pipeline_files/7_pdbqt_out_threshold")
-    os.makedirs(destination_dir, exist_ok=True)
+
+#############################################################################################################################
+""" Extract Compounds Based on Affinity threshold """
+
+def dynamic_threshold(affinities, factor):
+    """Scores factor standard deviations better than the mean."""
+    return affinities.mean() - factor * affinities.std()
+
+
+def extraction_based_on_threshold(folder_name, threshold, factor):
+    df = read_column_group(folder_name, "docking")
 
     output_file_path = os.path.join(folder_name, "pipeline_files/3_compounds_for_posebusters.csv")
 
     if threshold == 'dynamic':
-        dynamic_threshold = df['Affinity'].mean() - factor * df['Affinity'].std()
-        dynamic = df[df['Affinity'] < dynamic_threshold]
+        dynamic = df[df['Affinity'] < dynamic_threshold(df['Affinity'], factor)]
         dynamic.to_csv(output_file_path, index=False)
-
-        for index, row in dynamic.iterrows():
-            compound_name = row['Name'].split('_out')[0]
-            source_file = os.path.join(source_dir, f"{compound_name}_out.pdbqt")
-            destination_file = os.path.join(destination_dir, f"{compound_name}_out.pdbqt")
-            shutil.copy(source_file, destination_file)
+        write_column_group(folder_name, "posebusters_selection", dynamic[['Name']])
 
     elif isinstance(threshold, (float, int)):
         static = df[df['Affinity'] < threshold]
         static.to_csv(output_file_path, index=False)
+        write_column_group(folder_name, "posebusters_selection", static[['Name']])
+
+    print("\033[1m\033[34mCompounds Extracted based on threshold value\033[0m".format(output_file_path))
+
+
+def select_top_tier(fast_folder, folder_name, top_fraction, dynamic_factor=None):
+    """
+    Ligands of a fast pre-screen (docked in fast_folder) to re-dock in folder_name: the best
+    top_fraction of them, or with dynamic_factor those below the dynamic threshold. The best
+    ligand is always kept.
+    """
+    df = read_column_group(fast_folder, "docking").sort_values('Affinity', kind='stable')
+    if dynamic_factor is None:
+        selected = df.head(max(1, math.ceil(len(df) * top_fraction)))
+    else:
+        selected = df[df['Affinity'] < dynamic_threshold(df['Affinity'], dynamic_factor)]
+        if selected.empty:
+            selected = df.head(1)
+
+    output_file_path = os.path.join(folder_name, "pipeline_files/3_compounds_for_top_tier.csv")
+    selected.to_csv(output_file_path, index=False)
+    print(f"\033[1m\033[34m{len(selected)} of {len(df)} compounds selected for the detail tier: \033[91m{output_file_path}\033[0m")
+    return selected
+
 
-        for index, row in static.iterrows():
-            compound_name = row['Name'].split('_out')[0]
-            source_file = os.path.join(source_dir, f"{compound_name}_out.pdbqt")
-            destination_file = os.path.join(destination_dir, f"{compound_name}_out.pdbqt")
-            shutil.copy(source_file, destination_file)
 
-    print("Compounds Extracted based on threshold value")
+#############################################################################################################################
+""" Extracted Model 1 content """
 
-def copy_content(file_path, output_folder):
-    with open(file_path, 'r') as file:
-        content = file.read()
-        endmdl_index = content.find("ENDMDL")
-        endmdl_content = content[:endmdl_index + len("ENDMDL")]
-        output_file_path = os.path.join(output_folder, os.path.basename(file_path))
-        with open(output_file_path, 'w') as output_file:
-            output_file.write(endmdl_content)
+def model1_content(content):
+    endmdl_index = content.find("ENDMDL")
+    return content[:endmdl_index + len("ENDMDL")]
+        
 
 def extract_model1(folder_name):
-    input_folder = os.path.join(folder_name, "pipeline_files/6_pdbqt_out")
-    output_folder = os.path.join(folder_name, "pipeline_files/8_pdbqt_out_threshold_m1")
-    if not os.path.exists(output_folder):
-        os.makedirs(output_folder)
+    poses = open_stage(folder_name, "6_pdbqt_out")
+    output_archive = PoseArchive.create(archive_path(folder_name, "8_pdbqt_out_threshold_m1"))
+    output_archive.add_many((name, model1_content(content)) for name, content in poses.items())
+
+    print(f"\033[1m\033[34mExtracted Model_1 content and saved in: \033[91m{output_archive.path}\033[0m")
+
+
+
+#############################################################################################################################
+""" Convert Model 1 poses to SDF """
+
+def pdbqt_to_sdf(content):
+    from openbabel import pybel
+
+    # Same route as obabel -ipdbqt -omol2 followed by -imol2 -osdf
+    mol2 = pybel.readstring("pdbqt", content).write("mol2")
+    return pybel.readstring("mol2", mol2).write("sdf")
+
+
+def convert_poses_to_sdf(folder_name):
+    def records():
+        for name, content in open_stage(folder_name, "8_pdbqt_out_threshold_m1").items():
+            try:
+                yield name, pdbqt_to_sdf(content)
+            except (IOError, ValueError):
+                print(f"\033[1m\033[91mCould not convert the pose of {name} to SDF\033[0m")
+
+    output_archive = PoseArchive.create(archive_path(folder_name, "9_sdf_out"))
+    output_archive.add_many(records())
+    print(f"\033[1m\033[34mPDBQT to SDF conversion completed and saved in: \033[91m{output_archive.path}\033[0m")
+
 
-    for file_name in os.listdir(input_folder):
-        file_path = os.path.join(input_folder, file_name)
-        if os.path.isfile(file_path) and file_name.endswith(".pdbqt"):
-            copy_content(file_path, output_folder)
 
-    print(f"\u001b[1m\u001b[34mExtracted Model_1 content and saved in folder: \u001b[91m{output_folder}\u001b[0m")
+##############################################################################################################################
+""" Process PoseBusters Output file """
 
 def process_pb_csv(folder_name):
     pb_result = os.path.join(folder_name, 'pipeline_files', '4_pb_out.csv')
@@ -383,400 +489,203 @@ def process_pb_csv(folder_name):
     pb = pb.rename(columns={'molecule': 'Name'})
     pb['passes'] = pb.iloc[:, 1:].eq('True').sum(axis=1)
     pb.to_csv(os.path.join(folder_name, 'pipeline_files', '5_pb_out.csv'), index=False)
+    write_column_group(folder_name, "posebusters", pb)
 
-def generate_structure_image(smiles):
-    mol = Chem.MolFromSmiles(smiles)
-    if mol is None:
-        return None
-    buffered = BytesIO()
-    img = Draw.MolToImage(mol, size=(200, 100))
-    img.save(buffered, format="PNG")
-    img_str = base64.b64encode(buffered.getvalue()).decode()
-    return f'<img src="data:image/png;base64,{img_str}"/>'
 
-def add_chemical_structure_column(results):
-    results['Chemical structure'] = results['SMILES'].apply(generate_structure_image)
-    return results
+DESCRIPTOR_COLUMNS = ['Heavy atoms', 'MW', 'cLogP', 'TPSA', 'HBD', 'HBA', 'Rotatable bonds']
+INTEGER_DESCRIPTORS = ['Heavy atoms', 'HBD', 'HBA', 'Rotatable bonds']
 
-def count_all_heavy_atoms(smiles):
-    mol = Chem.MolFromSmiles(smiles)
+def molecule_descriptors(smiles):
+    """All descriptors of one molecule from a single parse; NaN for unparsable SMILES."""
+    mol = Chem.MolFromSmiles(smiles) if isinstance(smiles, str) else None
     if mol is None:
-        return None
-    return sum(1 for atom in mol.GetAtoms() if atom.GetAtomicNum() != 1)
-
-def generate_table_html(filtered_df):
-    column_widths = {
-        "Index": "35px",
-        "Name": "100px",
-        "SMILES": "300px",
-        "Chemical structure": "200px",
-        "Docking score": "100px",
-        "Ligand efficiency": "100px",
-    }
-
-    colgroup_html = f'<col style="width: {column_widths.get("Index", "100px")};">'
-    colgroup_html += ''.join(
-        f'<col style="width: {column_widths.get(col, "100px")};">' for col in filtered_df.columns
-    )
-
-    table_html = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <script src="https://cdnjs.cloudflare.com/ajax/libs/tablesort/5.2.1/tablesort.min.js"></script>
-        <style>
-            th {{
-                cursor: pointer;
-                background-color: #6a8f6b;
-                color: white;
-                padding: 8px;
-                position: sticky;
-                top: 0;
-                z-index: 2;
-            }}
-            td {{
-                padding: 8px;
-                text-align: center;
-                word-wrap: break-word;
-                overflow-wrap: break-word;
-            }}
-            table {{
-                border-collapse: collapse;
-                width: 100%;
-                table-layout: fixed;
-                background-color: #FFFFFF;
-            }}
-            th, td {{
-                border: 1px solid #ddd;
-            }}
-            td:first-child {{
-                position: sticky;
-                left: 0;
-                background-color: #f4f4f4;
-                z-index: 1;
-            }}
-            .table-container {{
-                max-height: 500px;
-                overflow-y: auto;
-            }}
-        </style>
-    </head>
-    <body>
-        <div class="table-container">
-            <table id="sortable-table">
-                <colgroup>
-                    {colgroup_html}
-                </colgroup>
-                <thead>
-                    <tr>
-                        <th>#</th>
-                        {''.join(f'<th>{col}</th>' for col in filtered_df.columns)}
-                    </tr>
-                </thead>
-                <tbody>
-                    {''.join(
-                        f'<tr><td>{i}</td>' + ''.join(f'<td>{val}</td>' for val in row) + '</tr>'
-                        for i, row in enumerate(filtered_df.values, start=1)
-                    )}
-                </tbody>
-            </table>
-        </div>
-        <script>
-            new Tablesort(document.getElementById('sortable-table'));
-        </script>
-    </body>
-    </html>
+        return (float('nan'),) * len(DESCRIPTOR_COLUMNS)
+    return (mol.GetNumHeavyAtoms(),
+            Descriptors.MolWt(mol),
+            Crippen.MolLogP(mol),
+            rdMolDescriptors.CalcTPSA(mol),
+            rdMolDescriptors.CalcNumHBD(mol),
+            rdMolDescriptors.CalcNumHBA(mol),
+            rdMolDescriptors.CalcNumRotatableBonds(mol))
+
+def compute_descriptors(smiles, processes=None, chunksize=256):
     """
-    return table_html
-
-def final_output_without_pb(folder_name, input_csv, elapsed_time_seconds):
-    input_smiles = os.path.join(folder_name, input_csv) if not os.path.isabs(input_csv) else input_csv
-    affinity_path = os.path.join(folder_name, 'pipeline_files', '2_extract_affinity_from_pdbqt.csv')
+    Descriptor stage: parse every molecule once and compute all descriptors together, in a process
+    pool for libraries larger than a couple of chunks. Returns typed numeric columns aligned with `smiles`.
+    """
+    smiles = list(smiles)
+    if len(smiles) <= 2 * chunksize:
+        rows = [molecule_descriptors(s) for s in smiles]
+    else:
+        with Pool(processes or worker_count()) as pool:
+            rows = pool.map(molecule_descriptors, smiles, chunksize=chunksize)
+    descriptors = pd.DataFrame(rows, columns=DESCRIPTOR_COLUMNS)
+    descriptors[INTEGER_DESCRIPTORS] = descriptors[INTEGER_DESCRIPTORS].astype('Int64')
+    return descriptors
+
+def add_descriptors(df, score_column='Affinity'):
+    """Append the descriptor columns and the ligand efficiency (score per heavy atom) to a result table."""
+    descriptors = compute_descriptors(df['SMILES'])
+    descriptors.index = df.index
+    df = pd.concat([df, descriptors], axis=1)
+    df['Efficiency'] = df[score_column] / df['Heavy atoms'].astype(float)
+    return df
 
-    df1 = pd.read_csv(affinity_path)
-    df1 = df1.sort_values(by='Affinity').reset_index(drop=True)
+def final_output_without_pb(folder_name, input_csv):
+    input_smiles = input_csv if os.path.isabs(input_csv) else os.path.join(folder_name, input_csv)
 
+    # Descriptor stage: SMILES, descriptors and ligand efficiency of the docked ligands
+    df1 = read_column_group(folder_name, "docking")
     df2 = pd.read_csv(input_smiles)
+    df3 = pd.merge(df1, df2[['Name', 'SMILES']], on='Name', how='left')
+    df3 = add_descriptors(df3).rename(columns={'Efficiency': 'Ligand efficiency'})
+    write_column_group(folder_name, "descriptors", df3[['Name', 'SMILES', 'Ligand efficiency'] + DESCRIPTOR_COLUMNS])
 
-    df3 = pd.merge(df1, df2, on='Name', how='left')
-    df3 = df3[['Name', 'SMILES', 'Affinity']]
-    df3 = df3.sort_values(by='Affinity').reset_index(drop=True)
-    df3['HeavyAtoms'] = df3['SMILES'].apply(count_all_heavy_atoms)
-    df3['Efficiency'] = df3['Affinity'] / df3['HeavyAtoms']
-    df3 = df3.drop(columns=['HeavyAtoms'])
-    numeric_columns = df3.select_dtypes(include='float').columns
-    df3[numeric_columns] = df3[numeric_columns].apply(lambda s: s.map('{:.2f}'.format))
-    df3 = df3.rename(columns={'Affinity': 'Docking score (kcal/mol)', 'Efficiency': 'Ligand efficiency'})
-
-    # Print results to console as a clean table
-    print("\n--- Docking Results ---")
-    print(df3.to_string(index=False))
-    print("---------------------")
-
-    # Save the final CSV file
-    output_csv_path = os.path.join(folder_name, 'output.csv')
-    df3.to_csv(output_csv_path, index=False)
-    print(f"\nResults successfully saved to: {output_csv_path}")
+    # output.csv is an export view of the result store, two decimals are only applied to the text
+    df3 = docking_view(folder_name).round(2)
+    write_results_table(df3, os.path.join(folder_name, 'output.csv'), float_format='%.2f')
+    write_score_distribution(os.path.join(folder_name, 'output.csv'), df3)
+    return df3
 
-def extraction_based_on_threshold_for_pb(folder_name, lower_range, higher_range):
-    print("")
-    print("")
-    print("")
-    source_dir = os.path.join(folder_name, "pipeline_files/9_sdf_out")
-    affinity_score_path = os.path.join(folder_name, 'pipeline_files', '2_extract_affinity_from_pdbqt.csv')
 
-    df = pd.read_csv(affinity_score_path)
+def final_output_for_ensemble(folder_name, receptor_results):
+    """
+    Ensemble output.csv: every ligand's best pose over the receptors ({name: output.csv table}),
+    with the receptor it came from and its score against each receptor.
+    """
+    score = 'Docking score (kcal/mol)'
+    combined = pd.concat([df.assign(Receptor=name) for name, df in receptor_results.items()], ignore_index=True)
+    per_receptor = combined.pivot_table(index='Name', columns='Receptor', values=score, aggfunc='min')
+    per_receptor = per_receptor.reindex(columns=list(receptor_results))
+    per_receptor.columns = [f"{name} docking score (kcal/mol)" for name in per_receptor.columns]
+
+    best = combined.sort_values(score, kind='stable').drop_duplicates('Name').rename(columns={'Receptor': 'Best receptor'})
+    best = best.merge(per_receptor.reset_index(), on='Name', how='left').reset_index(drop=True)
+    write_results_table(best, os.path.join(folder_name, 'output.csv'), float_format='%.2f')
+    write_score_distribution(os.path.join(folder_name, 'output.csv'), best)
+    return best
+
+
+def final_output_for_hierarchy(folder_name, detail_results, fast_results):
+    """
+    Hierarchical screening output.csv: the detail tier's results (output.csv table) with the
+    score every ligand got in the fast tier.
+    """
+    fast_scores = fast_results[['Name', 'Docking score (kcal/mol)']].rename(
+        columns={'Docking score (kcal/mol)': 'Fast tier docking score (kcal/mol)'})
+    df = detail_results.merge(fast_scores, on='Name', how='left')
+    write_results_table(df, os.path.join(folder_name, 'output.csv'), float_format='%.2f')
+    write_score_distribution(os.path.join(folder_name, 'output.csv'), df)
+    return df
+
+
+
+def extraction_based_on_threshold_for_pb(folder_name, lower_range, higher_range):
+    df = read_column_group(folder_name, "docking")
 
     destination_dir = os.path.join(folder_name, "pipeline_files/9_sdf_out_threshold")
     if os.path.exists(destination_dir):
         shutil.rmtree(destination_dir)
     os.makedirs(destination_dir)
-
+    
     output_file_path = os.path.join(folder_name, "pipeline_files/3_compounds_for_posebusters.csv")
 
     df_range = df[(df['Affinity'] >= lower_range) & (df['Affinity'] <= higher_range)]
     df_range.to_csv(output_file_path, index=False)
+    write_column_group(folder_name, "posebusters_selection", df_range[['Name']])
 
-    for _, row in df_range.iterrows():
-        compound_name = row['Name'].split('_out')[0]
-        source_file = os.path.join(source_dir, f"{compound_name}_out.sdf")
-        destination_file = os.path.join(destination_dir, f"{compound_name}_out.sdf")
-        shutil.copy(source_file, destination_file)
+    # PoseBusters reads files, so only the selected poses are written out of the archive
+    open_stage(folder_name, "9_sdf_out").extract(destination_dir, "_out.sdf", df_range['Name'])
+        
 
 def final_output_with_pb(folder_name, passes):
-    posebusters_path = os.path.join(folder_name, 'pipeline_files', '5_pb_out.csv')
-    df1 = pd.read_csv(posebusters_path).query('passes >= @passes')
-
-    df2 = pd.read_csv(os.path.join(folder_name, "output.csv"))
-    df3 = pd.merge(df1, df2, on='Name', how='left')[['Name', 'SMILES', 'Docking score (kcal/mol)', 'Ligand efficiency']]
-    
-    output_with_pb_path = os.path.join(folder_name, 'output_with_pb.csv')
-    df3.to_csv(output_with_pb_path, index=False)
+    df3, df6 = posebusters_views(folder_name, passes)
+    write_results_table(df3, os.path.join(folder_name, 'output_with_pb.csv'), float_format='%.2f')
+    write_score_distribution(os.path.join(folder_name, 'output_with_pb.csv'), df3)
+    write_results_table(df6, os.path.join(folder_name, 'output_without_pb.csv'), float_format='%.2f')
 
-    df4 = pd.read_csv(os.path.join(folder_name, "pipeline_files/3_compounds_for_posebusters.csv"))
+    return df3, df6
 
-    df5 = pd.merge(df4[['Name']], df1[['Name']], on='Name', how='inner')
-    df5 = pd.merge(df5, df2, on='Name', how='left')[['Name', 'SMILES', 'Docking score (kcal/mol)', 'Ligand efficiency']]
 
-    df6 = pd.merge(df4[['Name']], df2, on='Name', how='left')
-    df6 = df6[~df6['Name'].isin(df5['Name'])][['Name', 'SMILES', 'Docking score (kcal/mol)', 'Ligand efficiency']]
-    df6 = df6.reset_index(drop=True)
-    output_without_pb_path = os.path.join(folder_name, 'output_without_pb.csv')
-    df6.to_csv(output_without_pb_path, index=False)
 
-    # Format numeric columns
-    numeric_cols = df3.select_dtypes(include='float').columns
-    df3[numeric_cols] = df3[numeric_cols].apply(lambda s: s.map('{:.2f}'.format))
-    numeric_cols_df6 = df6.select_dtypes(include='float').columns
-    df6[numeric_cols_df6] = df6[numeric_cols_df6].apply(lambda s: s.map('{:.2f}'.format))
 
-    print(f"\n--- PoseBusters Filtered Results ---")
-    print(f"Compounds that PASSED PoseBusters: ({len(df3)})")
-    print(df3.to_string(index=False))
-    print(f"\nResults saved to: {output_with_pb_path}")
-    print("--------------------------------------")
+##############################################################################################################################
+""" Form Protein ligand complexes for PLIP analysis """
 
-    print(f"\nCompounds that FAILED PoseBusters: ({len(df6)})")
-    print(df6.to_string(index=False))
-    print(f"\nFailed results saved to: {output_without_pb_path}")
-    print("-------------------------------------")
+def convert_pdbqt_to_pdb(content):
+    from openbabel import pybel
 
-def convert_pdbqt_to_pdb(input_file_path, output_file_path):
-    mol = next(pybel.readfile("pdbqt", input_file_path))
-    mol.write("pdb", output_file_path, overwrite=True)
+    return pybel.readstring("pdbqt", content).write("pdb")
 
 def form_protein_ligands_complexes(folder_name, csv_path):
     pdb_file = next(f for f in os.listdir(folder_name) if f.endswith(".pdb"))
     protein_path = os.path.join(folder_name, pdb_file)
 
     with open(protein_path, 'r') as protein_file:
-        atom_lines = [line.strip() for line in protein_file if line.startswith("ATOM")]
-
-    all_pdbqt_files_dir = os.path.join(folder_name, "pipeline_files/8_pdbqt_out_threshold_m1")
-    selective_pdbqt_files_dir = os.path.join(folder_name, "plc")
-    if not os.path.exists(selective_pdbqt_files_dir):
-        os.makedirs(selective_pdbqt_files_dir)
+        protein_block = '\n'.join(line.strip() for line in protein_file if line.startswith("ATOM")) + '\n'
 
     final_output = pd.read_csv(csv_path)
 
-    for compound_name in final_output['Name']:
-        input_file_path = os.path.join(all_pdbqt_files_dir, f"{compound_name}_out.pdbqt")
-        output_file_path = os.path.join(selective_pdbqt_files_dir, f"{compound_name}.pdb")
-
-        if os.path.exists(input_file_path):
-            convert_pdbqt_to_pdb(input_file_path, output_file_path)
-
-            with open(output_file_path, 'r') as output_file:
-                pdb_content = output_file.readlines()
+    def complexes():
+        poses = open_stage(folder_name, "8_pdbqt_out_threshold_m1")
+        for compound_name, content in poses.items(final_output['Name']):
+            pdb_content = convert_pdbqt_to_pdb(content).splitlines(keepends=True)
             pdb_atom_lines = [line.replace("ATOM  ", "HETATM", 1) for line in pdb_content if line.startswith("ATOM")]
+            yield compound_name, protein_block + ''.join(pdb_atom_lines)
 
-            with open(output_file_path, 'w') as output_file:
-                output_file.write('\n'.join(atom_lines) + '\n')
-                output_file.write(''.join(pdb_atom_lines))
-
-def run_script(script_name, folder_name):
-    script_path = os.path.join(SCRIPT_BASE, script_name)
-    if not os.path.isfile(script_path):
-        raise FileNotFoundError(f"Script {script_path} not found")
-    print(f"Running script: {script_path} with folder: {folder_name}")
-    result = subprocess.run(["/bin/bash", script_path, folder_name],
-                            capture_output=True, text=True)
-    if result.returncode != 0:
-        print(f"Error running {script_name}:")
-        print(f"STDOUT: {result.stdout}")
-        print(f"STDERR: {result.stderr}")
-        raise RuntimeError(f"{script_name} failed")
-    print(f"{script_name} completed successfully.")
-
-def run_docking_pipeline(pdb_file_path, pdbqt_file_path, config_file_path, input_type, input_csv_path, input_smiles, folder_name):
-    os.makedirs(folder_name, exist_ok=True)
-    pdb_file_destination = os.path.join(folder_name, os.path.basename(pdb_file_path))
-    if not os.path.exists(pdb_file_destination):
-        shutil.copy(pdb_file_path, pdb_file_destination)
-
-    if input_type == "Multiple SMILES" and input_csv_path:
-        csv_data = pd.read_csv(input_csv_path)
-        csv_data = csv_data.dropna()
-        if "SMILES" not in csv_data.columns:
-            raise ValueError("CSV file must contain a 'SMILES' column.")
-        if "Name" not in csv_data.columns:
-            csv_data["Name"] = [f"agan{i+1}" for i in range(len(csv_data))]
-        input_df = csv_data[["Name", "SMILES"]]
-    elif input_type == "Single SMILES" and input_smiles:
-        input_df = pd.DataFrame({"Name": ["agan1"], "SMILES": [input_smiles]})
-    else:
-        raise ValueError("Please provide valid input for either Multiple SMILES or Single SMILES.")
+    PoseArchive.create(archive_path(folder_name, "plc")).add_many(complexes())
 
-    input_df.to_csv(os.path.join(folder_name, "input_smiles.csv"), index=False)
+    # zip_file_name = f'{os.path.basename(folder_name)}_protein_ligands_pdb_files.zip'
+    # zip_file_path = os.path.join(folder_name, zip_file_name)
+    # with zipfile.ZipFile(zip_file_path, 'w') as zip_ref:
+    #     for root, _, files in os.walk(selective_pdbqt_files_dir):
+    #         for file in files:
+    #             file_path = os.path.join(root, file)
+    #             zip_ref.write(file_path, os.path.relpath(file_path, selective_pdbqt_files_dir))
+                
+    # shutil.rmtree(selective_pdbqt_files_dir)
+    # print(f"\033[1m\033[34m Protein_Ligands PDB files zipped to: \033[91m{zip_file_path}\033[0m")
 
-    df_no_salt = process_smiles_csv(folder_name, "input_smiles.csv")
-    convert_smiles_to_sdf_parallel(folder_name, df_no_salt, num_conformations=10)
 
-    run_script("1_sdf_to_mol2.sh", folder_name)
-    format_mol2_files(folder_name)
-    run_script("2_mol2_to_pdbqt.sh", folder_name)
-    run_script("3_pdbqt_to_smiles.sh", folder_name)
 
-    check_pdbqt_files(folder_name, "input_smiles.csv")
-    if input_type == "Multiple SMILES":
-        copy_correct_pdbqt_files(folder_name, "input_smiles.csv")
-    else:
-        copy_correct_pdbqt_files(folder_name, "input_smiles.csv")
-
-    num_batches = create_ligands_path_batchwise(folder_name)
-    ligand_batches = [f"unidock_pdbqt_batch_{i+1}.txt" for i in range(num_batches)]
-    output_result_base = os.path.abspath(os.path.join(folder_name, "pipeline_files", "6_pdbqt_out"))
-    os.makedirs(output_result_base, exist_ok=True)
-    for i, ligands_batch_file in enumerate(ligand_batches):
-        ligands_path = os.path.join(folder_name, "pipeline_files", ligands_batch_file)
-        batch_output_logs = os.path.abspath(os.path.join(folder_name, "pipeline_files", f"unidock_output_batch_{i+1}.txt"))
-        open(batch_output_logs, 'w').close()
-        unidock_command = (
-            f"unidock "
-            f"--receptor {pdbqt_file_path} "
-            f"--gpu_batch $(cat {ligands_path}) "
-            f"--search_mode detail "
-            f"--scoring vina "
-            f"--config {config_file_path} "
-            f"--dir {output_result_base} "
-            f">> {batch_output_logs} 2>&1"
-        )
-        print(f"\u001b[1m\u001b[34mExecuting unidock command: {unidock_command}\u001b[0m")
-        exit_status = os.system(unidock_command)
-        if exit_status != 0:
-            print(f"\u001b[1m\u001b[91mError: unidock command failed with exit status {exit_status}. Check {batch_output_logs} for details.\u001b[0m")
-
-    affinity_from_pdbqt_files(folder_name)
-    extract_model1(folder_name)
-    run_script("4_pdbqt_to_sdf.sh", folder_name)
-
-    final_output_without_pb(folder_name, "input_smiles.csv", 0)
-
-    final_csv = os.path.join(folder_name, 'output.csv')
-    form_protein_ligands_complexes(folder_name, final_csv)
-
-def handle_posebusters(folder_name, lower_range, higher_range, pdb_file_path):
-    run_script("4_pdbqt_to_sdf.sh", folder_name)
-    extraction_based_on_threshold_for_pb(folder_name, lower_range, higher_range)
-    script_path = os.path.join(SCRIPT_BASE, "5_posebusters_filter.sh")
-    if not os.path.isfile(script_path):
-        raise FileNotFoundError(f"Script {script_path} not found")
-    subprocess.run(["/bin/bash", script_path, folder_name, pdb_file_path], text=True)
-    process_pb_csv(folder_name)
-    final_output_with_pb(folder_name, passes=19)  # Assuming a default pass threshold
-
-def run_plip_analysis(folder_name, pdb_file_path, lower_range=None, higher_range=None, use_pb_filtered_ligands=False):
-    print(f"Running PLIP analysis for folder: {folder_name}")
-
-    csv_file = "output.csv" if not use_pb_filtered_ligands else "output_with_pb.csv"
-    csv_path = os.path.join(folder_name, csv_file)
-
-    if not os.path.exists(csv_path):
-        raise FileNotFoundError(f"CSV file not found: {csv_path}. Please ensure docking and/or PoseBusters filtration has been run.")
-
-    df = pd.read_csv(csv_path)
-
-    if lower_range is not None and higher_range is not None:
-        df_filtered = df[(df['Docking score (kcal/mol)'] >= lower_range) &
-                         (df['Docking score (kcal/mol)'] <= higher_range)]
-        print(f"Filtered {len(df_filtered)} compounds for PLIP analysis based on affinity range.")
-    else:
-        df_filtered = df
-        print(f"Analyzing all {len(df_filtered)} compounds for PLIP analysis.")
 
-    plc_all_ligands_folder = os.path.join(folder_name, "plc_all_ligands")
+##############################################################################################################################
+""" Search interaction fingerprints """
 
-    if os.path.exists(plc_all_ligands_folder):
-        shutil.rmtree(plc_all_ligands_folder)
-    os.makedirs(plc_all_ligands_folder)
+def search_interaction_fingerprints(folder_name, reference, top_k=10, output_csv=None):
+    """Rank the PLIP-analysed poses by interaction fingerprint Tanimoto similarity to a reference ligand."""
+    plip_path = os.path.abspath(os.path.join(SCRIPT_BASE, "plip"))
+    output_path = os.path.abspath(os.path.join(folder_name, "output_plip_files"))
+    if not os.path.exists(os.path.join(output_path, "plip_result.csv")):
+        raise FileNotFoundError(f"No PLIP results in {output_path}. Please run PLIP analysis first.")
+
+    search_command = ["python3", os.path.join(plip_path, "interaction_fingerprint.py"), "-d", output_path,
+                      "-r", reference, "-k", str(top_k)]
+    if output_csv:
+        search_command += ["-o", os.path.abspath(output_csv)]
+    result = subprocess.run(search_command, check=False, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    if result.returncode != 0:
+        print(f"STDERR: {result.stderr}")
+        raise RuntimeError("Interaction fingerprint search failed")
+    print(result.stdout)
 
-    protein_ligand_complexes_folder = os.path.join(folder_name, "plc")
-    selected_ligands = df_filtered['Name'].tolist()
 
-    for ligand in selected_ligands:
-        pdb_file_name = f"{ligand}.pdb"
-        pdb_source_path = os.path.join(protein_ligand_complexes_folder, pdb_file_name)
 
-        if os.path.exists(pdb_source_path):
-            pdb_destination_path = os.path.join(plc_all_ligands_folder, pdb_file_name)
-            shutil.copy(pdb_source_path, pdb_destination_path)
-        else:
-            print(f"Warning: {pdb_file_name} not found in {protein_ligand_complexes_folder}")
 
-    plip_path = os.path.abspath(os.path.join(SCRIPT_BASE, "plip"))
-    pdb_path = os.path.abspath(plc_all_ligands_folder)
-    output_path = os.path.abspath(os.path.join(folder_name, "output_plip_files"))
+##############################################################################################################################
+""" Process SDF file """
+
+def process_sdf_file(sdf_file_path):
+    supplier = Chem.SDMolSupplier(sdf_file_path)
 
-    if os.path.exists(output_path):
-        shutil.rmtree(output_path)
-    os.makedirs(output_path, exist_ok=True)
-
-    os.environ["PYTHONPATH"] = plip_path
-
-    pdb_files = [f for f in os.listdir(pdb_path) if f.endswith(".pdb")]
-    for pdb_file in pdb_files:
-        input_file = os.path.join(pdb_path, pdb_file)
-        pdb_output_dir = os.path.join(output_path, os.path.splitext(pdb_file)[0])
-        os.makedirs(pdb_output_dir, exist_ok=True)
-
-        plip_cmd_path = os.path.join(plip_path, "plipcmd.py")
-        command = ["python3", plip_cmd_path, "-f", input_file, "-vxt", "-o", pdb_output_dir]
-        print(f"Executing PLIP command: {' '.join(command)}")
-        result = subprocess.run(command, cwd=pdb_path, check=False, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        if result.returncode != 0:
-            print(f"Error running plipcmd.py for {pdb_file}:")
-            print(f"STDOUT: {result.stdout.decode()}")
-            print(f"STDERR: {result.stderr.decode()}")
-            raise RuntimeError(f"plipcmd.py failed for {pdb_file}")
-        if result.returncode != 0:
-            print(f"Error running plipcmd.py for {pdb_file}:")
-            print(f"STDOUT: {result.stdout.decode()}")
-            print(f"STDERR: {result.stderr.decode()}")
-            raise RuntimeError(f"plipcmd.py failed for {pdb_file}")
-
-    post_process_command = ["python3", os.path.join(plip_path, "plip_post_process.py"), "-d", output_path]
-    print(f"Executing PLIP post-process command: {' '.join(post_process_command)}")
-    subprocess.run(post_process_command, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-
-    print(f"PLIP analysis completed. Results saved to: {output_path}")
-    return output_path
\ No newline at end of file
+    for mol in supplier:
+        if mol is not None:
+            if mol.GetNumConformers() > 0:
+                conf = mol.GetConformer()
+                for atom in mol.GetAtoms():
+                    pos = conf.GetAtomPosition(atom.GetIdx())
+                    print(f"Atom {atom.GetIdx()}: {pos.x}, {pos.y}, {pos.z}")
+
+                img_size = (500, 500)  
+                img = Draw.MolToImage(mol, size=img_size)
+                img.show()
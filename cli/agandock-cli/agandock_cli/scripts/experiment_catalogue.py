@@ -0,0 +1,277 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import contextlib
+
+
+CATALOGUE_PATH = os.environ.get("AGANDOCK_CATALOGUE",
+                                os.path.join(os.path.expanduser("~"), ".agandock", "catalogue.db"))
+STAGES = ("docking", "posebusters", "plip")
+STATUSES = ("running", "done", "failed")
+RECEPTOR_FILE = "receptor.json"  # Receptor name and hash kept in the experiment folder for re-indexing
+
+# Columns a stage may update besides its status
+STAT_COLUMNS = ("receptor", "receptor_hash", "library_size", "num_docked", "best_score", "mean_score",
+                "elapsed_seconds", "num_pb_passed", "num_plip")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS experiments (
+    path TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    created REAL NOT NULL,
+    updated REAL NOT NULL,
+    receptor TEXT,
+    receptor_hash TEXT,
+    library_size INTEGER,
+    num_docked INTEGER,
+    best_score REAL,
+    mean_score REAL,
+    elapsed_seconds REAL,
+    num_pb_passed INTEGER,
+    num_plip INTEGER,
+    docking_status TEXT,
+    posebusters_status TEXT,
+    plip_status TEXT
+);
+CREATE INDEX IF NOT EXISTS experiments_name ON experiments (name);
+CREATE INDEX IF NOT EXISTS experiments_name_nocase ON experiments (name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS experiments_receptor_nocase ON experiments (receptor COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS experiments_created ON experiments (created);
+CREATE INDEX IF NOT EXISTS experiments_receptor_hash ON experiments (receptor_hash);
+CREATE INDEX IF NOT EXISTS experiments_best_score ON experiments (best_score);
+CREATE INDEX IF NOT EXISTS experiments_docking_status ON experiments (docking_status);
+"""
+
+
+
+##############################################################################################################################
+""" Catalogue database """
+
+def connect(db_path=None):
+    """Open the catalogue, creating the database and its indexes on first use."""
+    db_path = db_path or CATALOGUE_PATH
+    os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+@contextlib.contextmanager
+def open_catalogue(db_path=None):
+    """Connection that commits on success and is always closed."""
+    conn = connect(db_path)
+    try:
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+def file_hash(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _upsert(folder, values, db_path=None):
+    """
+    Insert or update the catalogue row of an experiment. The catalogue is only an index of the
+    experiment folders, so a failing write is reported and never fails the pipeline itself.
+    """
+    path = os.path.abspath(folder)
+    now = time.time()
+    values = dict(values, updated=now)
+    columns = ", ".join(values)
+    placeholders = ", ".join("?" for _ in values)
+    updates = ", ".join(f"{col}=excluded.{col}" for col in values)
+    try:
+        with open_catalogue(db_path) as conn:
+            conn.execute(f"INSERT INTO experiments (path, name, created, {columns}) VALUES (?, ?, ?, {placeholders}) "
+                         f"ON CONFLICT(path) DO UPDATE SET {updates}",
+                         [path, os.path.basename(path), now, *values.values()])
+        return True
+    except (sqlite3.Error, OSError) as e:
+        print(f"\u001b[1m\u001b[33mWarning: could not update the experiment catalogue: {e}\u001b[0m")
+        return False
+
+
+
+##############################################################################################################################
+""" Recording experiments """
+
+def _write_receptor(folder, receptor, receptor_hash):
+    try:
+        with open(os.path.join(folder, RECEPTOR_FILE), "w") as f:
+            json.dump({"receptor": receptor, "receptor_hash": receptor_hash}, f)
+    except OSError:
+        pass  # index_experiment then hashes the receptor file found in the folder
+
+
+def _read_receptor(folder):
+    """
+    Receptor name and hash of an experiment folder: those stored at registration, otherwise the hash
+    of its receptor PDBQT, otherwise of its receptor PDB (the CLI copies only the PDB).
+    """
+    try:
+        with open(os.path.join(folder, RECEPTOR_FILE)) as f:
+            stored = json.load(f)
+        return stored["receptor"], stored["receptor_hash"]
+    except (OSError, ValueError, KeyError):
+        pass
+    for extension in (".pdbqt", ".pdb"):
+        receptors = sorted(f for f in os.listdir(folder) if f.endswith(extension))
+        if receptors:
+            return receptors[0], file_hash(os.path.join(folder, receptors[0]))
+    return None, None
+
+
+def register_experiment(folder, receptor_path=None, library_size=None, db_path=None):
+    """Add an experiment to the catalogue when its folder is created."""
+    values = {"docking_status": "running"}
+    if receptor_path and os.path.exists(receptor_path):
+        values["receptor"] = os.path.basename(receptor_path)
+        values["receptor_hash"] = file_hash(receptor_path)
+        _write_receptor(folder, values["receptor"], values["receptor_hash"])
+    if library_size is not None:
+        values["library_size"] = int(library_size)
+    return _upsert(folder, values, db_path)
+
+
+def record_stage(folder, stage, status, db_path=None, **stats):
+    """Set the status of a pipeline stage and any summary statistics it produced."""
+    if stage not in STAGES:
+        raise ValueError(f"Unknown stage: {stage}")
+    if status not in STATUSES:
+        raise ValueError(f"Unknown status: {status}")
+    unknown = set(stats) - set(STAT_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown catalogue columns: {', '.join(sorted(unknown))}")
+    values = {f"{stage}_status": status}
+    values.update({col: val for col, val in stats.items() if val is not None})
+    return _upsert(folder, values, db_path)
+
+
+def _count_rows(csv_path):
+    import pandas as pd
+
+    if not os.path.exists(csv_path):
+        return None
+    return len(pd.read_csv(csv_path, usecols=[0]))
+
+
+def docking_stats(folder):
+    """Summary statistics of a finished docking run, read from its output files."""
+    import pandas as pd
+
+    stats = {"library_size": _count_rows(os.path.join(folder, "input_smiles.csv"))}
+    output_csv = os.path.join(folder, "output.csv")
+    if os.path.exists(output_csv):
+        scores = pd.to_numeric(pd.read_csv(output_csv)["Docking score (kcal/mol)"], errors="coerce").dropna()
+        stats["num_docked"] = len(scores)
+        if len(scores):
+            stats["best_score"] = float(scores.min())
+            stats["mean_score"] = round(float(scores.mean()), 3)
+    time_path = os.path.join(folder, "pipeline_files", "execution_time", "total_execution_time.txt")
+    if os.path.exists(time_path):
+        with open(time_path) as f:
+            try:
+                stats["elapsed_seconds"] = float(f.read().strip())
+            except ValueError:
+                pass
+    return stats
+
+
+def index_experiment(folder, db_path=None):
+    """
+    (Re)build the catalogue row of an existing experiment folder from its files. Used for
+    experiments written before the catalogue existed.
+    """
+    values = docking_stats(folder)
+    values["receptor"], values["receptor_hash"] = _read_receptor(folder)
+    values["docking_status"] = "done" if values.get("num_docked") is not None else "failed"
+    if os.path.exists(os.path.join(folder, "output_with_pb.csv")):
+        values["posebusters_status"] = "done"
+        values["num_pb_passed"] = _count_rows(os.path.join(folder, "output_with_pb.csv"))
+    plip_result = os.path.join(folder, "output_plip_files", "plip_result.csv")
+    if os.path.exists(plip_result):
+        values["plip_status"] = "done"
+        values["num_plip"] = _count_rows(plip_result)
+    return _upsert(folder, {k: v for k, v in values.items() if v is not None}, db_path)
+
+
+def rebuild_catalogue(base_path=".", db_path=None):
+    """Index every experiment folder (one holding input_smiles.csv) directly below base_path and return the count."""
+    folders = [os.path.join(base_path, f) for f in os.listdir(base_path)
+               if os.path.isfile(os.path.join(base_path, f, "input_smiles.csv"))]
+    return sum(bool(index_experiment(folder, db_path)) for folder in folders)
+
+
+
+##############################################################################################################################
+""" Listing experiments """
+
+def _escape_like(text):
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def list_experiments(search=None, receptor_hash=None, stage=None, status=None, max_best_score=None,
+                     base_path=None, order_by="created", descending=True, limit=None, include_missing=False,
+                     db_path=None):
+    """
+    Query the catalogue. Equality filters (receptor hash, stage status) and the sort columns are
+    indexed; `search` matches the start of experiment or receptor names (case-insensitive, also an
+    index search). Returns a list of dicts.
+    """
+    if order_by not in ("created", "name", "best_score", "library_size", "updated"):
+        raise ValueError(f"Cannot order experiments by {order_by}")
+    clauses, params = [], []
+    if search:
+        # Prefix patterns are answered from the NOCASE indexes instead of scanning every row
+        clauses.append("(name LIKE ? ESCAPE '\\' OR receptor LIKE ? ESCAPE '\\')")
+        params += [f"{_escape_like(search)}%"] * 2
+    if receptor_hash:
+        clauses.append("receptor_hash LIKE ? ESCAPE '\\'")
+        params.append(f"{_escape_like(receptor_hash)}%")
+    if status:
+        if stage not in STAGES:
+            raise ValueError("Filtering by status requires a stage")
+        clauses.append(f"{stage}_status = ?")
+        params.append(status)
+    if max_best_score is not None:
+        clauses.append("best_score <= ?")
+        params.append(max_best_score)
+    if base_path is not None:
+        clauses.append("path LIKE ? ESCAPE '\\'")
+        params.append(f"{_escape_like(os.path.join(os.path.abspath(base_path), ''))}%")
+
+    query = "SELECT * FROM experiments"
+    if clauses:
+        query += " WHERE " + " AND ".join(clauses)
+    query += f" ORDER BY {order_by} {'DESC' if descending else 'ASC'}"
+    if limit:
+        query += f" LIMIT {int(limit)}"
+
+    try:
+        with open_catalogue(db_path) as conn:
+            rows = [dict(row) for row in conn.execute(query, params)]
+    except (sqlite3.Error, OSError) as e:
+        print(f"\u001b[1m\u001b[33mWarning: could not read the experiment catalogue: {e}\u001b[0m")
+        return []
+    if not include_missing:
+        rows = [row for row in rows if os.path.isdir(row["path"])]
+    return rows
+
+
+def remove_missing(db_path=None):
+    """Drop catalogue rows whose experiment folder was deleted and return how many were removed."""
+    with open_catalogue(db_path) as conn:
+        missing = [row["path"] for row in conn.execute("SELECT path FROM experiments")
+                   if not os.path.isdir(row["path"])]
+        conn.executemany("DELETE FROM experiments WHERE path = ?", [(path,) for path in missing])
+    return len(missing)
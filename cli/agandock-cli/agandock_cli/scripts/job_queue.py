@@ -0,0 +1,431 @@
+import os
+import sys
+import json
+import time
+import uuid
+import signal
+import socket
+import sqlite3
+import shutil
+import argparse
+import contextlib
+import subprocess
+import multiprocessing as mp
+
+from collections import Counter
+
+
+JOBS_PATH = os.environ.get("AGANDOCK_JOBS", os.path.join(os.path.expanduser("~"), ".agandock", "jobs.db"))
+COMMANDS = ("docking", "ensemble", "hierarchical", "posebusters", "plip")
+DOCKING_COMMANDS = ("docking", "ensemble", "hierarchical")  # Runs a docking submission can queue
+JOB_STATUSES = ("queued", "running", "done", "failed", "cancelled")
+EVENTS_DIR = os.path.join("pipeline_files", "jobs")
+POLL_INTERVAL = 2.0
+HEARTBEAT_TIMEOUT = 30.0  # A worker that has not checked in for this long is gone
+
+# Scheduling: jobs are admitted against the host budget (AGANDOCK_HOST_CPUS, AGANDOCK_HOST_GPUS as
+# device IDs, AGANDOCK_HOST_MEMORY_GB; the whole machine by default) and a running job's stages size
+# their worker pools from its CPU allocation in AGANDOCK_WORKERS.
+WORKERS_ENV = "AGANDOCK_WORKERS"
+RESOURCES = ("cpus", "gpus", "memory_gb")
+PRIORITIES = {"low": -1, "normal": 0, "high": 1}
+JOB_DEMANDS = {
+    "docking": {"cpus": 4, "gpus": 1, "memory_gb": 8.0},
+    "ensemble": {"cpus": 4, "gpus": 1, "memory_gb": 8.0},
+    "hierarchical": {"cpus": 4, "gpus": 1, "memory_gb": 8.0},
+    "posebusters": {"cpus": 4, "gpus": 0, "memory_gb": 4.0},
+    "plip": {"cpus": 4, "gpus": 0, "memory_gb": 4.0},
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    command TEXT NOT NULL,
+    folder TEXT NOT NULL,
+    params TEXT NOT NULL,
+    owner TEXT,
+    priority INTEGER NOT NULL DEFAULT 0,
+    cpus INTEGER NOT NULL,
+    gpus INTEGER NOT NULL,
+    memory_gb REAL NOT NULL,
+    gpu_ids TEXT,
+    status TEXT NOT NULL,
+    submitted REAL NOT NULL,
+    started REAL,
+    finished REAL,
+    pid INTEGER,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, priority, submitted);
+CREATE TABLE IF NOT EXISTS workers (
+    pid INTEGER PRIMARY KEY,
+    host TEXT NOT NULL,
+    started REAL NOT NULL,
+    heartbeat REAL NOT NULL
+);
+"""
+
+
+
+##############################################################################################################################
+""" Job database """
+
+def connect(db_path=None):
+    """Open the job queue, creating the database on first use."""
+    db_path = db_path or JOBS_PATH
+    os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+@contextlib.contextmanager
+def open_jobs(db_path=None):
+    """Connection that commits on success and is always closed."""
+    conn = connect(db_path)
+    try:
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+def _job(row):
+    job = dict(row)
+    job["params"] = json.loads(job["params"])
+    return job
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+
+##############################################################################################################################
+""" Submitting and following jobs """
+
+def events_path(folder, job_id):
+    return os.path.join(folder, EVENTS_DIR, f"{job_id}.jsonl")
+
+
+def submit_job(command, folder, owner=None, priority=0, cpus=None, gpus=None, memory_gb=None, db_path=None, **params):
+    """
+    Queue an engine run (agandock_cli.scripts.pipeline) on an experiment folder and return its job ID. params
+    are the keyword arguments of the engine function besides folder_name and must be JSON values.
+    priority is a PRIORITIES value; cpus, gpus and memory_gb default to the command's JOB_DEMANDS.
+    """
+    if command not in COMMANDS:
+        raise ValueError(f"Unknown command: {command}")
+    demand = dict(JOB_DEMANDS[command])
+    demand.update({r: v for r, v in (("cpus", cpus), ("gpus", gpus), ("memory_gb", memory_gb)) if v is not None})
+    if demand["cpus"] < 1 or demand["gpus"] < 0 or demand["memory_gb"] < 0:
+        raise ValueError(f"Invalid resource request: {demand}")
+    folder = os.path.abspath(folder)
+    os.makedirs(os.path.join(folder, EVENTS_DIR), exist_ok=True)
+    job_id = uuid.uuid4().hex[:12]
+    with open_jobs(db_path) as conn:
+        conn.execute("INSERT INTO jobs (id, command, folder, params, owner, priority, cpus, gpus, memory_gb, status, submitted) "
+                     "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                     [job_id, command, folder, json.dumps(params), owner, int(priority), int(demand["cpus"]),
+                      int(demand["gpus"]), float(demand["memory_gb"]), "queued", time.time()])
+    return job_id
+
+
+def get_job(job_id, db_path=None):
+    with open_jobs(db_path) as conn:
+        row = conn.execute("SELECT * FROM jobs WHERE id = ?", [job_id]).fetchone()
+    return _job(row) if row else None
+
+
+def list_jobs(command=None, status=None, owner=None, limit=None, db_path=None):
+    """Jobs, newest first. command is one command or a sequence of them (e.g. DOCKING_COMMANDS)."""
+    clauses, params = [], []
+    if isinstance(command, (list, tuple)):
+        clauses.append(f"command IN ({', '.join('?' * len(command))})")
+        params.extend(command)
+        command = None
+    for column, value in (("command", command), ("status", status), ("owner", owner)):
+        if value is not None:
+            clauses.append(f"{column} = ?")
+            params.append(value)
+    query = "SELECT * FROM jobs"
+    if clauses:
+        query += " WHERE " + " AND ".join(clauses)
+    query += " ORDER BY submitted DESC"
+    if limit:
+        query += f" LIMIT {int(limit)}"
+    with open_jobs(db_path) as conn:
+        return [_job(row) for row in conn.execute(query, params)]
+
+
+def read_job_events(job):
+    """Events written so far by a job (PipelineEvent.to_dict records); a line being written is skipped."""
+    path = events_path(job["folder"], job["id"])
+    if not os.path.exists(path):
+        return []
+    events = []
+    with open(path) as f:
+        for line in f:
+            try:
+                events.append(json.loads(line))
+            except ValueError:
+                continue
+    return events
+
+
+def job_progress(events):
+    """Last finished docking step (-1 before the first), running step, last stage and latest message of a job."""
+    progress = {"step_done": -1, "step": None, "stage": None, "message": None}
+    for event in events:
+        if event["kind"] == "step" and event["status"] == "done":
+            progress["step_done"] = event["index"]
+        elif event["kind"] == "step":
+            progress["step"] = event["step"]
+        elif event["kind"] == "stage":
+            progress["stage"] = event["stage"]
+        elif event["kind"] in ("message", "failed"):
+            progress["message"] = event["message"]
+    return progress
+
+
+def cancel_job(job_id, db_path=None):
+    """Cancel a queued job, or stop a running one with everything it started. Returns whether it was cancelled."""
+    with open_jobs(db_path) as conn:
+        row = conn.execute("SELECT status, pid FROM jobs WHERE id = ?", [job_id]).fetchone()
+        if row is None or row["status"] not in ("queued", "running"):
+            return False
+        conn.execute("UPDATE jobs SET status = 'cancelled', finished = ? WHERE id = ?", [time.time(), job_id])
+    if row["status"] == "running" and row["pid"]:
+        # Jobs run in their own process group, so unidock, obabel and worker pools stop as well
+        with contextlib.suppress(ProcessLookupError, PermissionError):
+            os.killpg(row["pid"], signal.SIGTERM)
+    return True
+
+
+
+##############################################################################################################################
+""" Scheduling """
+
+def _detect_gpus():
+    if os.environ.get("CUDA_VISIBLE_DEVICES") is not None:
+        return [g.strip() for g in os.environ["CUDA_VISIBLE_DEVICES"].split(",") if g.strip()]
+    if shutil.which("nvidia-smi") is None:
+        return []
+    result = subprocess.run(["nvidia-smi", "--query-gpu=index", "--format=csv,noheader"], capture_output=True, text=True)
+    return result.stdout.split() if result.returncode == 0 else []
+
+
+def host_budget():
+    """CPUs, GPUs (with their device IDs) and memory in GB that the scheduler hands out on this host."""
+    gpu_ids = os.environ.get("AGANDOCK_HOST_GPUS")
+    gpu_ids = [g.strip() for g in gpu_ids.split(",") if g.strip()] if gpu_ids is not None else _detect_gpus()
+    memory_gb = os.environ.get("AGANDOCK_HOST_MEMORY_GB")
+    memory_gb = float(memory_gb) if memory_gb else os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") / 1024 ** 3
+    return {"cpus": int(os.environ.get("AGANDOCK_HOST_CPUS") or os.cpu_count() or 1), "gpus": len(gpu_ids),
+            "memory_gb": memory_gb, "gpu_ids": gpu_ids}
+
+
+def allocation(job, budget):
+    """Resources a job gets: its request capped at the budget, so an oversized request still runs (alone)."""
+    return {r: min(job[r], budget[r]) for r in RESOURCES}
+
+
+def schedule(queued, running, budget):
+    """
+    The queued jobs to start now, in start order. Jobs are ranked by priority, then by how many CPUs
+    their owner already holds (fair share, re-ranked after every start) and then by age. A job that
+    does not fit reserves the resources it is short of, so lower-ranked jobs can only overtake it
+    with resources it is not waiting for; a GPU-bound docking run does not hold up CPU-only jobs,
+    and a large job is not starved by a stream of small ones.
+    """
+    free = {r: budget[r] - sum(allocation(job, budget)[r] for job in running) for r in RESOURCES}
+    held = Counter()
+    for job in running:
+        held[job["owner"]] += allocation(job, budget)["cpus"]
+
+    started, blocked, pending = [], set(), list(queued)
+    while pending:
+        job = min(pending, key=lambda j: (-j["priority"], held[j["owner"]], j["submitted"]))
+        pending.remove(job)
+        demand = allocation(job, budget)
+        short = {r for r in RESOURCES if demand[r] > free[r]}
+        if short or any(demand[r] > 0 for r in blocked):
+            blocked |= short
+            continue
+        for r in RESOURCES:
+            free[r] -= demand[r]
+        held[job["owner"]] += demand["cpus"]
+        started.append(job)
+    return started
+
+
+def queue_usage(db_path=None):
+    """Host budget next to the resources held by running jobs and the length of the queue."""
+    budget = host_budget()
+    with open_jobs(db_path) as conn:
+        running = [_job(row) for row in conn.execute("SELECT * FROM jobs WHERE status = 'running'")]
+        queued = conn.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()[0]
+    used = {r: sum(allocation(job, budget)[r] for job in running) for r in RESOURCES}
+    return {"budget": {r: budget[r] for r in RESOURCES}, "used": used, "running": len(running), "queued": queued}
+
+
+
+##############################################################################################################################
+""" Running jobs """
+
+def _engine_function(command):
+    # The engine pulls in pandas, RDKit and OpenBabel, only the job processes need it
+    from agandock_cli.scripts.pipeline import (run_docking, run_ensemble_docking, run_hierarchical_docking, run_posebusters,
+                                               run_plip_analysis)
+    return {"docking": run_docking, "ensemble": run_ensemble_docking, "hierarchical": run_hierarchical_docking,
+            "posebusters": run_posebusters, "plip": run_plip_analysis}[command]
+
+
+def _finish(job_id, status, error=None, db_path=None):
+    """Record the outcome unless the job was cancelled meanwhile."""
+    with open_jobs(db_path) as conn:
+        conn.execute("UPDATE jobs SET status = ?, finished = ?, error = ? WHERE id = ? AND status = 'running'",
+                     [status, time.time(), error, job_id])
+
+
+def run_job(job_id, db_path=None):
+    """Run one claimed job in this process, appending its events to <folder>/pipeline_files/jobs/<id>.jsonl."""
+    os.setpgrp()
+    job = get_job(job_id, db_path)
+    # Inherited by the stage pools, the shell scripts and PLIP; unidock only sees the assigned GPUs
+    os.environ[WORKERS_ENV] = str(job["cpus"])
+    if job["gpu_ids"] is not None:
+        os.environ["CUDA_VISIBLE_DEVICES"] = job["gpu_ids"]
+    path = events_path(job["folder"], job_id)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "a", buffering=1) as log:
+        def progress(event):
+            log.write(json.dumps(event.to_dict(), default=str) + "\n")
+
+        try:
+            _engine_function(job["command"])(folder_name=job["folder"], progress=progress, **job["params"])
+        except Exception as e:
+            _finish(job_id, "failed", f"{type(e).__name__}: {e}", db_path)
+            return
+    _finish(job_id, "done", db_path=db_path)
+
+
+def _claim_jobs(conn, budget, limit=None):
+    """
+    Mark the jobs the scheduler admits as running with their allocation and GPU devices, and return
+    them. The write lock keeps workers sharing the queue from handing out the same resources.
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        running = [_job(row) for row in conn.execute("SELECT * FROM jobs WHERE status = 'running'")]
+        queued = [_job(row) for row in conn.execute("SELECT * FROM jobs WHERE status = 'queued'")]
+        claimed = schedule(queued, running, budget)[:limit]
+        busy_gpus = {g for job in running if job["gpu_ids"] for g in job["gpu_ids"].split(",")}
+        for job in claimed:
+            job.update(allocation(job, budget))
+            gpu_ids = [g for g in budget["gpu_ids"] if g not in busy_gpus][:job["gpus"]]
+            busy_gpus.update(gpu_ids)
+            # Without GPUs in the budget the device visibility of the host is left alone
+            job["gpu_ids"] = ",".join(gpu_ids) if budget["gpu_ids"] else None
+            conn.execute("UPDATE jobs SET status = 'running', started = ?, cpus = ?, gpus = ?, memory_gb = ?, gpu_ids = ? "
+                         "WHERE id = ?", [time.time(), job["cpus"], job["gpus"], job["memory_gb"], job["gpu_ids"], job["id"]])
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+    return claimed
+
+
+def fail_orphaned_jobs(db_path=None):
+    """Jobs left 'running' by a process that no longer exists (worker or host restart) are marked failed."""
+    with open_jobs(db_path) as conn:
+        orphans = [row["id"] for row in conn.execute("SELECT id, pid FROM jobs WHERE status = 'running' AND pid IS NOT NULL")
+                   if not _pid_alive(row["pid"])]
+        conn.executemany("UPDATE jobs SET status = 'failed', finished = ?, error = 'Job process exited' WHERE id = ?",
+                         [(time.time(), job_id) for job_id in orphans])
+    return len(orphans)
+
+
+def run_worker(max_jobs=None, poll_interval=POLL_INTERVAL, once=False, db_path=None):
+    """
+    Start the jobs the scheduler admits, each in its own process, keeping at most max_jobs running
+    (only the host budget limits them by default). With once=True the worker returns when no job
+    is running and none of the queued ones can start.
+    """
+    budget = host_budget()
+    conn = connect(db_path)
+    conn.isolation_level = None
+    pid = os.getpid()
+    conn.execute("INSERT OR REPLACE INTO workers (pid, host, started, heartbeat) VALUES (?, ?, ?, ?)",
+                 [pid, socket.gethostname(), time.time(), time.time()])
+    fail_orphaned_jobs(db_path)
+    running = {}
+    try:
+        while True:
+            for job_id, process in list(running.items()):
+                if not process.is_alive():
+                    process.join()
+                    del running[job_id]
+                    # A job process killed from outside (out of memory, kill -9) never recorded its outcome
+                    _finish(job_id, "failed", f"Job process exited with code {process.exitcode}", db_path)
+            limit = None if max_jobs is None else max_jobs - len(running)
+            for job in _claim_jobs(conn, budget, limit):
+                process = mp.Process(target=run_job, args=(job["id"], db_path))
+                process.start()
+                conn.execute("UPDATE jobs SET pid = ? WHERE id = ?", [process.pid, job["id"]])
+                running[job["id"]] = process
+            conn.execute("UPDATE workers SET heartbeat = ? WHERE pid = ?", [time.time(), pid])
+            if once and not running:
+                return
+            time.sleep(poll_interval)
+    finally:
+        conn.execute("DELETE FROM workers WHERE pid = ?", [pid])
+        conn.close()
+
+
+def worker_alive(db_path=None):
+    with open_jobs(db_path) as conn:
+        workers = conn.execute("SELECT pid FROM workers WHERE host = ? AND heartbeat > ?",
+                               [socket.gethostname(), time.time() - HEARTBEAT_TIMEOUT]).fetchall()
+    return any(_pid_alive(row["pid"]) for row in workers)
+
+
+def ensure_worker(max_jobs=None, db_path=None):
+    """Start a detached worker for this host unless one is running. Returns whether one was started."""
+    if worker_alive(db_path):
+        return False
+    # python -m <this module> has to be started from the directory holding the top-level package
+    package_root = os.path.dirname(os.path.abspath(__file__))
+    for _ in range(__name__.count(".")):
+        package_root = os.path.dirname(package_root)
+    db_path = os.path.abspath(db_path or JOBS_PATH)
+    command = [sys.executable, "-m", __name__, "worker", "--db", db_path]
+    if max_jobs is not None:
+        command += ["--max_jobs", str(max_jobs)]
+    with open(os.path.join(os.path.dirname(db_path), "worker.log"), "a") as log:
+        subprocess.Popen(command, cwd=package_root, stdout=log, stderr=subprocess.STDOUT, start_new_session=True)
+    return True
+
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Background worker of the AGANDOCK job queue.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    worker_parser = subparsers.add_parser("worker", help="Run queued jobs")
+    worker_parser.add_argument("--max_jobs", type=int, default=None, help="Most jobs run at the same time (default: as the host budget allows)")
+    worker_parser.add_argument("--once", action="store_true", help="Exit when the queue is empty")
+    worker_parser.add_argument("--db", default=None, help="Job database (default: AGANDOCK_JOBS or ~/.agandock/jobs.db)")
+    args = parser.parse_args(argv)
+    run_worker(args.max_jobs, once=args.once, db_path=args.db)
+
+
+if __name__ == "__main__":
+    main()
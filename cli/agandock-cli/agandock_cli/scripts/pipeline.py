@@ -0,0 +1,535 @@
+import os
+import time
+import queue
+import shutil
+import threading
+import subprocess
+import pandas as pd
+
+from contextlib import contextmanager
+from agandock_cli.scripts.docking_utils import (SCRIPT_BASE, process_smiles_csv, convert_smiles_to_sdf_parallel, format_mol2_files,
+                                                check_pdbqt_files, copy_correct_pdbqt_files, create_ligands_path_batchwise,
+                                                affinity_from_pdbqt_files, extract_model1, convert_poses_to_sdf,
+                                                final_output_without_pb, final_output_for_ensemble, final_output_for_hierarchy,
+                                                form_protein_ligands_complexes, select_top_tier, extraction_based_on_threshold_for_pb,
+                                                process_pb_csv, final_output_with_pb)
+from agandock_cli.scripts.result_store import store_plip_results
+from agandock_cli.scripts.pose_archive import PoseArchive, archive_path, open_stage, pack_directory
+from agandock_cli.scripts.coordinate_store import build_pose_coordinates
+from agandock_cli.scripts.experiment_catalogue import register_experiment, record_stage, docking_stats
+from agandock_cli.scripts.stage_metrics import stage_timer, count_files, write_total_time
+
+
+# Steps of the docking run as front ends show them; every timed stage belongs to one of them
+DOCKING_STEPS = ("Preprocess Input", "Convert SMILES to SDF", "Convert SDF to PDBQT", "Verify PDBQT Files", "Perform Docking")
+PB_PASSES = 19
+# Receptors of an ensemble are docked in <experiment>/receptors/<name>
+ENSEMBLE_DIR = "receptors"
+# Hierarchical screening docks the whole library with the fast search in <experiment>/tiers/fast
+# and re-docks the best TOP_FRACTION of it with the detail search in the experiment folder
+TIERS_DIR = "tiers"
+TOP_FRACTION = 0.1
+
+
+
+##############################################################################################################################
+""" Progress events """
+
+class PipelineEvent:
+    """
+    One progress event of an engine run (command "docking", "posebusters" or "plip"):
+
+    step     a DOCKING_STEPS entry is "running" or "done" (index and step)
+    stage    a timed stage finished (stage, data with items_in / items_out / wall_s)
+    message  a console message (message, level "info" or "warning")
+    done     the run finished (data with its summary)
+    failed   the run raised (message)
+    """
+
+    def __init__(self, kind, command, folder, **fields):
+        self.kind = kind
+        self.command = command
+        self.folder = folder
+        self.time = time.time()
+        self.index = fields.get("index")
+        self.step = fields.get("step")
+        self.status = fields.get("status")
+        self.stage = fields.get("stage")
+        self.message = fields.get("message")
+        self.level = fields.get("level")
+        self.data = fields.get("data")
+
+    def to_dict(self):
+        return {key: value for key, value in vars(self).items() if value is not None}
+
+
+class Progress:
+    """Sends the events of one run to a callback; without a callback the run is silent."""
+
+    def __init__(self, command, folder, callback=None):
+        self.command = command
+        self.folder = folder
+        self.callback = callback
+
+    def emit(self, kind, **fields):
+        if self.callback is not None:
+            self.callback(PipelineEvent(kind, self.command, self.folder, **fields))
+
+    def step(self, index, status="running"):
+        self.emit("step", index=index, step=DOCKING_STEPS[index], status=status)
+
+    def message(self, message, level="info"):
+        self.emit("message", message=message, level=level)
+
+    @contextmanager
+    def stage(self, stage, items_in=None):
+        """stage_timer that also reports the finished stage."""
+        start = time.perf_counter()
+        with stage_timer(self.folder, stage, items_in=items_in) as record:
+            yield record
+        self.emit("stage", stage=stage, data={"items_in": record.items_in, "items_out": record.items_out,
+                                              "wall_s": round(time.perf_counter() - start, 3)})
+
+    @contextmanager
+    def running(self):
+        try:
+            yield self
+        except Exception as e:
+            self.emit("failed", message=str(e) or type(e).__name__)
+            raise
+
+
+class PipelineRun:
+    """
+    Runs an engine function in a worker thread and queues its events, so a front end polls
+    progress instead of computing in its own (render) thread.
+    """
+
+    def __init__(self, function, *args, **kwargs):
+        self.events = queue.Queue()
+        self.result = None
+        self.error = None
+        self._thread = threading.Thread(target=self._run, args=(function, args, kwargs), daemon=True)
+        self._thread.start()
+
+    def _run(self, function, args, kwargs):
+        try:
+            self.result = function(*args, progress=self.events.put, **kwargs)
+        except Exception as e:
+            self.error = e
+
+    @property
+    def finished(self):
+        return not self._thread.is_alive() and self.events.empty()
+
+    def poll(self, timeout=0.5):
+        """Events queued since the last poll, waiting up to `timeout` seconds for the first one."""
+        try:
+            events = [self.events.get(timeout=timeout)]
+        except queue.Empty:
+            return []
+        while True:
+            try:
+                events.append(self.events.get_nowait())
+            except queue.Empty:
+                return events
+
+
+
+##############################################################################################################################
+""" Docking """
+
+def run_script(script_name, *args):
+    script_path = os.path.join(SCRIPT_BASE, script_name)
+    if not os.path.isfile(script_path):
+        raise FileNotFoundError(f"Script {script_path} not found")
+    result = subprocess.run(["/bin/bash", script_path, *args], capture_output=True, text=True)
+    if result.returncode != 0:
+        print(f"STDOUT: {result.stdout}")
+        print(f"STDERR: {result.stderr}")
+        raise RuntimeError(f"{script_name} failed")
+    return result
+
+
+def prepare_input(folder_name, input_type, input_csv=None, input_smiles=None):
+    """Write the ligand library (Name, SMILES) to <folder>/input_smiles.csv; input_csv may be a path or a file object."""
+    if input_type == "Multiple SMILES" and input_csv is not None:
+        csv_data = pd.read_csv(input_csv).dropna()
+        if "SMILES" not in csv_data.columns:
+            raise ValueError("CSV file must contain a 'SMILES' column.")
+        if "Name" not in csv_data.columns:
+            csv_data["Name"] = [f"agan{i+1}" for i in range(len(csv_data))]
+        input_df = csv_data[["Name", "SMILES"]]
+    elif input_type == "Single SMILES" and input_smiles:
+        input_df = pd.DataFrame({"Name": ["agan1"], "SMILES": [input_smiles]})
+    else:
+        raise ValueError("Please provide valid input for either Multiple SMILES or Single SMILES.")
+
+    input_df.to_csv(os.path.join(folder_name, "input_smiles.csv"), index=False)
+    return input_df
+
+
+def run_docking(pdb_file_path, pdbqt_file_path, config_file_path, input_type, input_csv, input_smiles, folder_name,
+                progress=None):
+    """
+    Dock a ligand library against a receptor into folder_name and return the results table
+    (output.csv). progress is called with a PipelineEvent for every step, stage and message.
+    """
+    start_time = time.perf_counter()
+    progress = Progress("docking", folder_name, progress)
+    with progress.running():
+        progress.step(0)
+        os.makedirs(folder_name, exist_ok=True)
+        pdb_file_destination = os.path.join(folder_name, os.path.basename(pdb_file_path))
+        if not os.path.exists(pdb_file_destination):
+            shutil.copy(pdb_file_path, pdb_file_destination)
+        input_df = prepare_input(folder_name, input_type, input_csv, input_smiles)
+        register_experiment(folder_name, receptor_path=pdbqt_file_path, library_size=len(input_df))
+        progress.step(0, "done")
+
+        try:
+            results = _dock_library(pdbqt_file_path, config_file_path, folder_name, len(input_df), start_time, progress)
+        except Exception:
+            record_stage(folder_name, "docking", "failed")
+            raise
+        stats = docking_stats(folder_name)
+        record_stage(folder_name, "docking", "done", **stats)
+        progress.emit("done", data=dict(stats, folder=folder_name))
+    return results
+
+
+def _dock_library(pdbqt_file_path, config_file_path, folder_name, num_input, start_time, progress):
+    num_ready = _prepare_ligands(folder_name, num_input, progress)
+    progress.step(4)
+    results = _dock_receptor(pdbqt_file_path, config_file_path, folder_name, num_ready, start_time, progress)
+    progress.step(4, "done")
+    return results
+
+
+def _prepare_ligands(folder_name, num_input, progress):
+    """Steps 1-3: from input_smiles.csv to the PDBQT ligands ready for docking; returns their number."""
+    pipeline_dir = os.path.join(folder_name, "pipeline_files")
+
+    progress.step(1)
+    with progress.stage("ligand_filter", items_in=num_input) as stage:
+        df_no_salt = process_smiles_csv(folder_name, "input_smiles.csv")
+        stage.items_out = len(df_no_salt)
+    with progress.stage("conformers", items_in=len(df_no_salt)) as stage:
+        convert_smiles_to_sdf_parallel(folder_name, df_no_salt, num_conformations=10)
+        stage.items_out = count_files(os.path.join(pipeline_dir, "1_sdf"), ".sdf")
+    progress.step(1, "done")
+
+    progress.step(2)
+    with progress.stage("sdf_to_mol2", items_in=stage.items_out) as stage:
+        run_script("1_sdf_to_mol2.sh", folder_name)
+        stage.items_out = count_files(os.path.join(pipeline_dir, "2_mol2"), ".mol2")
+    with progress.stage("format_mol2", items_in=stage.items_out) as stage:
+        format_mol2_files(folder_name)
+        stage.items_out = count_files(os.path.join(pipeline_dir, "2_mol2_format"), ".mol2")
+    with progress.stage("mol2_to_pdbqt", items_in=stage.items_out) as stage:
+        run_script("2_mol2_to_pdbqt.sh", folder_name)
+        stage.items_out = count_files(os.path.join(pipeline_dir, "3_pdbqt"), ".pdbqt")
+    progress.step(2, "done")
+
+    progress.step(3)
+    with progress.stage("pdbqt_to_smiles", items_in=stage.items_out) as stage:
+        run_script("3_pdbqt_to_smiles.sh", folder_name)
+        stage.items_out = count_files(os.path.join(pipeline_dir, "4_smiles"))
+    with progress.stage("pdbqt_verification", items_in=stage.items_out) as stage:
+        check_pdbqt_files(folder_name, "input_smiles.csv")
+        copy_correct_pdbqt_files(folder_name, "input_smiles.csv")
+        stage.items_out = count_files(os.path.join(pipeline_dir, "5_pdbqt_for_docking"), ".pdbqt")
+    progress.step(3, "done")
+    return stage.items_out
+
+
+def _dock_receptor(pdbqt_file_path, config_file_path, folder_name, num_ready, start_time, progress, ligands_dir=None,
+                   search_mode="detail"):
+    """Step 4 against one receptor: docking, scoring, poses and complexes in folder_name."""
+    pipeline_dir = os.path.join(folder_name, "pipeline_files")
+    with progress.stage("docking", items_in=num_ready) as stage:
+        num_batches = create_ligands_path_batchwise(folder_name, ligands_dir=ligands_dir)
+        output_result_base = os.path.abspath(os.path.join(pipeline_dir, "6_pdbqt_out"))
+        poses = PoseArchive.create(archive_path(folder_name, "6_pdbqt_out"))
+        for i in range(num_batches):
+            os.makedirs(output_result_base, exist_ok=True)
+            ligands_path = os.path.join(pipeline_dir, f"unidock_pdbqt_batch_{i+1}.txt")
+            batch_output_logs = os.path.abspath(os.path.join(pipeline_dir, f"unidock_output_batch_{i+1}.txt"))
+            open(batch_output_logs, 'w').close()
+            unidock_command = (
+                f"unidock "
+                f"--receptor {pdbqt_file_path} "
+                f"--gpu_batch $(cat {ligands_path}) "
+                f"--search_mode {search_mode} "
+                f"--scoring vina "
+                f"--config {config_file_path} "
+                f"--dir {output_result_base} "
+                f">> {batch_output_logs} 2>&1"
+            )
+            progress.message(f"Docking batch {i+1} of {num_batches}: {unidock_command}")
+            exit_status = os.system(unidock_command)
+            if exit_status != 0:
+                progress.message(f"unidock failed with exit status {exit_status}, see {batch_output_logs}", "warning")
+            # Move the batch's poses into the archive so the output directory stays small
+            pack_directory(poses, output_result_base, "_out.pdbqt")
+        stage.items_out = len(poses)
+
+    with progress.stage("affinity", items_in=len(poses)):
+        affinity_from_pdbqt_files(folder_name)
+    with progress.stage("model1", items_in=len(poses)):
+        extract_model1(folder_name)
+    with progress.stage("pose_coordinates", items_in=len(poses)) as stage:
+        stage.items_out = len(build_pose_coordinates(folder_name))
+    with progress.stage("pose_sdf", items_in=len(poses)) as stage:
+        convert_poses_to_sdf(folder_name)
+        stage.items_out = len(open_stage(folder_name, "9_sdf_out"))
+
+    elapsed_time_seconds = round(time.perf_counter() - start_time, 2)
+    write_total_time(folder_name, elapsed_time_seconds)
+
+    with progress.stage("final_output", items_in=len(poses)):
+        results = final_output_without_pb(folder_name, "input_smiles.csv")
+    with progress.stage("complexes", items_in=len(poses)) as stage:
+        form_protein_ligands_complexes(folder_name, os.path.join(folder_name, 'output.csv'))
+        stage.items_out = len(open_stage(folder_name, "plc"))
+    return results
+
+
+def receptor_names(receptors):
+    """Folder names of an ensemble's receptors: their PDBQT file names, numbered where they repeat."""
+    names = [os.path.splitext(os.path.basename(pdbqt_file_path))[0] for _, pdbqt_file_path, _ in receptors]
+    return [f"{name}_{names[:i].count(name) + 1}" if names.count(name) > 1 else name for i, name in enumerate(names)]
+
+
+def run_ensemble_docking(receptors, input_type, input_csv, input_smiles, folder_name, progress=None):
+    """
+    Dock a ligand library against several receptor conformations, given as (pdb, pdbqt, config)
+    path triples. Ligands are prepared once in folder_name; every receptor is docked in its own
+    experiment folder, receptors/<name>, which PoseBusters and PLIP take like any experiment.
+    Returns the ensemble table (output.csv) with each ligand's best score over the receptors.
+    """
+    start_time = time.perf_counter()
+    progress = Progress("docking", folder_name, progress)
+    with progress.running():
+        if not receptors:
+            raise ValueError("Ensemble docking needs at least one receptor.")
+        progress.step(0)
+        os.makedirs(folder_name, exist_ok=True)
+        input_df = prepare_input(folder_name, input_type, input_csv, input_smiles)
+        register_experiment(folder_name, library_size=len(input_df))
+        progress.step(0, "done")
+
+        try:
+            num_ready = _prepare_ligands(folder_name, len(input_df), progress)
+            ligands_dir = os.path.abspath(os.path.join(folder_name, "pipeline_files", "5_pdbqt_for_docking"))
+            progress.step(4)
+            receptor_results = {}
+            for (pdb_file_path, pdbqt_file_path, config_file_path), name in zip(receptors, receptor_names(receptors)):
+                progress.message(f"Docking against receptor {name} ({len(receptor_results) + 1} of {len(receptors)})")
+                receptor_folder = os.path.join(folder_name, ENSEMBLE_DIR, name)
+                receptor_results[name] = _dock_member(pdb_file_path, pdbqt_file_path, config_file_path, folder_name,
+                                                      receptor_folder, ligands_dir, num_ready, progress)
+            with progress.stage("ensemble", items_in=sum(len(df) for df in receptor_results.values())) as stage:
+                results = final_output_for_ensemble(folder_name, receptor_results)
+                stage.items_out = len(results)
+            progress.step(4, "done")
+        except Exception:
+            record_stage(folder_name, "docking", "failed")
+            raise
+        write_total_time(folder_name, round(time.perf_counter() - start_time, 2))
+        stats = docking_stats(folder_name)
+        record_stage(folder_name, "docking", "done", **stats)
+        progress.emit("done", data=dict(stats, folder=folder_name, receptors=list(receptor_results)))
+    return results
+
+
+def _dock_member(pdb_file_path, pdbqt_file_path, config_file_path, folder_name, member_folder, ligands_dir, num_ready,
+                 progress, search_mode="detail"):
+    """Dock the ligands prepared in folder_name (ligands_dir) into member_folder, an experiment of its own."""
+    start_time = time.perf_counter()
+    os.makedirs(os.path.join(member_folder, "pipeline_files"), exist_ok=True)
+    shutil.copy(pdb_file_path, os.path.join(member_folder, os.path.basename(pdb_file_path)))
+    shutil.copy(os.path.join(folder_name, "input_smiles.csv"), member_folder)
+    register_experiment(member_folder, receptor_path=pdbqt_file_path, library_size=num_ready)
+    # Stage timings and events of a member belong to its own experiment folder
+    member = Progress(progress.command, member_folder, progress.callback)
+    try:
+        results = _dock_receptor(pdbqt_file_path, config_file_path, member_folder, num_ready, start_time, member,
+                                 ligands_dir, search_mode)
+    except Exception:
+        record_stage(member_folder, "docking", "failed")
+        raise
+    record_stage(member_folder, "docking", "done", **docking_stats(member_folder))
+    return results
+
+
+def run_hierarchical_docking(pdb_file_path, pdbqt_file_path, config_file_path, input_type, input_csv, input_smiles,
+                             folder_name, top_fraction=TOP_FRACTION, dynamic_factor=None, progress=None):
+    """
+    Two-tier screen of a ligand library: every ligand is docked with the fast search in tiers/fast,
+    an experiment folder of its own, then the best top_fraction of them (with dynamic_factor, those
+    scoring below mean - dynamic_factor * std) are re-docked with the detail search in folder_name.
+    Returns the detail tier's results table (output.csv), which also lists the fast tier scores.
+    """
+    start_time = time.perf_counter()
+    progress = Progress("docking", folder_name, progress)
+    with progress.running():
+        if not 0 < top_fraction <= 1:
+            raise ValueError(f"The top fraction must be in (0, 1], got {top_fraction}")
+        progress.step(0)
+        os.makedirs(folder_name, exist_ok=True)
+        pdb_file_destination = os.path.join(folder_name, os.path.basename(pdb_file_path))
+        if not os.path.exists(pdb_file_destination):
+            shutil.copy(pdb_file_path, pdb_file_destination)
+        input_df = prepare_input(folder_name, input_type, input_csv, input_smiles)
+        register_experiment(folder_name, receptor_path=pdbqt_file_path, library_size=len(input_df))
+        progress.step(0, "done")
+
+        try:
+            num_ready = _prepare_ligands(folder_name, len(input_df), progress)
+            pipeline_dir = os.path.abspath(os.path.join(folder_name, "pipeline_files"))
+            progress.step(4)
+            progress.message(f"Tier 1 of 2: fast search of {num_ready} ligands")
+            fast_folder = os.path.join(folder_name, TIERS_DIR, "fast")
+            fast_results = _dock_member(pdb_file_path, pdbqt_file_path, config_file_path, folder_name, fast_folder,
+                                        os.path.join(pipeline_dir, "5_pdbqt_for_docking"), num_ready, progress, "fast")
+
+            # The detail tier docks copies of the selected ligands, kept apart from the full library
+            top_tier_dir = os.path.join(pipeline_dir, "5_pdbqt_top_tier")
+            with progress.stage("tier_selection", items_in=len(fast_results)) as stage:
+                selected = select_top_tier(fast_folder, folder_name, top_fraction, dynamic_factor)
+                if os.path.exists(top_tier_dir):
+                    shutil.rmtree(top_tier_dir)
+                os.makedirs(top_tier_dir)
+                for name in selected["Name"]:
+                    shutil.copy(os.path.join(pipeline_dir, "5_pdbqt_for_docking", f"{name}.pdbqt"), top_tier_dir)
+                stage.items_out = len(selected)
+            progress.message(f"Tier 2 of 2: detail search of the best {len(selected)} ligands")
+            detail_results = _dock_receptor(pdbqt_file_path, config_file_path, folder_name, len(selected), start_time,
+                                            progress, top_tier_dir, "detail")
+            results = final_output_for_hierarchy(folder_name, detail_results, fast_results)
+            progress.step(4, "done")
+        except Exception:
+            record_stage(folder_name, "docking", "failed")
+            raise
+        stats = docking_stats(folder_name)
+        record_stage(folder_name, "docking", "done", **stats)
+        progress.emit("done", data=dict(stats, folder=folder_name, tiers={"fast": len(fast_results), "detail": len(results)}))
+    return results
+
+
+
+##############################################################################################################################
+""" PoseBusters """
+
+def run_posebusters(folder_name, lower_range, higher_range, pdb_file_path=None, passes=PB_PASSES, progress=None):
+    """
+    PoseBusters check of the poses scoring between lower_range and higher_range. pdb_file_path
+    defaults to the receptor saved in the experiment folder. Returns the passed and failed tables.
+    """
+    progress = Progress("posebusters", folder_name, progress)
+    with progress.running():
+        if pdb_file_path is None:
+            pdb_file_path = next((os.path.join(folder_name, f) for f in os.listdir(folder_name) if f.endswith(".pdb")), None)
+        if pdb_file_path is None:
+            raise FileNotFoundError(f"No receptor PDB file in {folder_name}")
+
+        record_stage(folder_name, "posebusters", "running")
+        try:
+            # Experiments docked before the SDF poses were kept need them converted once
+            if not len(open_stage(folder_name, "9_sdf_out")):
+                convert_poses_to_sdf(folder_name)
+            extraction_based_on_threshold_for_pb(folder_name, lower_range, higher_range)
+            selected = count_files(os.path.join(folder_name, "pipeline_files", "9_sdf_out_threshold"), "_out.sdf")
+            progress.message(f"Running PoseBusters on {selected} poses")
+            with progress.stage("posebusters", items_in=selected) as stage:
+                run_script("5_posebusters_filter.sh", folder_name, pdb_file_path)
+                process_pb_csv(folder_name)
+                passed, failed = final_output_with_pb(folder_name, passes=passes)
+                stage.items_out = len(passed)
+        except Exception:
+            record_stage(folder_name, "posebusters", "failed")
+            raise
+        record_stage(folder_name, "posebusters", "done", num_pb_passed=len(passed))
+        progress.emit("done", data={"folder": folder_name, "num_selected": selected, "num_pb_passed": len(passed)})
+    return passed, failed
+
+
+
+##############################################################################################################################
+""" PLIP """
+
+def write_plip_manifest(output_path, pdb_files):
+    """Record which ligand each PLIP output directory belongs to, so the post-processor
+    does not have to infer ligand names from paths."""
+    names = [os.path.splitext(pdb_file)[0] for pdb_file in pdb_files]
+    manifest = pd.DataFrame({'Name': names, 'pdb_file': pdb_files, 'output_dir': names})
+    manifest.to_csv(os.path.join(output_path, "plip_manifest.csv"), index=False)
+    return manifest
+
+
+def select_plip_ligands(folder_name, lower_range=None, higher_range=None, use_pb_filtered_ligands=False):
+    csv_path = os.path.join(folder_name, "output_with_pb.csv" if use_pb_filtered_ligands else "output.csv")
+    if not os.path.exists(csv_path):
+        raise FileNotFoundError(f"CSV file not found: {csv_path}. Please ensure docking and/or PoseBusters filtration has been run.")
+    df = pd.read_csv(csv_path)
+    if lower_range is not None and higher_range is not None:
+        df = df[(df['Docking score (kcal/mol)'] >= lower_range) & (df['Docking score (kcal/mol)'] <= higher_range)]
+    return df['Name'].tolist()
+
+
+def run_plip_analysis(folder_name, lower_range=None, higher_range=None, use_pb_filtered_ligands=False,
+                      write_reports=False, pymol_sessions=False, progress=None):
+    """
+    PLIP interaction profiles of the docked (or PoseBusters-passed) ligands scoring between
+    lower_range and higher_range, all ligands when no range is given. Returns the output directory.
+    """
+    progress = Progress("plip", folder_name, progress)
+    with progress.running():
+        selected_ligands = select_plip_ligands(folder_name, lower_range, higher_range, use_pb_filtered_ligands)
+        progress.message(f"Running PLIP analysis on {len(selected_ligands)} compounds")
+
+        plc_all_ligands_folder = os.path.join(folder_name, "plc_all_ligands")
+        if os.path.exists(plc_all_ligands_folder):
+            shutil.rmtree(plc_all_ligands_folder)
+        os.makedirs(plc_all_ligands_folder)
+
+        # PLIP reads files, so only the selected complexes are written out of the archive
+        complexes = open_stage(folder_name, "plc")
+        for ligand in selected_ligands:
+            if ligand not in complexes:
+                progress.message(f"{ligand} not found in {complexes.path}", "warning")
+        complexes.extract(plc_all_ligands_folder, ".pdb", selected_ligands)
+
+        plip_path = os.path.abspath(os.path.join(SCRIPT_BASE, "plip"))
+        pdb_path = os.path.abspath(plc_all_ligands_folder)
+        output_path = os.path.abspath(os.path.join(folder_name, "output_plip_files"))
+        if os.path.exists(output_path):
+            shutil.rmtree(output_path)
+        os.makedirs(output_path, exist_ok=True)
+
+        pdb_files = [f for f in os.listdir(pdb_path) if f.endswith(".pdb")]
+        write_plip_manifest(output_path, pdb_files)
+
+        # PLIP runs in-process on every complex and hands typed records to the post-processor;
+        # XML/TXT reports and PyMOL sessions are only written on request.
+        post_process_command = ["python3", os.path.join(plip_path, "plip_post_process.py"), "-d", output_path, "-f", pdb_path]
+        if write_reports:
+            post_process_command += ["-x", "-t"]
+        if pymol_sessions:
+            post_process_command += ["-y"]
+        record_stage(folder_name, "plip", "running")
+        try:
+            with progress.stage("plip", items_in=len(pdb_files)):
+                result = subprocess.run(post_process_command, cwd=pdb_path, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                        env=dict(os.environ, PYTHONPATH=plip_path), text=True)
+                if result.returncode != 0:
+                    progress.message(f"PLIP failed:\n{result.stderr}", "warning")
+                    raise RuntimeError("PLIP analysis failed")
+            store_plip_results(folder_name)
+        except Exception:
+            record_stage(folder_name, "plip", "failed")
+            raise
+        record_stage(folder_name, "plip", "done", num_plip=len(pdb_files))
+        progress.emit("done", data={"folder": folder_name, "num_plip": len(pdb_files), "output_path": output_path})
+    return output_path
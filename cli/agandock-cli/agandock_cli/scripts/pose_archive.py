@@ -0,0 +1,220 @@
+import os
+import zlib
+import shutil
+import argparse
+
+
+ARCHIVE_DIR = "poses"
+COMPRESSION_LEVEL = 1
+
+# Pose and structure stages kept in archives: stage -> (directory the stage used to write, file suffix)
+POSE_STAGES = {
+    "6_pdbqt_out": (os.path.join("pipeline_files", "6_pdbqt_out"), "_out.pdbqt"),
+    "8_pdbqt_out_threshold_m1": (os.path.join("pipeline_files", "8_pdbqt_out_threshold_m1"), "_out.pdbqt"),
+    "9_sdf_out": (os.path.join("pipeline_files", "9_sdf_out"), "_out.sdf"),
+    "plc": ("plc", ".pdb"),
+}
+
+
+
+##############################################################################################################################
+""" Packed pose archive """
+
+class PoseArchive:
+    """
+    Append-only archive of per-ligand text files: `<stage>.pack` holds the zlib-compressed records
+    back to back and `<stage>.idx` one "name<TAB>offset<TAB>length" line per record, so a ligand is
+    read with a single seek. A record that is added again replaces the earlier one on reading.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.index_path = f"{os.path.splitext(path)[0]}.idx"
+        self._index = self._read_index()
+
+    @classmethod
+    def create(cls, path):
+        """Start an empty archive, dropping the records of a previous run of the stage."""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        for file_path in (path, f"{os.path.splitext(path)[0]}.idx"):
+            open(file_path, "wb").close()
+        return cls(path)
+
+    def _read_index(self):
+        index = {}
+        if not os.path.exists(self.index_path) or not os.path.exists(self.path):
+            return index
+        pack_size = os.path.getsize(self.path)
+        with open(self.index_path, "r") as f:
+            for line in f:
+                fields = line.rstrip("\n").split("\t")
+                if len(fields) != 3:
+                    continue  # Torn last line of an interrupted run
+                name, offset, length = fields[0], int(fields[1]), int(fields[2])
+                if offset + length <= pack_size:
+                    index[name] = (offset, length)
+        return index
+
+    def __contains__(self, name):
+        return name in self._index
+
+    def __len__(self):
+        return len(self._index)
+
+    def names(self):
+        return list(self._index)
+
+    def get(self, name):
+        """Text of one ligand's record."""
+        if name not in self._index:
+            raise KeyError(f"{name} is not in {self.path}")
+        offset, length = self._index[name]
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            return zlib.decompress(f.read(length)).decode()
+
+    def items(self, names=None):
+        """(name, text) of the given ligands (all by default) in archive order, through one file handle."""
+        wanted = self._index if names is None else {name: self._index[name] for name in names if name in self._index}
+        with open(self.path, "rb") as f:
+            for name, (offset, length) in sorted(wanted.items(), key=lambda item: item[1][0]):
+                f.seek(offset)
+                yield name, zlib.decompress(f.read(length)).decode()
+
+    def add_many(self, records):
+        """Append (name, text) records; the index lines are only written once their data is on disk."""
+        lines = []
+        with open(self.path, "ab") as pack:
+            offset = pack.tell()
+            for name, text in records:
+                data = zlib.compress(text.encode() if isinstance(text, str) else text, COMPRESSION_LEVEL)
+                pack.write(data)
+                lines.append((name, offset, len(data)))
+                offset += len(data)
+        with open(self.index_path, "a") as index:
+            index.writelines(f"{name}\t{offset}\t{length}\n" for name, offset, length in lines)
+        for name, offset, length in lines:
+            self._index[name] = (offset, length)
+        return len(lines)
+
+    def add(self, name, text):
+        self.add_many([(name, text)])
+
+    def extract(self, directory, suffix, names=None):
+        """Write records out as `<name><suffix>` files for tools that need paths, return the paths."""
+        os.makedirs(directory, exist_ok=True)
+        paths = []
+        for name, text in self.items(names):
+            path = os.path.join(directory, f"{name}{suffix}")
+            with open(path, "w") as f:
+                f.write(text)
+            paths.append(path)
+        return paths
+
+
+def archive_path(folder, stage):
+    return os.path.join(folder, "pipeline_files", ARCHIVE_DIR, f"{stage}.pack")
+
+
+def pack_directory(archive, directory, suffix, remove=True):
+    """Move the `*<suffix>` files of a directory into an archive (named without the suffix)."""
+    if not os.path.isdir(directory):
+        return 0
+
+    def records():
+        for file_name in sorted(os.listdir(directory)):
+            file_path = os.path.join(directory, file_name)
+            if file_name.endswith(suffix) and os.path.isfile(file_path):
+                with open(file_path, "rb") as f:
+                    yield file_name[:-len(suffix)], f.read()
+
+    count = archive.add_many(records())
+    if remove:
+        shutil.rmtree(directory)
+    return count
+
+
+def open_stage(folder, stage):
+    """
+    Archive of a pose stage for reading. Experiments written before the archives existed are read
+    from the stage's directory as they are; nothing is written (see migrate_experiment).
+    """
+    path = archive_path(folder, stage)
+    if os.path.exists(path):
+        return PoseArchive(path)
+    legacy_dir, suffix = POSE_STAGES[stage]
+    return StageDirectory(os.path.join(folder, legacy_dir), suffix)
+
+
+def migrate_experiment(folder, stages=None):
+    """
+    Pack the stage directories of an experiment written before the archives existed into archives
+    (the directories are kept). Returns {stage: records packed} for the stages that were migrated.
+    """
+    migrated = {}
+    for stage in stages or POSE_STAGES:
+        legacy_dir, suffix = POSE_STAGES[stage]
+        directory = os.path.join(folder, legacy_dir)
+        if os.path.exists(archive_path(folder, stage)) or not os.path.isdir(directory):
+            continue
+        migrated[stage] = pack_directory(PoseArchive.create(archive_path(folder, stage)), directory, suffix, remove=False)
+    return migrated
+
+
+
+##############################################################################################################################
+""" Stage directories of older experiments """
+
+class StageDirectory:
+    """
+    Read-only view of a stage directory with the reading interface of PoseArchive (`<name><suffix>`
+    files). A missing directory reads as an empty stage.
+    """
+
+    def __init__(self, directory, suffix):
+        self.path = directory
+        self.suffix = suffix
+        self._names = []
+        if os.path.isdir(directory):
+            self._names = sorted(file_name[:-len(suffix)] for file_name in os.listdir(directory)
+                                 if file_name.endswith(suffix) and os.path.isfile(os.path.join(directory, file_name)))
+        self._known = set(self._names)
+
+    def __contains__(self, name):
+        return name in self._known
+
+    def __len__(self):
+        return len(self._names)
+
+    def names(self):
+        return list(self._names)
+
+    def get(self, name):
+        if name not in self._known:
+            raise KeyError(f"{name} is not in {self.path}")
+        with open(os.path.join(self.path, f"{name}{self.suffix}"), "r") as f:
+            return f.read()
+
+    def items(self, names=None):
+        wanted = self._names if names is None else sorted(name for name in set(names) if name in self._known)
+        for name in wanted:
+            yield name, self.get(name)
+
+    extract = PoseArchive.extract
+
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pack the pose directories of older AGANDOCK experiments into archives.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    migrate_parser = subparsers.add_parser("migrate", help="Pack the stage directories of experiment folders")
+    migrate_parser.add_argument("folders", nargs="+", help="Experiment folders")
+    args = parser.parse_args(argv)
+    for folder in args.folders:
+        migrated = migrate_experiment(folder)
+        summary = ", ".join(f"{stage} ({count})" for stage, count in migrated.items()) or "nothing to pack"
+        print(f"{folder}: {summary}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+import os
+import json
+import time
+import resource
+import subprocess
+
+from datetime import datetime
+from contextlib import contextmanager, nullcontext
+
+
+PROFILE_DIR = os.path.join("pipeline_files", "profile")
+TOP_FUNCTIONS = 25
+
+
+
+##############################################################################################################################
+""" Subprocess timings """
+
+class SubprocessTimer:
+    """
+    Times every subprocess.run and os.system call while installed. Python children (PLIP's
+    plip_post_process.py) are started under cProfile so their hotspots are captured as well.
+    """
+
+    def __init__(self, profile_dir, prefix):
+        self.profile_dir = profile_dir
+        self.prefix = prefix
+        self.records = []
+        self.child_profiles = []
+        self._run, self._system = subprocess.run, os.system
+
+    def _child_cpu(self):
+        usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+        return usage.ru_utime + usage.ru_stime
+
+    def _record(self, label, command, started, cpu_start, returncode):
+        self.records.append({"command": label, "args": command, "wall_s": round(time.perf_counter() - started, 3),
+                             "cpu_s": round(self._child_cpu() - cpu_start, 3), "returncode": returncode})
+
+    def _profiled_python(self, args):
+        """Run `python script.py ...` as `python -m cProfile -o <file> script.py ...`."""
+        script = os.path.basename(args[1])
+        path = os.path.join(self.profile_dir, f"{self.prefix}_{os.path.splitext(script)[0]}_{len(self.child_profiles) + 1}.prof")
+        self.child_profiles.append((script, path))
+        return [args[0], "-m", "cProfile", "-o", path] + list(args[1:])
+
+    def run(self, args, *popenargs, **kwargs):
+        if isinstance(args, (list, tuple)):
+            label = " ".join(os.path.basename(str(arg)) for arg in args[:2])
+            if len(args) > 1 and os.path.basename(str(args[0])).startswith("python") and str(args[1]).endswith(".py"):
+                args = self._profiled_python(args)
+            command = " ".join(str(arg) for arg in args)
+        else:
+            label, command = os.path.basename(str(args).split()[0]), str(args)
+        started, cpu_start = time.perf_counter(), self._child_cpu()
+        returncode = None
+        try:
+            result = self._run(args, *popenargs, **kwargs)
+            returncode = result.returncode
+            return result
+        except subprocess.CalledProcessError as e:
+            returncode = e.returncode
+            raise
+        finally:
+            self._record(label, command, started, cpu_start, returncode)
+
+    def system(self, command):
+        started, cpu_start = time.perf_counter(), self._child_cpu()
+        status = self._system(command)
+        self._record(os.path.basename(command.split()[0]), command, started, cpu_start, status)
+        return status
+
+    def install(self):
+        subprocess.run, os.system = self.run, self.system
+
+    def uninstall(self):
+        subprocess.run, os.system = self._run, self._system
+
+    def summary(self):
+        """Calls, wall and CPU seconds per command, slowest first."""
+        totals = {}
+        for record in self.records:
+            total = totals.setdefault(record["command"], {"command": record["command"], "calls": 0, "wall_s": 0.0, "cpu_s": 0.0})
+            total["calls"] += 1
+            total["wall_s"] += record["wall_s"]
+            total["cpu_s"] += record["cpu_s"]
+        return sorted(({**t, "wall_s": round(t["wall_s"], 3), "cpu_s": round(t["cpu_s"], 3)} for t in totals.values()),
+                      key=lambda t: -t["wall_s"])
+
+
+
+##############################################################################################################################
+""" Hotspot summary """
+
+def top_functions(stats, limit=TOP_FUNCTIONS):
+    """Functions with the most own time (tottime) of a pstats.Stats, as plain dicts."""
+    rows = []
+    for (file_name, line, function), (_, calls, tottime, cumtime, _) in stats.stats.items():
+        rows.append({"function": f"{os.path.basename(file_name)}:{line}({function})", "calls": calls,
+                     "tottime_s": round(tottime, 4), "cumtime_s": round(cumtime, 4)})
+    return sorted(rows, key=lambda row: -row["tottime_s"])[:limit]
+
+
+def write_hotspots(profile_dir, prefix, command, wall, main_profile, timer):
+    import pstats
+
+    profiles = [("main process", main_profile)] + [(script, path) for script, path in timer.child_profiles
+                                                   if os.path.exists(path)]
+    summary = {"command": command, "wall_s": round(wall, 3), "subprocesses": timer.summary(), "profiles": []}
+    with open(os.path.join(profile_dir, f"{prefix}_hotspots.txt"), "w") as f:
+        f.write(f"agandock {command}: {wall:.2f} s wall\n\n")
+        f.write("Subprocesses by wall time\n")
+        for total in summary["subprocesses"]:
+            f.write(f"  {total['command']:<40} calls {total['calls']:>5}  wall {total['wall_s']:>10.2f} s  cpu {total['cpu_s']:>10.2f} s\n")
+        for title, path in profiles:
+            stats = pstats.Stats(path, stream=f)
+            f.write(f"\nTop {TOP_FUNCTIONS} functions by cumulative time ({title}, {os.path.basename(path)})\n")
+            stats.sort_stats("cumulative").print_stats(TOP_FUNCTIONS)
+            summary["profiles"].append({"name": title, "path": os.path.basename(path), "top_functions": top_functions(stats)})
+        f.write("\nThreads and worker processes (conformer generation, MOL2 formatting, descriptors) are not profiled;\n"
+                "their time shows up in the call that waits for them.\n")
+    with open(os.path.join(profile_dir, f"{prefix}_hotspots.json"), "w") as f:
+        json.dump(summary, f, indent=2)
+    with open(os.path.join(profile_dir, f"{prefix}_subprocesses.jsonl"), "w") as f:
+        f.writelines(json.dumps(record) + "\n" for record in timer.records)
+    return summary
+
+
+
+##############################################################################################################################
+""" Profiling a command """
+
+@contextmanager
+def _profiling(folder_name, command):
+    import cProfile
+
+    prefix = f"{command}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    profile_dir = os.path.join(folder_name, PROFILE_DIR)
+    os.makedirs(profile_dir, exist_ok=True)
+    timer = SubprocessTimer(profile_dir, prefix)
+    profiler = cProfile.Profile()
+    started = time.perf_counter()
+    timer.install()
+    profiler.enable()
+    try:
+        yield profile_dir
+    finally:
+        profiler.disable()
+        timer.uninstall()
+        wall = time.perf_counter() - started
+        main_profile = os.path.join(profile_dir, f"{prefix}.prof")
+        profiler.dump_stats(main_profile)
+        write_hotspots(profile_dir, prefix, command, wall, main_profile, timer)
+        print(f"\u001b[1m\u001b[34mProfile and hotspot summary saved in: \u001b[91m{profile_dir}\u001b[0m")
+
+
+def profiled(folder_name, command, enabled):
+    """
+    Context manager that profiles a CLI command into <folder>/pipeline_files/profile when enabled:
+    cProfile stats of the main process (<command>_<time>.prof), cProfile stats of Python
+    subprocesses, per-subprocess timings and a hotspot summary (_hotspots.txt / .json). When disabled
+    nothing is imported or patched.
+    """
+    return _profiling(folder_name, command) if enabled else nullcontext()
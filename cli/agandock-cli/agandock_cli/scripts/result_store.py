@@ -0,0 +1,207 @@
+import os
+import threading
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow
+    has_pyarrow = True
+except ImportError:
+    pyarrow, has_pyarrow = None, False
+
+
+STORE_DIR = "results"
+KEY_GROUP = "ligands"
+SCORE_COLUMN = "Docking score (kcal/mol)"
+GROUP_EXTENSION = ".parquet" if has_pyarrow else ".pkl"
+
+# Column groups written by the pipeline stages, and the files they used to live in. Experiments
+# created before the store existed are imported from these files the first time a group is read.
+LEGACY_SOURCES = {
+    "docking": os.path.join("pipeline_files", "2_extract_affinity_from_pdbqt.csv"),
+    "descriptors": "output.csv",
+    "posebusters_selection": os.path.join("pipeline_files", "3_compounds_for_posebusters.csv"),
+    "posebusters": os.path.join("pipeline_files", "5_pb_out.csv"),
+    "plip": os.path.join("output_plip_files", "plip_result.csv"),
+}
+
+_cache_lock = threading.Lock()
+_group_cache = {}
+
+
+
+##############################################################################################################################
+""" Column groups """
+
+def store_path(folder, group):
+    return os.path.join(folder, STORE_DIR, f"{group}{GROUP_EXTENSION}")
+
+
+def _write_frame(df, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    if has_pyarrow:
+        df.to_parquet(tmp_path, index=False)
+    else:
+        df.to_pickle(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def _read_frame(path):
+    key = os.path.abspath(path)
+    mtime = os.stat(key).st_mtime_ns
+    with _cache_lock:
+        cached = _group_cache.get(key)
+    if cached is None or cached[0] != mtime:
+        df = pd.read_parquet(key) if has_pyarrow else pd.read_pickle(key)
+        with _cache_lock:
+            _group_cache[key] = (mtime, df)
+    else:
+        df = cached[1]
+    return df
+
+
+def ligand_names(folder):
+    """Names of all ligands of an experiment, position i is ligand id i."""
+    path = store_path(folder, KEY_GROUP)
+    if not os.path.exists(path):
+        return pd.Series([], dtype=object, name="Name")
+    return _read_frame(path)["Name"]
+
+
+def _ligand_ids(folder, names):
+    """Ligand ids of `names`, registering the names the store has not seen yet."""
+    known = ligand_names(folder)
+    ids = pd.Index(known).get_indexer(names)
+    new = ids < 0
+    if new.any():
+        added = pd.unique(np.asarray(names)[new])
+        ids[new] = len(known) + pd.Index(added).get_indexer(np.asarray(names)[new])
+        _write_frame(pd.DataFrame({"Name": pd.concat([known, pd.Series(added)], ignore_index=True).astype(str)}),
+                     store_path(folder, KEY_GROUP))
+    return ids.astype(np.int64)
+
+
+def write_column_group(folder, group, df):
+    """
+    Store the columns a stage produced for its ligands (one row per Name). A group is replaced as a
+    whole when its stage runs again, the other groups are left untouched.
+    """
+    df = df.drop_duplicates("Name", keep="first")
+    group_df = df.drop(columns="Name").reset_index(drop=True)
+    group_df.insert(0, "ligand_id", _ligand_ids(folder, df["Name"].astype(str).values))
+    _write_frame(group_df, store_path(folder, group))
+    return group_df
+
+
+def _import_legacy_group(folder, group):
+    path = os.path.join(folder, LEGACY_SOURCES[group])
+    if not os.path.exists(path):
+        return False
+    df = pd.read_csv(path)
+    if group == "descriptors":
+        df = df.drop(columns=[SCORE_COLUMN], errors="ignore")
+    elif group == "posebusters_selection":
+        df = df[["Name"]]
+    elif group == "plip":
+        df = df[["Name"] + [col for col in df.columns if col.startswith("num_")]]
+    try:
+        write_column_group(folder, group, df)
+    except OSError:
+        return False  # Read-only experiment folders keep using their CSV files
+    return True
+
+
+def has_column_group(folder, group):
+    if os.path.exists(store_path(folder, group)):
+        return True
+    return group in LEGACY_SOURCES and _import_legacy_group(folder, group)
+
+
+def read_column_group(folder, group, columns=None):
+    """One stage's columns with the ligand Name, in the order the stage wrote them."""
+    if not has_column_group(folder, group):
+        raise FileNotFoundError(f"No '{group}' results stored for {folder}")
+    group_df = _read_frame(store_path(folder, group))
+    names = ligand_names(folder).values[group_df["ligand_id"].values]
+    group_df = group_df.drop(columns="ligand_id")
+    if columns is not None:
+        group_df = group_df[[col for col in columns if col != "Name"]]
+    group_df = group_df.reset_index(drop=True)
+    group_df.insert(0, "Name", names)
+    return group_df
+
+
+
+##############################################################################################################################
+""" Joined views """
+
+def _take(values, rows):
+    if (rows >= 0).all():
+        return values.take(rows)
+    return pd.api.extensions.take(values, rows, allow_fill=True)
+
+
+def load_results(folder, groups, columns=None, how="left"):
+    """
+    Join column groups on the ligand. The rows are those of the first group (how="left") or the
+    ligands present in every group (how="inner"). Groups are aligned through the integer ligand id
+    with array lookups, so no string join is done even for millions of ligands.
+    """
+    for group in groups:
+        if not has_column_group(folder, group):
+            raise FileNotFoundError(f"No '{group}' results stored for {folder}")
+    base = _read_frame(store_path(folder, groups[0]))
+    num_ligands = len(ligand_names(folder))
+    ids = base["ligand_id"].to_numpy()
+
+    frames = [base.drop(columns="ligand_id")]
+    positions = [np.arange(len(base))]
+    for group in groups[1:]:
+        group_df = _read_frame(store_path(folder, group))
+        row_of = np.full(num_ligands, -1, dtype=np.int64)
+        row_of[group_df["ligand_id"].to_numpy()] = np.arange(len(group_df))
+        rows = row_of[ids]
+        if how == "inner":
+            keep = rows >= 0
+            ids, rows = ids[keep], rows[keep]
+            positions = [pos[keep] for pos in positions]
+        frames.append(group_df.drop(columns="ligand_id"))
+        positions.append(rows)
+
+    data = {"Name": ligand_names(folder).values[ids]}
+    for frame, rows in zip(frames, positions):
+        for col in frame.columns:
+            if col not in data and (columns is None or col in columns):
+                data[col] = _take(frame[col].array, rows)
+    result = pd.DataFrame(data)
+    return result if columns is None else result[[col for col in columns if col in result.columns]]
+
+
+def _docking_table(results):
+    results = results.rename(columns={"Affinity": SCORE_COLUMN})
+    results = results.sort_values(SCORE_COLUMN, kind="stable").reset_index(drop=True)
+    return results[["Name", "SMILES", SCORE_COLUMN] + [col for col in results.columns
+                                                       if col not in ("Name", "SMILES", SCORE_COLUMN)]]
+
+
+def docking_view(folder):
+    """The docking result table (output.csv): score, ligand efficiency and descriptors, best score first."""
+    return _docking_table(load_results(folder, ["docking", "descriptors"]))
+
+
+def posebusters_views(folder, passes):
+    """Split the ligands sent to PoseBusters into (passed, failed) docking result tables."""
+    results = load_results(folder, ["posebusters_selection", "docking", "posebusters", "descriptors"])
+    passed = (results.pop("passes") >= passes).to_numpy(dtype=bool, na_value=False)
+    docking_columns = ["Name", "Affinity"] + read_column_group(folder, "descriptors").columns[1:].tolist()
+    results = results[docking_columns]
+    return _docking_table(results[passed]), _docking_table(results[~passed])
+
+
+def store_plip_results(folder):
+    """Add the interaction counts of a finished PLIP run to the store."""
+    path = os.path.join(folder, LEGACY_SOURCES["plip"])
+    if os.path.exists(path):
+        df = pd.read_csv(path)
+        write_column_group(folder, "plip", df[["Name"] + [col for col in df.columns if col.startswith("num_")]])
@@ -0,0 +1,79 @@
+import os
+import pandas as pd
+
+try:
+    import pyarrow
+    has_pyarrow = True
+except ImportError:
+    pyarrow, has_pyarrow = None, False
+
+
+PAGE_SIZES = [25, 50, 100]
+
+
+
+##############################################################################################################################
+""" Columnar results file """
+
+def columnar_path(csv_path):
+    return f"{os.path.splitext(csv_path)[0]}.parquet"
+
+
+def write_results_table(df, csv_path, float_format=None):
+    """
+    Write a result table as CSV (the export format) plus a Parquet twin that the results view reads.
+    """
+    df.to_csv(csv_path, index=False, float_format=float_format)
+    if has_pyarrow:
+        df.to_parquet(columnar_path(csv_path), index=False)
+
+
+def read_results_table(csv_path):
+    """
+    Read a result table from its Parquet twin. A missing or outdated twin is rebuilt from the CSV
+    (only when pyarrow is installed, otherwise the CSV is read directly).
+    """
+    parquet_path = columnar_path(csv_path)
+    if not has_pyarrow:
+        return pd.read_csv(csv_path)
+
+    if os.path.exists(parquet_path) and os.path.getmtime(parquet_path) >= os.path.getmtime(csv_path):
+        return pd.read_parquet(parquet_path)
+
+    df = pd.read_csv(csv_path)
+    try:
+        df.to_parquet(parquet_path, index=False)
+    except (OSError, ValueError):
+        pass
+    return df
+
+
+
+##############################################################################################################################
+""" Server-side filter, sort and paging """
+
+def filter_results(df, text_filter=""):
+    """
+    Keep the rows whose Name or SMILES contains `text_filter` (case-insensitive).
+    """
+    if not text_filter:
+        return df
+    mask = pd.Series(False, index=df.index)
+    for col in ("Name", "SMILES"):
+        if col in df.columns:
+            mask |= df[col].astype(str).str.contains(text_filter, case=False, regex=False)
+    return df[mask]
+
+
+def results_page(df, sort_by=None, ascending=True, page=1, page_size=PAGE_SIZES[1]):
+    if sort_by in df.columns:
+        df = df.sort_values(by=sort_by, ascending=ascending, kind="mergesort", na_position="last")
+    start = (page - 1) * page_size
+    return df.iloc[start:start + page_size]
+
+
+def format_for_display(page_df):
+    page_df = page_df.copy()
+    for col in page_df.select_dtypes(include="float").columns:
+        page_df[col] = page_df[col].map(lambda x: "" if pd.isna(x) else f"{x:.2f}")
+    return page_df
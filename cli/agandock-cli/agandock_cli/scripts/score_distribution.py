@@ -0,0 +1,150 @@
+import os
+import json
+import math
+import threading
+import numpy as np
+import pandas as pd
+
+
+SCORE_COLUMN = "Docking score (kcal/mol)"
+RESOLUTION = 0.01        # kcal/mol, the precision docking scores are reported with
+DISPLAY_BIN_WIDTH = 1    # kcal/mol, bar width of the histograms shown in the app
+QUANTILES = np.linspace(0, 1, 101)
+
+_cache_lock = threading.Lock()
+_distribution_cache = {}
+
+
+
+##############################################################################################################################
+""" Precomputed score distribution """
+
+def distribution_path(csv_path):
+    return f"{os.path.splitext(csv_path)[0]}_score_distribution.json"
+
+
+def _source_signature(csv_path):
+    stat = os.stat(csv_path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+class ScoreDistribution:
+    """
+    Fixed-resolution histogram (RESOLUTION-wide bins) and quantile sketch of a result table's docking
+    scores. Range counts are answered from cumulative bin counts, so they cost O(1) regardless of
+    the library size.
+    """
+
+    def __init__(self, origin, counts, quantiles, source=None):
+        self.origin = int(origin)  # score of the first bin, in units of RESOLUTION
+        self.counts = np.asarray(counts, dtype=np.int64)
+        self.cumulative = np.concatenate([[0], np.cumsum(self.counts)])
+        self.quantiles = np.asarray(quantiles, dtype=float)
+        self.source = source
+
+    @classmethod
+    def from_scores(cls, scores, source=None):
+        scores = pd.to_numeric(pd.Series(scores), errors="coerce").dropna().to_numpy()
+        if len(scores) == 0:
+            return cls(0, [], [], source)
+        steps = np.rint(scores / RESOLUTION).astype(np.int64)
+        origin = steps.min()
+        quantiles = np.quantile(scores, QUANTILES)
+        return cls(origin, np.bincount(steps - origin), quantiles, source)
+
+    @property
+    def total(self):
+        return int(self.cumulative[-1])
+
+    @property
+    def min(self):
+        return round(self.origin * RESOLUTION, 2)
+
+    @property
+    def max(self):
+        return round((self.origin + len(self.counts) - 1) * RESOLUTION, 2)
+
+    def count_between(self, lower, higher):
+        """Number of scores with lower <= score <= higher."""
+        if self.total == 0 or lower > higher:
+            return 0
+        first = math.ceil(round(lower / RESOLUTION, 6)) - self.origin
+        last = math.floor(round(higher / RESOLUTION, 6)) - self.origin
+        first, last = max(first, 0), min(last, len(self.counts) - 1)
+        if first > last:
+            return 0
+        return int(self.cumulative[last + 1] - self.cumulative[first])
+
+    def score_at_quantile(self, q):
+        """Docking score below which a fraction q of the compounds lie (q=0.1: best 10% cut-off)."""
+        return float(np.interp(q, QUANTILES, self.quantiles))
+
+    def histogram_frame(self, bin_width=DISPLAY_BIN_WIDTH):
+        """Counts aggregated into [left, left + bin_width) bars, empty bars dropped."""
+        if self.total == 0:
+            return pd.DataFrame({"Range": [], "Left": [], "Count": []})
+        scores = (self.origin + np.arange(len(self.counts))) * RESOLUTION
+        lefts = np.floor(np.round(scores / bin_width, 6)).astype(np.int64) * bin_width
+        counts = pd.Series(self.counts).groupby(lefts).sum()
+        counts = counts[counts > 0]
+        return pd.DataFrame({
+            "Range": [f"{int(left)} to {int(left + bin_width)}" for left in counts.index],
+            "Left": counts.index,
+            "Count": counts.values,
+        })
+
+    def to_dict(self):
+        return {"resolution": RESOLUTION, "origin": self.origin, "counts": self.counts.tolist(),
+                "quantiles": self.quantiles.tolist(), "source": self.source}
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get("resolution") != RESOLUTION:
+            raise ValueError("Score distribution was stored with a different resolution")
+        return cls(data["origin"], data["counts"], data["quantiles"], data.get("source"))
+
+
+def write_score_distribution(csv_path, df=None):
+    """Precompute and store the score distribution next to a result table."""
+    if df is None:
+        df = pd.read_csv(csv_path)
+    distribution = ScoreDistribution.from_scores(df[SCORE_COLUMN], source=_source_signature(csv_path))
+    path = distribution_path(csv_path)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "w") as f:
+            json.dump(distribution.to_dict(), f)
+        os.replace(tmp_path, path)
+    except OSError:
+        pass  # Read-only experiment folders recompute the distribution once per process instead
+    return distribution
+
+
+def _read_score_distribution(csv_path, signature):
+    try:
+        with open(distribution_path(csv_path), "r") as f:
+            distribution = ScoreDistribution.from_dict(json.load(f))
+    except (OSError, ValueError, KeyError):
+        return None
+    return distribution if distribution.source == signature else None
+
+
+def load_score_distribution(csv_path):
+    """
+    Return the score distribution of a result table from the process-wide cache, then the stored
+    file, and only recompute it when the table changed since it was written.
+    """
+    key = os.path.abspath(csv_path)
+    signature = _source_signature(key)
+    with _cache_lock:
+        cached = _distribution_cache.get(key)
+    if cached is not None and cached.source == signature:
+        return cached
+
+    distribution = _read_score_distribution(key, signature)
+    if distribution is None:
+        distribution = write_score_distribution(key)
+
+    with _cache_lock:
+        _distribution_cache[key] = distribution
+    return distribution
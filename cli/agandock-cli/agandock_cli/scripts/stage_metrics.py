@@ -0,0 +1,166 @@
+import os
+import json
+import time
+import resource
+import threading
+import pandas as pd
+
+from datetime import datetime
+from contextlib import contextmanager
+
+
+METRICS_FILE = os.path.join("pipeline_files", "execution_time", "stage_metrics.jsonl")
+TOTAL_TIME_FILE = os.path.join("pipeline_files", "execution_time", "total_execution_time.txt")
+METRIC_COLUMNS = ["stage", "status", "wall_s", "cpu_s", "peak_rss_mb", "items_in", "items_out", "items_per_s"]
+RSS_SAMPLE_INTERVAL = 0.2  # Seconds between resident set samples while a stage runs
+
+
+
+##############################################################################################################################
+""" Stage instrumentation """
+
+class StageRecord:
+    """Counters of one running stage; the stage sets items_in / items_out once it knows them."""
+
+    def __init__(self, stage, items_in=None, items_out=None):
+        self.stage = stage
+        self.items_in = items_in
+        self.items_out = items_out
+
+
+def _cpu_seconds():
+    """User + system time of this process and of the subprocesses it has waited for (unidock, obabel, PLIP...)."""
+    own, children = resource.getrusage(resource.RUSAGE_SELF), resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+
+def _tree_rss(process):
+    """Current resident set, in bytes, of a process and all its descendants (unidock, obabel, PLIP workers...)."""
+    import psutil
+
+    total = 0
+    for member in [process] + process.children(recursive=True):
+        try:
+            total += member.memory_info().rss
+        except psutil.Error:
+            continue  # Exited between listing and sampling
+    return total
+
+
+class RssSampler(threading.Thread):
+    """
+    Peak resident set of this process tree over one stage. ru_maxrss only knows the high-water mark of the whole
+    process lifetime, so a stage is sampled at its start, every RSS_SAMPLE_INTERVAL seconds and at its end instead;
+    subprocesses shorter than the interval can slip between two samples.
+    """
+
+    def __init__(self, interval=RSS_SAMPLE_INTERVAL):
+        super().__init__(daemon=True)
+        import psutil
+
+        self.process = psutil.Process()
+        self.interval = interval
+        self.finished = threading.Event()
+        self.peak = _tree_rss(self.process)
+
+    def run(self):
+        while not self.finished.wait(self.interval):
+            self.peak = max(self.peak, _tree_rss(self.process))
+
+    def stop(self):
+        """Stop sampling and return the stage peak in MiB."""
+        self.finished.set()
+        self.join()
+        self.peak = max(self.peak, _tree_rss(self.process))
+        return round(self.peak / 2 ** 20, 1)
+
+
+def count_files(directory, suffix=""):
+    """Number of `*<suffix>` files of a stage directory, 0 when the stage wrote nothing."""
+    if not os.path.isdir(directory):
+        return 0
+    return sum(1 for entry in os.scandir(directory) if entry.is_file() and entry.name.endswith(suffix))
+
+
+def append_stage_metrics(folder, record):
+    path = os.path.join(folder, METRICS_FILE)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "a") as f:
+            f.write(json.dumps(record) + "\n")
+    except OSError:
+        pass  # Metrics are best effort, a read-only experiment folder must not fail the stage
+
+
+@contextmanager
+def stage_timer(folder, stage, items_in=None):
+    """
+    Measure a pipeline stage and append one JSON line to pipeline_files/execution_time/stage_metrics.jsonl:
+    wall and CPU seconds, peak RSS of the process tree during the stage, items in / out and throughput. Stages that raise are recorded as
+    failed and the exception is passed on.
+
+        with stage_timer(folder_name, "docking", items_in=num_ligands) as stage:
+            ...
+            stage.items_out = len(poses)
+    """
+    record = StageRecord(stage, items_in)
+    started_at = datetime.now().isoformat(timespec="seconds")
+    wall_start, cpu_start = time.perf_counter(), _cpu_seconds()
+    rss = RssSampler()
+    rss.start()
+    status = "failed"
+    try:
+        yield record
+        status = "done"
+    finally:
+        wall = time.perf_counter() - wall_start
+        peak_rss_mb = rss.stop()
+        items = record.items_out if record.items_out is not None else record.items_in
+        append_stage_metrics(folder, {
+            "stage": stage,
+            "status": status,
+            "started_at": started_at,
+            "wall_s": round(wall, 3),
+            "cpu_s": round(_cpu_seconds() - cpu_start, 3),
+            "peak_rss_mb": peak_rss_mb,
+            "items_in": record.items_in,
+            "items_out": record.items_out,
+            "items_per_s": round(items / wall, 2) if items is not None and wall > 0 else None,
+        })
+
+
+def write_total_time(folder, elapsed_time_seconds):
+    path = os.path.join(folder, TOTAL_TIME_FILE)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(f"{elapsed_time_seconds}")
+
+
+
+##############################################################################################################################
+""" Reading """
+
+def read_stage_metrics(folder):
+    """All recorded stage runs of an experiment, oldest first (empty for experiments run before the metrics existed)."""
+    path = os.path.join(folder, METRICS_FILE)
+    records = []
+    if os.path.exists(path):
+        with open(path, "r") as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue  # Torn last line of an interrupted run
+    return pd.DataFrame(records, columns=METRIC_COLUMNS + ["started_at"])
+
+
+def stage_breakdown(folder):
+    """Latest run of every stage in pipeline order, with its share of the total wall time."""
+    metrics = read_stage_metrics(folder)
+    if metrics.empty:
+        return metrics.assign(share=pd.Series(dtype=float))
+    latest = metrics.drop_duplicates("stage", keep="last")
+    latest = latest.set_index("stage").loc[pd.unique(metrics["stage"])].reset_index()
+    total = latest["wall_s"].sum()
+    latest["share"] = (100 * latest["wall_s"] / total).round(1) if total > 0 else 0.0
+    return latest
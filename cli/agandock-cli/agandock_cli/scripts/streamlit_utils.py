@@ -1,6 +1,6 @@
 import os
-from agandock_cli.scripts.docking_utils import run_docking_pipeline
-from agandock_cli.scripts.docking_utils import handle_posebusters
+from agandock_cli.scripts.pipeline import run_docking as run_docking_pipeline
+from agandock_cli.scripts.pipeline import run_posebusters
 
 def run_docking(folder_name, pdb_file, pdbqt_file, config_file, input_type, input_csv, input_smiles):
     print("Running docking pipeline...")
@@ -10,5 +10,5 @@ def run_docking(folder_name, pdb_file, pdbqt_file, config_file, input_type, inpu
 
 def run_filter(folder_name, lower_range, higher_range, pdb_file):
     print("Running filtration...")
-    handle_posebusters(folder_name, lower_range, higher_range, pdb_file)
+    run_posebusters(folder_name, lower_range, higher_range, pdb_file)
     print("Filtration completed.")
\ No newline at end of file
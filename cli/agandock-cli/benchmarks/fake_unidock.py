@@ -0,0 +1,93 @@
+"""
+Deterministic stand-in for the `unidock` binary, so the docking pipeline can be benchmarked on
+machines without a GPU. It accepts the command line the pipeline uses and writes one
+`<ligand>_out.pdbqt` per ligand with `num_modes` models: the input ligand moved into the docking box
+with a score derived from the ligand name. Set FAKE_UNIDOCK_SECONDS_PER_LIGAND to simulate docking time.
+"""
+import os
+import sys
+import time
+import zlib
+import argparse
+
+
+def read_config(path):
+    config = {}
+    if path and os.path.exists(path):
+        with open(path, "r") as f:
+            for line in f:
+                key, sep, value = line.partition("=")
+                if sep:
+                    config[key.strip()] = value.split("#")[0].strip()
+    return config
+
+
+def ligand_score(name):
+    """Docking score in [-12, -4) kcal/mol, fixed for a ligand name."""
+    return -4.0 - 8.0 * (zlib.crc32(name.encode()) % 10000) / 10000
+
+
+def _atom_coordinates(lines):
+    return [(float(line[30:38]), float(line[38:46]), float(line[46:54]))
+            for line in lines if line.startswith(("ATOM", "HETATM"))]
+
+
+def docked_pose(name, ligand_text, center, num_modes):
+    """Multi-model PDBQT in the layout unidock writes: MODEL / REMARK VINA RESULT / ligand / ENDMDL."""
+    lines = ligand_text.splitlines()
+    coords = _atom_coordinates(lines)
+    centroid = [sum(c[k] for c in coords) / max(len(coords), 1) for k in range(3)]
+    seed = zlib.crc32(name.encode())
+    best = ligand_score(name)
+    models = []
+    for mode in range(num_modes):
+        shift = [center[k] - centroid[k] + ((seed >> (3 * k + mode)) % 7 - 3) * 0.25 * (mode > 0) for k in range(3)]
+        rmsd = 0.0 if mode == 0 else 1.0 + 0.5 * mode
+        model = [f"MODEL {mode + 1}",
+                 f"REMARK VINA RESULT: {best + 0.3 * mode:9.3f}{rmsd:11.3f}{rmsd * 1.5:11.3f}"]
+        for line in lines:
+            if line.startswith(("ATOM", "HETATM")):
+                x, y, z = (float(line[30:38]) + shift[0], float(line[38:46]) + shift[1], float(line[46:54]) + shift[2])
+                line = f"{line[:30]}{x:8.3f}{y:8.3f}{z:8.3f}{line[54:]}"
+            if not line.startswith(("REMARK", "MODEL", "ENDMDL")):
+                model.append(line)
+        model.append("ENDMDL")
+        models.append("\n".join(model))
+    return "\n".join(models) + "\n"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Deterministic fake unidock for benchmarks.")
+    parser.add_argument("--receptor", required=True)
+    parser.add_argument("--gpu_batch", nargs="+", required=True)
+    parser.add_argument("--config")
+    parser.add_argument("--dir", required=True)
+    parser.add_argument("--search_mode", default="balance")
+    parser.add_argument("--scoring", default="vina")
+    parser.add_argument("--num_modes", type=int)
+    for option in ("--center_x", "--center_y", "--center_z", "--size_x", "--size_y", "--size_z"):
+        parser.add_argument(option, type=float)
+    args, _ = parser.parse_known_args(argv)
+
+    config = read_config(args.config)
+    center = [args.center_x if args.center_x is not None else float(config.get("center_x", 0)),
+              args.center_y if args.center_y is not None else float(config.get("center_y", 0)),
+              args.center_z if args.center_z is not None else float(config.get("center_z", 0))]
+    num_modes = args.num_modes or int(config.get("num_modes", 9))
+    delay = float(os.environ.get("FAKE_UNIDOCK_SECONDS_PER_LIGAND", 0))
+
+    os.makedirs(args.dir, exist_ok=True)
+    print(f"Fake unidock: docking {len(args.gpu_batch)} ligands ({args.search_mode}) into {args.receptor}")
+    for ligand_path in args.gpu_batch:
+        name = os.path.splitext(os.path.basename(ligand_path))[0]
+        with open(ligand_path, "r") as f:
+            pose = docked_pose(name, f.read(), center, num_modes)
+        with open(os.path.join(args.dir, f"{name}_out.pdbqt"), "w") as f:
+            f.write(pose)
+        if delay:
+            time.sleep(delay)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
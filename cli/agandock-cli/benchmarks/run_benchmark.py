@@ -0,0 +1,174 @@
+"""
+Docking pipeline benchmark: runs the CLI pipeline on synthetic libraries against the bundled
+minD_APO_C1 receptor with the fake unidock, times every stage (pipeline_files/execution_time/
+stage_metrics.jsonl) and compares throughput against a stored baseline.
+
+    python -m benchmarks.run_benchmark --sizes 1000 10000 --output bench_results
+    python -m benchmarks.run_benchmark --sizes 1000 --update-baseline
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import subprocess
+import pandas as pd
+
+from agandock_cli.scripts.stage_metrics import stage_breakdown
+from benchmarks.synthetic_library import generate_library
+
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+INPUTS_DIR = os.path.join(os.path.dirname(BENCHMARK_DIR), "agandock_cli", "inputs")
+DEFAULT_SCRIPTS = os.path.abspath(os.path.join(BENCHMARK_DIR, "..", "..", "..", "main", "nextjs", "scripts"))
+BASELINE_PATH = os.path.join(BENCHMARK_DIR, "baseline.json")
+RECEPTOR = "minD_APO_C1"
+DEFAULT_SIZES = [1000, 10000, 100000]
+TOLERANCE = 0.2  # Throughput changes within ±20% are treated as noise
+
+
+
+##############################################################################################################################
+""" Running """
+
+def _environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BENCHMARK_DIR,
+                                capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = ""
+    return {"python": platform.python_version(), "platform": platform.platform(),
+            "cpu_count": os.cpu_count(), "commit": commit}
+
+
+def library_csv(workdir, size, seed):
+    """Synthetic library of `size` ligands, enumerated once per size and seed and reused by later runs."""
+    path = os.path.join(workdir, f"library_{size}_seed{seed}.csv")
+    if not os.path.exists(path):
+        generate_library(size, seed).to_csv(path, index=False)
+    return path
+
+
+def run_size(workdir, size, seed=0, receptor=RECEPTOR):
+    """Dock one synthetic library with the fake unidock and return its stage timings."""
+    from agandock_cli.scripts.pipeline import run_docking
+
+    input_csv = library_csv(workdir, size, seed)
+    folder = os.path.join(workdir, f"bench_{size}")
+    if os.path.exists(folder):
+        shutil.rmtree(folder)
+
+    start_time = time.perf_counter()
+    run_docking(os.path.join(INPUTS_DIR, f"{receptor}.pdb"),
+                os.path.join(INPUTS_DIR, f"{receptor}.pdbqt"),
+                os.path.join(INPUTS_DIR, f"{receptor}_conf.txt"),
+                "Multiple SMILES", input_csv, None, folder)
+    total = time.perf_counter() - start_time
+
+    stages = {}
+    for row in stage_breakdown(folder).itertuples(index=False):
+        throughput = row.items_per_s if pd.notna(row.items_per_s) else (size / row.wall_s if row.wall_s else None)
+        stages[row.stage] = {"wall_s": row.wall_s, "cpu_s": row.cpu_s, "peak_rss_mb": row.peak_rss_mb,
+                             "items_in": None if pd.isna(row.items_in) else int(row.items_in),
+                             "items_out": None if pd.isna(row.items_out) else int(row.items_out),
+                             "items_per_s": throughput}
+    return {"size": size, "seed": seed, "total_s": round(total, 3), "ligands_per_s": round(size / total, 2),
+            "stages": stages}
+
+
+def run_benchmark(sizes, workdir, seed=0, scripts_dir=None):
+    """Run all library sizes with the fake unidock first on PATH."""
+    os.makedirs(workdir, exist_ok=True)
+    os.environ["PATH"] = os.path.join(BENCHMARK_DIR, "bin") + os.pathsep + os.environ.get("PATH", "")
+    os.environ["AGANDOCK_SCRIPTS"] = scripts_dir or os.environ.get("AGANDOCK_SCRIPTS", DEFAULT_SCRIPTS)
+    runs = {}
+    for size in sizes:
+        print(f"\u001b[1m\u001b[34mBenchmarking {size} ligands against {RECEPTOR}\u001b[0m")
+        runs[str(size)] = run_size(os.path.abspath(workdir), size, seed)
+    return {"environment": _environment(), "runs": runs}
+
+
+
+##############################################################################################################################
+""" Regression report """
+
+def compare(results, baseline, tolerance=TOLERANCE):
+    """
+    One row per library size and stage with the throughput (items/s) of this run and the baseline.
+    Status is "regression" when throughput dropped by more than `tolerance`, "improvement" when it
+    rose by more, "new" for stages or sizes the baseline does not have.
+    """
+    rows = []
+    for size, run in results["runs"].items():
+        base_run = baseline.get("runs", {}).get(size, {})
+        stages = dict(run["stages"], total={"items_per_s": run["ligands_per_s"], "wall_s": run["total_s"]})
+        base_stages = dict(base_run.get("stages", {}))
+        if base_run:
+            base_stages["total"] = {"items_per_s": base_run["ligands_per_s"], "wall_s": base_run["total_s"]}
+        for stage, metrics in stages.items():
+            current, previous = metrics.get("items_per_s"), base_stages.get(stage, {}).get("items_per_s")
+            ratio = current / previous if current and previous else None
+            if ratio is None:
+                status = "new"
+            elif ratio < 1 - tolerance:
+                status = "regression"
+            elif ratio > 1 + tolerance:
+                status = "improvement"
+            else:
+                status = "ok"
+            rows.append({"size": int(size), "stage": stage, "wall_s": metrics.get("wall_s"),
+                         "items_per_s": current, "baseline_items_per_s": previous,
+                         "ratio": round(ratio, 3) if ratio is not None else None, "status": status})
+    return pd.DataFrame(rows, columns=["size", "stage", "wall_s", "items_per_s", "baseline_items_per_s", "ratio", "status"])
+
+
+def write_report(results, report, output_dir):
+    os.makedirs(output_dir, exist_ok=True)
+    with open(os.path.join(output_dir, "benchmark_results.json"), "w") as f:
+        json.dump(results, f, indent=2)
+    report.to_csv(os.path.join(output_dir, "regression_report.csv"), index=False)
+    with open(os.path.join(output_dir, "regression_report.txt"), "w") as f:
+        f.write(report.to_string(index=False, na_rep="-") + "\n")
+
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the docking pipeline on synthetic libraries with a fake unidock.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Library sizes to benchmark")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the synthetic libraries")
+    parser.add_argument("--workdir", default="benchmark_work", help="Directory for the libraries and experiment folders")
+    parser.add_argument("--output", default="benchmark_results", help="Directory for the results and the regression report")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Stored baseline to compare against")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE, help="Relative throughput change treated as noise")
+    parser.add_argument("--scripts", help="Directory of the pipeline shell scripts (default: AGANDOCK_SCRIPTS or the repository's)")
+    parser.add_argument("--update-baseline", action="store_true", help="Store this run as the new baseline")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Exit with status 1 if any stage regressed")
+    args = parser.parse_args(argv)
+
+    results = run_benchmark(args.sizes, args.workdir, args.seed, args.scripts)
+    report = compare(results, load_baseline(args.baseline), args.tolerance)
+    write_report(results, report, args.output)
+    print(report.to_string(index=False, na_rep="-"))
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline updated: {args.baseline}")
+    regressions = report[report["status"] == "regression"]
+    if len(regressions):
+        print(f"\u001b[1m\u001b[91m{len(regressions)} stage(s) slower than the baseline\u001b[0m")
+        if args.fail_on_regression:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
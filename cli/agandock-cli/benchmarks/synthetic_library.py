@@ -0,0 +1,79 @@
+import random
+import pandas as pd
+
+from rdkit import Chem, RDLogger
+
+
+# Drug-like scaffolds the synthetic libraries are enumerated from (small enough that two
+# substituents stay under the 50 atom limit of process_smiles_csv).
+SEED_SMILES = [
+    "c1ccc2[nH]ccc2c1",
+    "c1ccc(cc1)C(=O)Nc1ccccn1",
+    "CC(=O)Nc1ccc(O)cc1",
+    "O=C(O)c1ccccc1O",
+    "c1ccc2ncccc2c1",
+    "C1CCN(CC1)c1ncccn1",
+    "O=C1NC(=O)c2ccccc12",
+    "c1cnc2ccccc2n1",
+    "CN1CCN(CC1)c1ccccc1",
+    "O=S(=O)(N)c1ccccc1",
+    "c1ccc(cc1)-c1nccs1",
+    "C1CC1C(=O)Nc1cccnc1",
+    "OC1CCN(CC1)C(=O)c1ccco1",
+    "c1ccc2c(c1)oc1ccccc12",
+    "Cc1cc(C)nc(N)n1",
+    "O=C(Nc1ccccc1)c1cccs1",
+]
+
+SUBSTITUENTS = [
+    "C", "CC", "CCC", "C(C)C", "F", "Cl", "Br", "O", "OC", "OCC", "N", "NC", "N(C)C", "C#N",
+    "C(F)(F)F", "C(=O)O", "C(=O)N", "C(=O)C", "S(=O)(=O)C", "C1CC1", "OC(F)(F)F", "CO", "CN",
+    "NC(=O)C", "C(=O)OC", "c1ccccc1", "c1ccncc1", "C1CCOC1", "N1CCOCC1", "SC",
+]
+
+
+def _decorate(scaffold, fragments, rng, max_substituents):
+    """Attach 1..max_substituents random substituents to random hydrogen-bearing carbons of a scaffold."""
+    mol = Chem.RWMol(scaffold)
+    positions = [atom.GetIdx() for atom in scaffold.GetAtoms() if atom.GetSymbol() == "C" and atom.GetTotalNumHs() > 0]
+    for position in rng.sample(positions, min(len(positions), rng.randint(1, max_substituents))):
+        fragment = rng.choice(fragments)
+        offset = mol.GetNumAtoms()
+        mol.InsertMol(fragment)
+        mol.AddBond(position, offset, Chem.BondType.SINGLE)
+        atom = mol.GetAtomWithIdx(position)
+        if atom.GetNumExplicitHs():
+            atom.SetNumExplicitHs(atom.GetNumExplicitHs() - 1)
+    try:
+        Chem.SanitizeMol(mol)
+    except (ValueError, RuntimeError):
+        return None
+    return Chem.MolToSmiles(mol)
+
+
+def generate_library(size, seed=0, max_substituents=3):
+    """
+    Deterministic library of `size` unique SMILES (Name, SMILES) made by decorating SEED_SMILES with
+    SUBSTITUENTS. The same size and seed always give the same library, so benchmark runs are comparable.
+    """
+    RDLogger.DisableLog("rdApp.*")
+    rng = random.Random(seed)
+    scaffolds = [Chem.MolFromSmiles(smiles) for smiles in SEED_SMILES]
+    fragments = [Chem.MolFromSmiles(smiles) for smiles in SUBSTITUENTS]
+    seen = set()
+    smiles = []
+    for scaffold in scaffolds[:size]:
+        canonical = Chem.MolToSmiles(scaffold)
+        seen.add(canonical)
+        smiles.append(canonical)
+    attempts = 0
+    while len(smiles) < size:
+        attempts += 1
+        if attempts > 50 * size:
+            raise ValueError(f"Could not enumerate {size} unique molecules from the seed set")
+        candidate = _decorate(rng.choice(scaffolds), fragments, rng, max_substituents)
+        if candidate is not None and candidate not in seen:
+            seen.add(candidate)
+            smiles.append(candidate)
+    RDLogger.EnableLog("rdApp.*")
+    return pd.DataFrame({"Name": [f"bench{i+1}" for i in range(size)], "SMILES": smiles})
@@ -0,0 +1,43 @@
+from agandock_cli.scripts.coordinate_store import parse_pdbqt_atoms
+from benchmarks.fake_unidock import main as fake_unidock, ligand_score
+from benchmarks.run_benchmark import compare
+from benchmarks.synthetic_library import generate_library
+
+LIGAND = """ROOT
+ATOM      1  C   UNL     1       1.000   0.000   0.000  0.00  0.00    +0.000 C
+ATOM      2  O   UNL     1       2.200   0.000   0.000  0.00  0.00    +0.000 OA
+ENDROOT
+TORSDOF 0
+"""
+
+
+def test_library_is_deterministic_and_unique():
+    library = generate_library(300, seed=3)
+    assert library.equals(generate_library(300, seed=3))
+    assert library["SMILES"].is_unique and library["Name"].tolist()[:2] == ["bench1", "bench2"]
+
+
+def test_fake_unidock_writes_scored_poses_in_the_box(tmp_path):
+    ligand = tmp_path / "lig7.pdbqt"
+    ligand.write_text(LIGAND)
+    config = tmp_path / "conf.txt"
+    config.write_text("center_x = 10\ncenter_y = -5\ncenter_z = 3\nnum_modes = 4\n")
+    fake_unidock(["--receptor", "r.pdbqt", "--gpu_batch", str(ligand), "--config", str(config),
+                  "--dir", str(tmp_path / "out"), "--search_mode", "detail"])
+
+    pose = (tmp_path / "out" / "lig7_out.pdbqt").read_text()
+    assert pose.count("MODEL") == 4
+    assert float(pose.split("\n", 2)[1].split()[3]) == round(ligand_score("lig7"), 3)
+    coords, types = parse_pdbqt_atoms(pose)
+    assert types == ["C", "OA"] and abs(coords.mean(axis=0) - [10, -5, 3]).max() < 1e-3
+
+
+def test_regressions_are_reported_against_the_baseline():
+    baseline = {"runs": {"1000": {"total_s": 10.0, "ligands_per_s": 100.0,
+                                  "stages": {"docking": {"items_per_s": 50.0}, "conformers": {"items_per_s": 20.0}}}}}
+    results = {"runs": {"1000": {"total_s": 10.5, "ligands_per_s": 95.0,
+                                 "stages": {"docking": {"items_per_s": 20.0, "wall_s": 50.0},
+                                            "conformers": {"items_per_s": 30.0, "wall_s": 33.0},
+                                            "plip": {"items_per_s": 5.0, "wall_s": 1.0}}}}}
+    report = compare(results, baseline).set_index("stage")["status"]
+    assert report.to_dict() == {"docking": "regression", "conformers": "improvement", "plip": "new", "total": "ok"}
@@ -0,0 +1,28 @@
+import sys
+import subprocess
+
+import pytest
+
+RECEPTOR = ["--pdb_file", "r.pdb", "--pdbqt_file", "r.pdbqt", "--config_file", "r_conf.txt"]
+DOCKING = ["run_docking", "experiment", "--input_type", "Single SMILES", "--input_smiles", "CCO"] + RECEPTOR
+
+
+def run_cli(*args):
+    return subprocess.run([sys.executable, "-m", "agandock_cli.cli", *args], capture_output=True, text=True)
+
+
+@pytest.mark.parametrize("options, message", [
+    (["--top_fraction", "0.2"], "only apply with --hierarchical"),
+    (["--dynamic_factor", "1.0"], "only apply with --hierarchical"),
+    (["--hierarchical", "--top_fraction", "0.2", "--dynamic_factor", "1.0"], "give at most one of them"),
+])
+def test_tier_options_are_rejected_in_the_wrong_combination(options, message):
+    result = run_cli(*DOCKING, *options)
+    assert result.returncode == 2
+    assert message in result.stderr
+
+
+def test_run_plip_does_not_require_a_pdb_file():
+    result = run_cli("run_plip", "--help")
+    assert result.returncode == 0
+    assert "[--pdb_file PDB_FILE]" in " ".join(result.stdout.split())
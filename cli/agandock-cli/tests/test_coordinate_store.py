@@ -0,0 +1,38 @@
+import numpy as np
+
+from agandock_cli.scripts.pose_archive import PoseArchive, archive_path
+from agandock_cli.scripts.coordinate_store import build_pose_coordinates, PoseCoordinates
+
+ETHANOL = """MODEL 1
+REMARK VINA RESULT:    -3.1      0.000      0.000
+ROOT
+ATOM      1  C1  UNL A   1    {:8.3f}  -0.055   0.097  0.00  0.00    +0.034 C 
+ATOM      2  C2  UNL A   1       0.452   0.294   0.009  0.00  0.00    +0.152 C 
+ENDROOT
+BRANCH   2   3
+ATOM      3  O1  UNL A   1       1.188  -0.881  -0.295  0.00  0.00    -0.395 OA
+ATOM      4  H6  UNL A   1       2.125  -0.625  -0.345  0.00  0.00    +0.209 HD
+ENDBRANCH   2   3
+TORSDOF 1
+ENDMDL
+MODEL 2
+ATOM      1  C1  UNL A   1      50.000  50.000  50.000  0.00  0.00    +0.034 C 
+ENDMDL
+"""
+
+
+def test_build_and_query(tmp_path):
+    folder = str(tmp_path)
+    archive = PoseArchive.create(archive_path(folder, "6_pdbqt_out"))
+    archive.add_many([("a", ETHANOL.format(-1.019)), ("b", ETHANOL.format(-2.019))])
+    build_pose_coordinates(folder)
+
+    store = PoseCoordinates.load(folder)
+    coords, elements = store.atoms("a")
+    assert coords.dtype == np.float32 and coords.shape == (4, 3)
+    assert elements.tolist() == [6, 6, 8, 1]
+    assert store.bond_table("a").tolist() == [[0, 1], [1, 2], [2, 3]]
+
+    assert store.contacts([[1.188, -0.881, -0.295]], cutoff=1.0).tolist() == [1, 1]
+    rmsd = store.rmsd(store, names=["a", "b", "missing"])
+    assert rmsd[0] == 0 and np.isclose(rmsd[1], 0) and np.isnan(rmsd[2])
@@ -0,0 +1,77 @@
+import os
+import pandas as pd
+
+from agandock_cli.scripts.experiment_catalogue import (register_experiment, record_stage, docking_stats,
+                                                       list_experiments, rebuild_catalogue, remove_missing)
+
+
+def make_experiment(base, name, receptor=b"ATOM receptor", scores=(-9.1, -7.5)):
+    folder = os.path.join(base, name)
+    os.makedirs(os.path.join(folder, "pipeline_files", "execution_time"))
+    with open(os.path.join(folder, "receptor.pdbqt"), "wb") as f:
+        f.write(receptor)
+    pd.DataFrame({"Name": [f"agan{i}" for i in range(len(scores))], "SMILES": ["CCO"] * len(scores)}).to_csv(
+        os.path.join(folder, "input_smiles.csv"), index=False)
+    pd.DataFrame({"Name": [f"agan{i}" for i in range(len(scores))], "Docking score (kcal/mol)": list(scores)}).to_csv(
+        os.path.join(folder, "output.csv"), index=False)
+    with open(os.path.join(folder, "pipeline_files", "execution_time", "total_execution_time.txt"), "w") as f:
+        f.write("12.5")
+    return folder
+
+
+def test_register_and_filter(tmp_path):
+    db = str(tmp_path / "catalogue.db")
+    first = make_experiment(str(tmp_path), "agandock_a")
+    second = make_experiment(str(tmp_path), "agandock_b", receptor=b"ATOM other", scores=(-5.0,))
+
+    register_experiment(first, receptor_path=os.path.join(first, "receptor.pdbqt"), library_size=2, db_path=db)
+    record_stage(first, "docking", "done", db_path=db, **docking_stats(first))
+    register_experiment(second, receptor_path=os.path.join(second, "receptor.pdbqt"), library_size=1, db_path=db)
+
+    rows = list_experiments(db_path=db, order_by="name", descending=False)
+    assert [row["name"] for row in rows] == ["agandock_a", "agandock_b"]
+    assert rows[0]["best_score"] == -9.1 and rows[0]["num_docked"] == 2 and rows[0]["elapsed_seconds"] == 12.5
+
+    done = list_experiments(stage="docking", status="done", db_path=db)
+    assert [row["name"] for row in done] == ["agandock_a"]
+
+    same_receptor = list_experiments(receptor_hash=rows[1]["receptor_hash"][:8], db_path=db)
+    assert [row["name"] for row in same_receptor] == ["agandock_b"]
+    assert [row["name"] for row in list_experiments(search="AGANDOCK_B", db_path=db)] == ["agandock_b"]
+    assert [row["name"] for row in list_experiments(search="recep", db_path=db, order_by="name", descending=False)] == \
+        ["agandock_a", "agandock_b"]
+    assert list_experiments(search="_b", db_path=db) == []
+
+
+def test_rebuild_and_prune(tmp_path):
+    db = str(tmp_path / "catalogue.db")
+    folder = make_experiment(str(tmp_path), "agandock_old")
+    os.makedirs(tmp_path / "not_an_experiment")
+
+    assert rebuild_catalogue(str(tmp_path), db_path=db) == 1
+    row, = list_experiments(db_path=db)
+    assert row["docking_status"] == "done" and row["library_size"] == 2
+
+    os.rename(folder, folder + "_moved")
+    assert list_experiments(db_path=db) == []
+    assert remove_missing(db_path=db) == 1
+
+
+def test_rebuild_keeps_the_registered_receptor_hash(tmp_path):
+    db = str(tmp_path / "catalogue.db")
+    registered = make_experiment(str(tmp_path), "agandock_registered")
+    receptor = str(tmp_path / "upload.pdbqt")
+    os.replace(os.path.join(registered, "receptor.pdbqt"), receptor)
+    register_experiment(registered, receptor_path=receptor, library_size=2, db_path=db)
+    registered_hash, = [row["receptor_hash"] for row in list_experiments(db_path=db)]
+
+    # Experiments docked from the CLI only hold the receptor PDB
+    pdb_only = make_experiment(str(tmp_path), "agandock_pdb_only")
+    os.rename(os.path.join(pdb_only, "receptor.pdbqt"), os.path.join(pdb_only, "receptor.pdb"))
+
+    rebuilt = str(tmp_path / "rebuilt.db")
+    assert rebuild_catalogue(str(tmp_path), db_path=rebuilt) == 2
+    rows = {row["name"]: row for row in list_experiments(db_path=rebuilt)}
+    assert rows["agandock_registered"]["receptor"] == "upload.pdbqt"
+    assert rows["agandock_registered"]["receptor_hash"] == registered_hash
+    assert rows["agandock_pdb_only"]["receptor"] == "receptor.pdb" and rows["agandock_pdb_only"]["receptor_hash"]
@@ -0,0 +1,31 @@
+import sys
+import time
+import subprocess
+
+# Generous enough for a cold CI runner; importing torch alone took several seconds
+HELP_BUDGET_S = 2.0
+HEAVY_MODULES = ("torch", "psutil", "openbabel", "ipywidgets", "IPython", "pandas", "rdkit")
+
+
+def imported_modules(code):
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True, check=True)
+    return {line.split("|")[-1].strip() for line in result.stderr.splitlines() if line.startswith("import time:")}
+
+
+def test_help_stays_under_the_import_budget():
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-m", "agandock_cli.cli", "--help"], capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    assert result.returncode == 0 and "run_docking" in result.stdout
+    assert elapsed < HELP_BUDGET_S, f"agandock --help took {elapsed:.2f} s"
+
+
+def test_cli_does_not_import_the_pipeline_dependencies():
+    modules = imported_modules("import agandock_cli.cli")
+    assert not [m for m in HEAVY_MODULES if m in modules]
+
+
+def test_docking_utils_defers_torch_and_openbabel():
+    modules = imported_modules("import agandock_cli.scripts.docking_utils")
+    assert "agandock_cli.scripts.docking_utils" in modules
+    assert not [m for m in ("torch", "psutil", "openbabel") if m in modules]
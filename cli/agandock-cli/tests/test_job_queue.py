@@ -0,0 +1,100 @@
+import os
+import pandas as pd
+import pytest
+
+from agandock_cli.scripts import experiment_catalogue, job_queue, pipeline
+from agandock_cli.scripts.job_queue import (DOCKING_COMMANDS, cancel_job, get_job, job_progress, list_jobs, read_job_events,
+                                            run_worker, schedule, submit_job)
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+CLI_DIR = os.path.dirname(TESTS_DIR)
+INPUTS_DIR = os.path.join(CLI_DIR, "agandock_cli", "inputs")
+SCRIPTS_DIR = os.path.abspath(os.path.join(CLI_DIR, "..", "..", "main", "nextjs", "scripts"))
+RECEPTOR = {f"{kind}_file_path": os.path.join(INPUTS_DIR, f"minD_APO_C1{suffix}")
+            for kind, suffix in (("pdb", ".pdb"), ("pdbqt", ".pdbqt"), ("config", "_conf.txt"))}
+
+
+@pytest.fixture
+def queue(tmp_path, monkeypatch):
+    """Throwaway job queue and catalogue; job processes are forked and inherit the fake unidock."""
+    monkeypatch.setattr(job_queue, "JOBS_PATH", str(tmp_path / "jobs.db"))
+    monkeypatch.setattr(pipeline, "SCRIPT_BASE", SCRIPTS_DIR)
+    monkeypatch.setattr(experiment_catalogue, "CATALOGUE_PATH", str(tmp_path / "catalogue.db"))
+    monkeypatch.setenv("PATH", os.path.join(CLI_DIR, "benchmarks", "bin") + os.pathsep + os.environ["PATH"])
+    monkeypatch.setenv("AGANDOCK_HOST_CPUS", "2")
+    monkeypatch.setenv("AGANDOCK_HOST_GPUS", "")
+    library = tmp_path / "library.csv"
+    pd.DataFrame({"Name": ["lig1", "lig2"], "SMILES": ["CC(=O)Nc1ccc(O)cc1", "O=C(O)c1ccccc1"]}).to_csv(library, index=False)
+    return str(library)
+
+
+def test_worker_runs_jobs_and_logs_their_progress(queue, tmp_path):
+    docked = submit_job("docking", str(tmp_path / "experiment"), owner="alice", input_type="Multiple SMILES",
+                        input_csv=queue, input_smiles=None, **RECEPTOR)
+    broken = submit_job("docking", str(tmp_path / "broken"), owner="bob", input_type="Single SMILES",
+                        input_csv=None, input_smiles=None, **RECEPTOR)
+    assert [job["status"] for job in list_jobs()] == ["queued", "queued"]
+
+    run_worker(max_jobs=2, poll_interval=0.1, once=True)
+
+    job = get_job(docked)
+    assert job["status"] == "done" and job["started"] <= job["finished"]
+    assert (job["cpus"], job["gpus"], job["gpu_ids"]) == (2, 0, None)
+    events = read_job_events(job)
+    assert events[-1]["kind"] == "done" and events[-1]["data"]["num_docked"] == 2
+    assert job_progress(events)["step_done"] == len(pipeline.DOCKING_STEPS) - 1
+    assert os.path.exists(os.path.join(job["folder"], "output.csv"))
+
+    failed = get_job(broken)
+    assert failed["status"] == "failed" and "valid input" in failed["error"]
+    assert [job["id"] for job in list_jobs(owner="bob")] == [broken]
+
+
+def test_cancelled_jobs_are_not_run(queue, tmp_path):
+    job_id = submit_job("plip", str(tmp_path / "experiment"))
+    assert cancel_job(job_id) and not cancel_job(job_id)
+
+    run_worker(poll_interval=0.1, once=True)
+
+    assert get_job(job_id)["status"] == "cancelled"
+    with pytest.raises(ValueError):
+        submit_job("unknown", str(tmp_path / "experiment"))
+
+
+def test_docking_job_list_includes_ensemble_and_hierarchical_runs(queue, tmp_path):
+    receptors = [list(RECEPTOR.values())]
+    ensemble = submit_job("ensemble", str(tmp_path / "ensemble"), receptors=receptors, input_type="Multiple SMILES",
+                          input_csv=queue, input_smiles=None)
+    hierarchical = submit_job("hierarchical", str(tmp_path / "tiered"), input_type="Multiple SMILES", input_csv=queue,
+                              input_smiles=None, top_fraction=0.5, **RECEPTOR)
+    docking = submit_job("docking", str(tmp_path / "experiment"), input_type="Multiple SMILES", input_csv=queue,
+                         input_smiles=None, **RECEPTOR)
+    submit_job("plip", str(tmp_path / "experiment"))
+
+    assert [job["id"] for job in list_jobs(command=DOCKING_COMMANDS)] == [docking, hierarchical, ensemble]
+    assert [job["id"] for job in list_jobs(command="ensemble")] == [ensemble]
+
+
+def job(owner, submitted, cpus=4, gpus=0, priority=0):
+    return {"id": f"{owner}{submitted}", "owner": owner, "submitted": submitted, "priority": priority,
+            "cpus": cpus, "gpus": gpus, "memory_gb": 1.0}
+
+
+BUDGET = {"cpus": 8, "gpus": 1, "memory_gb": 64.0}
+
+
+def test_schedule_shares_the_host_fairly_by_priority():
+    queued = [job("alice", 1), job("alice", 2), job("alice", 3), job("bob", 4)]
+    assert [j["id"] for j in schedule(queued, [], BUDGET)] == ["alice1", "bob4"]
+    assert [j["id"] for j in schedule(queued, [job("alice", 0)], BUDGET)] == ["bob4"]
+    assert [j["id"] for j in schedule(queued + [job("carol", 5, priority=1)], [], BUDGET)] == ["carol5", "alice1"]
+
+
+def test_schedule_reserves_resources_for_jobs_that_do_not_fit():
+    running = [job("alice", 0, cpus=2, gpus=1)]
+    # The second docking run waits for the GPU; the CPU-only job behind it may start
+    assert [j["id"] for j in schedule([job("bob", 1, gpus=1), job("bob", 2)], running, BUDGET)] == ["bob2"]
+    # A large job short of CPUs is not overtaken by a smaller one that would fit
+    assert schedule([job("bob", 1, cpus=8), job("carol", 2, cpus=2)], running, BUDGET) == []
+    # Requests beyond the budget are capped, so they run once the host is free
+    assert [j["id"] for j in schedule([job("bob", 1, cpus=64)], [], BUDGET)] == ["bob1"]
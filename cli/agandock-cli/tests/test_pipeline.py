@@ -0,0 +1,87 @@
+import os
+import pandas as pd
+import pytest
+
+from agandock_cli.scripts import experiment_catalogue, pipeline
+from agandock_cli.scripts.pipeline import (DOCKING_STEPS, PipelineRun, receptor_names, run_docking, run_ensemble_docking,
+                                           run_hierarchical_docking)
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+CLI_DIR = os.path.dirname(TESTS_DIR)
+INPUTS_DIR = os.path.join(CLI_DIR, "agandock_cli", "inputs")
+SCRIPTS_DIR = os.path.abspath(os.path.join(CLI_DIR, "..", "..", "main", "nextjs", "scripts"))
+RECEPTOR = [os.path.join(INPUTS_DIR, f"minD_APO_C1{suffix}") for suffix in (".pdb", ".pdbqt", "_conf.txt")]
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    """Pipeline with the repository's shell scripts, the fake unidock and a throwaway catalogue."""
+    monkeypatch.setattr(pipeline, "SCRIPT_BASE", SCRIPTS_DIR)
+    monkeypatch.setattr(experiment_catalogue, "CATALOGUE_PATH", str(tmp_path / "catalogue.db"))
+    monkeypatch.setenv("PATH", os.path.join(CLI_DIR, "benchmarks", "bin") + os.pathsep + os.environ["PATH"])
+    library = tmp_path / "library.csv"
+    pd.DataFrame({"Name": ["lig1", "lig2", "salt"], "SMILES": ["CC(=O)Nc1ccc(O)cc1", "O=C(O)c1ccccc1", "CCO.Cl"]}).to_csv(library, index=False)
+    return str(library)
+
+
+def test_docking_reports_steps_stages_and_results(engine, tmp_path):
+    events = []
+    folder = str(tmp_path / "experiment")
+    results = run_docking(*RECEPTOR, "Multiple SMILES", engine, None, folder, progress=events.append)
+
+    assert sorted(results["Name"]) == ["lig1", "lig2"]
+    assert os.path.exists(os.path.join(folder, "output.csv"))
+    steps = [(e.index, e.status) for e in events if e.kind == "step"]
+    assert steps == [(i, status) for i in range(len(DOCKING_STEPS)) for status in ("running", "done")]
+    stages = {e.stage: e.data for e in events if e.kind == "stage"}
+    assert stages["ligand_filter"]["items_in"] == 3 and stages["ligand_filter"]["items_out"] == 2
+    assert stages["docking"]["items_out"] == 2 and "complexes" in stages
+    assert events[-1].kind == "done" and events[-1].data["num_docked"] == 2
+    assert {"kind", "command", "folder", "time"} <= set(events[-1].to_dict())
+    assert experiment_catalogue.list_experiments()[0]["docking_status"] == "done"
+
+
+def test_ensemble_docking_keeps_each_ligands_best_receptor(engine, tmp_path):
+    events = []
+    folder = str(tmp_path / "ensemble")
+    results = run_ensemble_docking([RECEPTOR, RECEPTOR], "Multiple SMILES", engine, None, folder, progress=events.append)
+
+    names = receptor_names([RECEPTOR, RECEPTOR])
+    assert names == ["minD_APO_C1_1", "minD_APO_C1_2"]
+    assert sorted(results["Name"]) == ["lig1", "lig2"] and set(results["Best receptor"]) <= set(names)
+    assert {f"{name} docking score (kcal/mol)" for name in names} <= set(results.columns)
+    for name in names:
+        assert os.path.exists(os.path.join(folder, "receptors", name, "output.csv"))
+    # Ligands are prepared once for the whole ensemble
+    assert [e.index for e in events if e.kind == "step" and e.status == "running"] == list(range(len(DOCKING_STEPS)))
+    assert events[-1].kind == "done" and events[-1].data["receptors"] == names
+    statuses = {os.path.basename(row["path"]): row["docking_status"] for row in experiment_catalogue.list_experiments()}
+    assert statuses == {"ensemble": "done", names[0]: "done", names[1]: "done"}
+
+
+def test_hierarchical_docking_redocks_the_best_of_the_fast_tier(engine, tmp_path):
+    events = []
+    folder = str(tmp_path / "hierarchical")
+    results = run_hierarchical_docking(*RECEPTOR, "Multiple SMILES", engine, None, folder, top_fraction=0.5,
+                                       progress=events.append)
+
+    fast = pd.read_csv(os.path.join(folder, "tiers", "fast", "output.csv"))
+    assert sorted(fast["Name"]) == ["lig1", "lig2"]
+    assert list(results["Name"]) == [fast.sort_values("Docking score (kcal/mol)")["Name"].iloc[0]]
+    assert "Fast tier docking score (kcal/mol)" in results.columns
+    commands = [e.message for e in events if e.kind == "message" and e.message.startswith("Docking batch")]
+    assert ["--search_mode fast" in c for c in commands] == [True, False]
+    stages = {e.stage: e.data for e in events if e.kind == "stage" and e.folder == folder}
+    assert stages["tier_selection"]["items_in"] == 2 and stages["tier_selection"]["items_out"] == 1
+    assert events[-1].kind == "done" and events[-1].data["tiers"] == {"fast": 2, "detail": 1}
+    assert {row["docking_status"] for row in experiment_catalogue.list_experiments()} == {"done"}
+
+
+def test_background_run_reports_failures(engine, tmp_path):
+    run = PipelineRun(run_docking, *RECEPTOR, "Single SMILES", None, None, str(tmp_path / "experiment"))
+    events = []
+    while not run.finished:
+        events += run.poll(timeout=0.1)
+
+    assert isinstance(run.error, ValueError) and run.result is None
+    assert [e.kind for e in events] == ["step", "failed"] and "valid input" in events[-1].message
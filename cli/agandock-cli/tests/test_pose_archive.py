@@ -0,0 +1,45 @@
+import os
+
+from agandock_cli.scripts.pose_archive import PoseArchive, archive_path, migrate_experiment, open_stage, pack_directory
+
+
+def test_random_access_and_replacement(tmp_path):
+    archive = PoseArchive.create(archive_path(str(tmp_path), "6_pdbqt_out"))
+    archive.add_many((f"agan{i}", f"MODEL 1\nREMARK VINA RESULT: {-i}.0\nENDMDL\n") for i in range(100))
+    archive.add("agan7", "MODEL 1\nREMARK VINA RESULT: -99.0\nENDMDL\n")
+
+    reopened = PoseArchive(archive.path)
+    assert len(reopened) == 100
+    assert "-99.0" in reopened.get("agan7")
+    assert reopened.get("agan42").splitlines()[1] == "REMARK VINA RESULT: -42.0"
+    assert [name for name, _ in reopened.items(["agan3", "missing", "agan1"])] == ["agan1", "agan3"]
+
+    paths = reopened.extract(str(tmp_path / "out"), "_out.pdbqt", ["agan5"])
+    assert [os.path.basename(path) for path in paths] == ["agan5_out.pdbqt"]
+
+
+def test_legacy_directory_is_read_in_place_and_packed_on_request(tmp_path):
+    folder = str(tmp_path)
+    sdf_dir = os.path.join(folder, "pipeline_files", "9_sdf_out")
+    os.makedirs(sdf_dir)
+    for name in ("a", "b"):
+        with open(os.path.join(sdf_dir, f"{name}_out.sdf"), "w") as f:
+            f.write(f"{name}\n$$$$\n")
+
+    legacy = open_stage(folder, "9_sdf_out")
+    assert legacy.names() == ["a", "b"] and "b" in legacy and len(open_stage(folder, "plc")) == 0
+    assert [name for name, _ in legacy.items(["b", "missing"])] == ["b"]
+    assert not os.path.exists(os.path.join(folder, "pipeline_files", "poses"))
+
+    assert migrate_experiment(folder) == {"9_sdf_out": 2}
+    assert migrate_experiment(folder) == {}
+    archive = open_stage(folder, "9_sdf_out")
+    assert isinstance(archive, PoseArchive) and sorted(archive.names()) == ["a", "b"]
+    assert archive.get("b") == legacy.get("b") == "b\n$$$$\n"
+
+    docked = os.path.join(folder, "docked")
+    os.makedirs(docked)
+    with open(os.path.join(docked, "c_out.pdbqt"), "w") as f:
+        f.write("pose")
+    assert pack_directory(archive, docked, "_out.pdbqt") == 1
+    assert not os.path.exists(docked)
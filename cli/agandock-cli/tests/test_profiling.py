@@ -0,0 +1,40 @@
+import os
+import sys
+import json
+import subprocess
+from contextlib import nullcontext
+
+from agandock_cli.scripts.profiling import PROFILE_DIR, profiled
+
+
+def busy(n):
+    return sum(i * i for i in range(n))
+
+
+def test_disabled_profiling_patches_nothing(tmp_path):
+    run, system = subprocess.run, os.system
+    with profiled(str(tmp_path), "run_docking", enabled=False) as context:
+        assert subprocess.run is run and os.system is system
+    assert context is None and isinstance(profiled(str(tmp_path), "run_plip", False), nullcontext)
+    assert not os.path.exists(os.path.join(str(tmp_path), PROFILE_DIR))
+
+
+def test_profile_with_subprocess_timings_and_hotspots(tmp_path):
+    script = tmp_path / "child.py"
+    script.write_text("print(sum(i for i in range(10000)))\n")
+    run, system = subprocess.run, os.system
+
+    with profiled(str(tmp_path), "run_plip", enabled=True) as profile_dir:
+        busy(20000)
+        subprocess.run([sys.executable, str(script)], stdout=subprocess.PIPE)
+        os.system("true")
+    assert subprocess.run is run and os.system is system
+
+    files = os.listdir(profile_dir)
+    assert any(f.endswith("_child_1.prof") for f in files)
+    with open(os.path.join(profile_dir, next(f for f in files if f.endswith("_hotspots.json")))) as f:
+        summary = json.load(f)
+    assert {s["command"] for s in summary["subprocesses"]} == {f"{os.path.basename(sys.executable)} child.py", "true"}
+    assert [p["name"] for p in summary["profiles"]] == ["main process", "child.py"]
+    assert any("busy" in row["function"] or "genexpr" in row["function"] for row in summary["profiles"][0]["top_functions"])
+    assert "Subprocesses by wall time" in open(os.path.join(profile_dir, next(f for f in files if f.endswith("_hotspots.txt")))).read()
@@ -0,0 +1,35 @@
+import os
+import pandas as pd
+
+from agandock_cli.scripts.result_store import (SCORE_COLUMN, write_column_group, read_column_group, load_results,
+                                               docking_view, posebusters_views)
+
+
+def test_column_groups_join_on_ligand(tmp_path):
+    folder = str(tmp_path)
+    write_column_group(folder, "docking", pd.DataFrame({"Name": ["a", "b", "c", "d"], "Affinity": [-7.0, -9.5, -6.1, -8.2]}))
+    write_column_group(folder, "descriptors", pd.DataFrame({"Name": ["d", "c", "b", "a"], "SMILES": ["C", "CC", "CCC", "CCCC"],
+                                                            "Ligand efficiency": [-8.2, -3.05, -3.17, -1.75]}))
+    write_column_group(folder, "posebusters_selection", pd.DataFrame({"Name": ["b", "d", "a"]}))
+    write_column_group(folder, "posebusters", pd.DataFrame({"Name": ["d", "b"], "passes": [19, 12]}))
+
+    view = docking_view(folder)
+    assert view["Name"].tolist() == ["b", "d", "a", "c"]
+    assert view.columns.tolist() == ["Name", "SMILES", SCORE_COLUMN, "Ligand efficiency"]
+    assert view.set_index("Name").loc["c", "SMILES"] == "CC"
+
+    joined = load_results(folder, ["docking", "posebusters"], how="inner")
+    assert sorted(joined["Name"]) == ["b", "d"]
+
+    passed, failed = posebusters_views(folder, passes=19)
+    assert passed["Name"].tolist() == ["d"]
+    assert failed["Name"].tolist() == ["b", "a"]
+
+
+def test_legacy_csv_is_imported(tmp_path):
+    folder = str(tmp_path)
+    os.makedirs(os.path.join(folder, "pipeline_files"))
+    pd.DataFrame({"Name": ["x", "y"], "Affinity": [-5.0, -6.0]}).to_csv(
+        os.path.join(folder, "pipeline_files", "2_extract_affinity_from_pdbqt.csv"), index=False)
+
+    assert read_column_group(folder, "docking")["Affinity"].tolist() == [-5.0, -6.0]
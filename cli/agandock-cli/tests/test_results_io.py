@@ -0,0 +1,50 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+
+from agandock_cli.scripts.results_io import (columnar_path, write_results_table, read_results_table, filter_results,
+                                             results_page, format_for_display)
+
+
+@pytest.fixture
+def results():
+    return pd.DataFrame({
+        "Name": ["lig_1", "LIG_2", "other", "lig_4"],
+        "SMILES": ["CCO", "c1ccccc1", "CCN", "CCl"],
+        "Docking score (kcal/mol)": [-7.25, np.nan, -9.5, -6.0],
+    })
+
+
+def test_filter_matches_name_or_smiles_case_insensitively(results):
+    assert filter_results(results, "lig")["Name"].tolist() == ["lig_1", "LIG_2", "lig_4"]
+    assert filter_results(results, "ccn")["Name"].tolist() == ["other"]
+    assert filter_results(results, "c1(")["Name"].tolist() == []  # Not a regex
+    assert filter_results(results, "") is results
+
+
+def test_pages_are_sorted_with_missing_scores_last(results):
+    score = "Docking score (kcal/mol)"
+    first, second = (results_page(results, sort_by=score, page=page, page_size=2) for page in (1, 2))
+    assert first["Name"].tolist() == ["other", "lig_1"]
+    assert second["Name"].tolist() == ["lig_4", "LIG_2"]
+    assert results_page(results, sort_by=score, ascending=False, page_size=3)["Name"].tolist() == ["lig_4", "lig_1", "other"]
+    assert results_page(results, page=3, page_size=2).empty
+
+    display = format_for_display(first)
+    assert display[score].tolist() == ["-9.50", "-7.25"]
+    assert format_for_display(second)[score].tolist() == ["-6.00", ""]
+
+
+def test_outdated_parquet_twin_is_rebuilt(results, tmp_path):
+    pytest.importorskip("pyarrow")
+    csv_path = str(tmp_path / "output.csv")
+    write_results_table(results, csv_path)
+    assert os.path.exists(columnar_path(csv_path))
+    pd.testing.assert_frame_equal(read_results_table(csv_path), results)
+
+    results.head(2).to_csv(csv_path, index=False)
+    stamp = os.path.getmtime(columnar_path(csv_path)) + 10
+    os.utime(csv_path, (stamp, stamp))
+    assert read_results_table(csv_path)["Name"].tolist() == ["lig_1", "LIG_2"]
+    assert len(pd.read_parquet(columnar_path(csv_path))) == 2
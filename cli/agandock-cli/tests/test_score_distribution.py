@@ -0,0 +1,22 @@
+import json
+import numpy as np
+import pandas as pd
+
+from agandock_cli.scripts.score_distribution import (SCORE_COLUMN, ScoreDistribution, load_score_distribution,
+                                                     distribution_path)
+
+
+def test_range_counts_match_filtering(tmp_path):
+    scores = np.round(np.random.default_rng(0).normal(-7, 1.5, 5000), 2)
+    csv_path = str(tmp_path / "output.csv")
+    pd.DataFrame({"Name": range(len(scores)), SCORE_COLUMN: scores}).to_csv(csv_path, index=False)
+
+    distribution = load_score_distribution(csv_path)
+    for lower, higher in [(-9, -5), (-7.45, -7.45), (distribution.min, distribution.max), (-3.333, -1.001)]:
+        expected = ((scores >= lower - 1e-9) & (scores <= higher + 1e-9)).sum()
+        assert distribution.count_between(lower, higher) == expected
+
+    with open(distribution_path(csv_path)) as f:
+        stored = ScoreDistribution.from_dict(json.load(f))
+    assert stored.total == len(scores)
+    assert stored.histogram_frame()["Count"].sum() == len(scores)
@@ -0,0 +1,49 @@
+import os
+import sys
+import json
+import subprocess
+import pytest
+
+from agandock_cli.scripts.stage_metrics import METRICS_FILE, stage_timer, read_stage_metrics, stage_breakdown
+
+
+def test_stages_are_appended_as_json_lines(tmp_path):
+    folder = str(tmp_path)
+    with stage_timer(folder, "conformers", items_in=10) as stage:
+        stage.items_out = 8
+    with pytest.raises(RuntimeError):
+        with stage_timer(folder, "docking", items_in=8):
+            raise RuntimeError("unidock failed")
+
+    with open(os.path.join(folder, METRICS_FILE)) as f:
+        records = [json.loads(line) for line in f]
+    assert [(r["stage"], r["status"]) for r in records] == [("conformers", "done"), ("docking", "failed")]
+    assert records[0]["items_out"] == 8 and records[0]["items_per_s"] > 0
+    assert records[0]["wall_s"] >= 0 and records[0]["cpu_s"] >= 0 and records[0]["peak_rss_mb"] > 0
+
+
+def test_breakdown_keeps_latest_run_in_pipeline_order(tmp_path):
+    folder = str(tmp_path)
+    for stage in ("docking", "posebusters", "docking"):
+        with stage_timer(folder, stage):
+            pass
+    with open(os.path.join(folder, METRICS_FILE), "a") as f:
+        f.write('{"stage": "pl')  # Torn line of an interrupted run
+
+    assert len(read_stage_metrics(folder)) == 3
+    breakdown = stage_breakdown(folder)
+    assert breakdown["stage"].tolist() == ["docking", "posebusters"]
+    assert stage_breakdown(str(tmp_path / "old_experiment")).empty
+
+
+def test_peak_rss_is_measured_per_stage(tmp_path):
+    folder = str(tmp_path)
+    allocate = "import time; block = bytearray(300 * 2 ** 20); time.sleep(1)"
+    with stage_timer(folder, "docking"):
+        subprocess.run([sys.executable, "-c", allocate], check=True)
+    with stage_timer(folder, "posebusters"):
+        pass
+
+    heavy, light = read_stage_metrics(folder)["peak_rss_mb"].tolist()
+    assert heavy >= 300
+    assert light < heavy - 200  # A process-lifetime high-water mark would repeat the docking peak
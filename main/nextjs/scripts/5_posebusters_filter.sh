@@ -15,6 +15,6 @@ touch "$posebusters_output"
 echo -e "\033[1m\033[34mCheck PoseBusters Progress... \033[91m$posebusters_output\033[0m"
 
 find "$input_sdf" -name "*.sdf" -print0 | \
-    xargs -0 -P "$(nproc)" -I {} bust "{}" -p "$pdb_filename" --outfmt csv >> "$posebusters_output" 
+    xargs -0 -P "${AGANDOCK_WORKERS:-$(nproc)}" -I {} bust "{}" -p "$pdb_filename" --outfmt csv >> "$posebusters_output" 
 
 echo -e "\033[1m\033[34mPoseBusters Filtration Completed\033[0m"
@@ -0,0 +1,94 @@
+import os
+import base64
+import hashlib
+import functools
+
+from rdkit import Chem
+from rdkit.Chem import Draw
+from rdkit.Chem.Draw import rdMolDraw2D
+from io import BytesIO
+
+
+DEPICTION_CACHE_DIR = os.environ.get("AGANDOCK_DEPICTION_CACHE",
+                                     os.path.join(os.path.expanduser("~"), ".cache", "agandock", "depictions"))
+STRUCTURE_IMAGE_SIZE = (200, 100)
+
+
+
+##############################################################################################################################
+""" Depiction cache """
+
+@functools.lru_cache(maxsize=100000)
+def canonical_smiles(smiles):
+    if not isinstance(smiles, str):
+        return None
+    mol = Chem.MolFromSmiles(smiles)
+    if mol is None:
+        return None
+    return Chem.MolToSmiles(mol)
+
+
+def _cache_path(canonical, size, fmt):
+    key = hashlib.sha1(f"{canonical}|{size[0]}x{size[1]}".encode()).hexdigest()
+    return os.path.join(DEPICTION_CACHE_DIR, key[:2], f"{key}.{fmt}")
+
+
+def _render(canonical, size, fmt):
+    mol = Chem.MolFromSmiles(canonical)
+    if fmt == "svg":
+        drawer = rdMolDraw2D.MolDraw2DSVG(size[0], size[1])
+        drawer.DrawMolecule(mol)
+        drawer.FinishDrawing()
+        return drawer.GetDrawingText().encode()
+    img = Draw.MolToImage(mol, size=size)
+    buffered = BytesIO()
+    img.save(buffered, format="PNG")
+    return buffered.getvalue()
+
+
+@functools.lru_cache(maxsize=20000)
+def _depict_canonical(canonical, size, fmt):
+    path = _cache_path(canonical, size, fmt)
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            return f.read()
+
+    data = _render(canonical, size, fmt)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except OSError:
+        pass  # A read-only cache only costs re-rendering
+    return data
+
+
+def depict(smiles, size=STRUCTURE_IMAGE_SIZE, fmt="png"):
+    """
+    Return the PNG or SVG depiction of a SMILES as bytes, or None for unparsable input.
+    Depictions are keyed by canonical SMILES and image size, memoised in-process and persisted on disk.
+    """
+    if fmt not in ("png", "svg"):
+        raise ValueError(f"Unsupported depiction format: {fmt}")
+    canonical = canonical_smiles(smiles)
+    if canonical is None:
+        return None
+    return _depict_canonical(canonical, tuple(size), fmt)
+
+
+def structure_image_html(smiles, size=STRUCTURE_IMAGE_SIZE, fmt="png"):
+    data = depict(smiles, size, fmt)
+    if data is None:
+        return None
+    mime = "image/svg+xml" if fmt == "svg" else "image/png"
+    img_str = base64.b64encode(data).decode()
+    return f'<img src="data:{mime};base64,{img_str}"/>'
+
+
+def add_structure_images(page_df):
+    page_df = page_df.copy()
+    images = page_df["SMILES"].map(structure_image_html).fillna("")
+    page_df.insert(page_df.columns.get_loc("SMILES") + 1, "Chemical structure", images)
+    return page_df
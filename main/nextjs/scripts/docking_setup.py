@@ -4,28 +4,23 @@ import csv
 import sys
 import time
 import math
-import torch
 import random
 import shutil
-import psutil
 import string
 import logging
 import warnings
 import subprocess
 import pandas as pd
 import concurrent.futures
-import ipywidgets as widgets
 import multiprocessing as mp
 
 from glob import glob
 from typing import Optional, List
-from IPython.display import Audio, display
 from multiprocessing import Pool, cpu_count
 from concurrent.futures import ThreadPoolExecutor
-from openbabel import openbabel, pybel
 from rdkit import Chem, DataStructs
 from rdkit.Chem import AllChem, Descriptors, Draw
-from scripts.docking_utils import *
+from agandock_cli.scripts.docking_utils import *
 
 stderr = sys.stderr
 sys.stderr = open(os.devnull, 'w')
@@ -34,4 +29,28 @@ logging.getLogger('openbabel').setLevel(logging.ERROR)
 logging.getLogger('pybel').setLevel(logging.ERROR)
 sys.stderr = stderr
 
+# Heavy modules (torch alone takes seconds) are imported on first use instead of when the app starts
+_LAZY_IMPORTS = {
+    "torch": ("torch", None),
+    "psutil": ("psutil", None),
+    "widgets": ("ipywidgets", None),
+    "Audio": ("IPython.display", "Audio"),
+    "display": ("IPython.display", "display"),
+    "openbabel": ("openbabel.openbabel", None),
+    "pybel": ("openbabel.pybel", None),
+}
+
+
+def __getattr__(name):
+    if name not in _LAZY_IMPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    import importlib
+
+    module_name, attribute = _LAZY_IMPORTS[name]
+    value = importlib.import_module(module_name)
+    if attribute:
+        value = getattr(value, attribute)
+    globals()[name] = value
+    return value
+
 __all__ = ["os", "re", "csv", "sys", "time", "math", "torch", "random", "shutil", "psutil", "string", "logging", "warnings", "subprocess", "pd", "concurrent.futures", "widgets", "mp", "glob", "Optional", "List", "Audio", "display", "Pool", "cpu_count", "ThreadPoolExecutor", "openbabel", "pybel", "Chem", "DataStructs", "AllChem", "Descriptors", "Draw"]
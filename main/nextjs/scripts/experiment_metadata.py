@@ -0,0 +1,128 @@
+import os
+import json
+import threading
+import pandas as pd
+
+from collections import namedtuple
+from agandock_cli.scripts.results_io import read_results_table
+
+
+EXPERIMENT_MANIFEST = "experiment_manifest.json"
+
+# Files and folders the summary is derived from. A folder's mtime changes whenever entries are added or removed.
+TRACKED_PATHS = (
+    "input_smiles.csv",
+    "salted_compounds.csv",
+    "pipeline_files/execution_time/total_execution_time.txt",
+    "pipeline_files/3_pdbqt",
+    "pipeline_files/5_pdbqt_for_docking",
+)
+
+ExperimentData = namedtuple("ExperimentData", "num_input num_salts time_taken num_pdbqt_in num_pdbqt_out")
+
+_cache_lock = threading.Lock()
+_metadata_cache = {}
+_frame_cache = {}
+
+
+
+##############################################################################################################################
+""" Experiment metadata """
+
+def _stat_signature(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def tracked_signature(folder):
+    return {rel: _stat_signature(os.path.join(folder, rel)) for rel in TRACKED_PATHS}
+
+
+def _count_files(folder):
+    if not os.path.isdir(folder):
+        return 0
+    with os.scandir(folder) as entries:
+        return sum(1 for entry in entries if entry.is_file())
+
+
+def compute_experiment_metadata(folder):
+    """Compute the summary shown for an experiment from its files."""
+    time_taken_path = os.path.join(folder, "pipeline_files/execution_time/total_execution_time.txt")
+    time_taken = ""
+    if os.path.exists(time_taken_path):
+        with open(time_taken_path, "r") as file:
+            time_taken = file.read().strip()
+
+    return ExperimentData(
+        num_input=len(pd.read_csv(os.path.join(folder, "input_smiles.csv"))),
+        num_salts=len(pd.read_csv(os.path.join(folder, "salted_compounds.csv"))),
+        time_taken=time_taken,
+        num_pdbqt_in=_count_files(os.path.join(folder, "pipeline_files/3_pdbqt")),
+        num_pdbqt_out=_count_files(os.path.join(folder, "pipeline_files/5_pdbqt_for_docking")),
+    )
+
+
+def _read_manifest(folder, signature):
+    manifest_path = os.path.join(folder, EXPERIMENT_MANIFEST)
+    try:
+        with open(manifest_path, "r") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get("signature") != signature:
+        return None
+    return ExperimentData(**manifest["summary"])
+
+
+def _write_manifest(folder, signature, data):
+    manifest_path = os.path.join(folder, EXPERIMENT_MANIFEST)
+    tmp_path = f"{manifest_path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "w") as f:
+            json.dump({"signature": signature, "summary": data._asdict()}, f, indent=2)
+        os.replace(tmp_path, manifest_path)
+    except OSError:
+        pass  # Read-only experiment folders are summarised on every process start instead
+
+
+def load_experiment_metadata(folder):
+    """
+    Return the experiment summary, served from the process-wide cache, then the folder's manifest,
+    and only recomputed when one of the tracked files changed (mtime/size).
+    """
+    key = os.path.abspath(folder)
+    signature = tracked_signature(key)
+    with _cache_lock:
+        cached = _metadata_cache.get(key)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+
+    data = _read_manifest(key, signature)
+    if data is None:
+        data = compute_experiment_metadata(key)
+        _write_manifest(key, signature, data)
+
+    with _cache_lock:
+        _metadata_cache[key] = (signature, data)
+    return data
+
+
+def load_results_frame(csv_path):
+    """
+    Return a result table (e.g. output.csv) from the process-wide cache, re-reading it only when the
+    file's mtime or size changed. Callers get their own copy.
+    """
+    key = os.path.abspath(csv_path)
+    signature = _stat_signature(key)
+    if signature is None:
+        raise FileNotFoundError(csv_path)
+    with _cache_lock:
+        cached = _frame_cache.get(key)
+    if cached is None or cached[0] != signature:
+        cached = (signature, read_results_table(key))
+        with _cache_lock:
+            _frame_cache[key] = cached
+    return cached[1].copy()
@@ -0,0 +1,176 @@
+import numpy as np
+import pandas as pd
+import altair as alt
+import streamlit as st
+
+
+# Interaction type -> (count column, residue number column, residue type column) in plip_result.csv
+INTERACTION_TYPES = {
+    "Hydrophobic": ("num_hydrophobic_interactions", "rsnr_hydrophobic", "restype_hydrophobic"),
+    "Hydrogen bond": ("num_hydrogen_bonding_interactions", "rsnr_hydrogen", "restype_hydrogen"),
+    "Water bridge": ("num_water_bridges", "rsnr_water_bridge", "restype_water_bridge"),
+    "Salt bridge": ("num_salt_bridges", "rsnr_salt_bridge", "restype_salt_bridge"),
+    "Halogen": ("num_halogen", "rsnr_halogen", "restype_halogen"),
+    "Halogen bond": ("num_halogen_bonds", "rsnr_halogen_bonds", "restype_halogen_bonds"),
+    "Pi stacking": ("num_pi_stacks", "rsnr_pi_stacks", "restype_pi_stacks"),
+    "Pi cation": ("num_pi_cation_interactions", "rsnr_pi_cation_interactions", "restype_pi_cation_interactions"),
+    "Metal complex": ("num_metal_complexes", "rsnr_metal_complexes", "restype_metal_complexes"),
+}
+HEATMAP_MODES = ["Residue × interaction type", "Ligand clusters × interaction type", "Individual ligands × interaction type"]
+MAX_RESIDUES = 40
+MAX_LIGANDS = 50
+NUM_CLUSTERS = 12
+HEATMAP_SCHEME = "tealblues"
+
+
+
+##############################################################################################################################
+""" Aggregation """
+
+def _as_list_column(series, pattern):
+    """Lists written to CSV come back as their repr, parse them with one vectorised regex."""
+    if series.map(lambda v: isinstance(v, (list, np.ndarray))).all():
+        return series.map(list)
+    return series.fillna("").astype(str).str.findall(pattern)
+
+
+def residue_contacts(plip_df):
+    """Long table with one row per ligand, residue and interaction type (interaction counts in Count)."""
+    frames = []
+    for label, (_, rsnr_col, restype_col) in INTERACTION_TYPES.items():
+        if rsnr_col not in plip_df.columns:
+            continue
+        contacts = pd.DataFrame({
+            "Name": plip_df["Name"].values,
+            "resnr": _as_list_column(plip_df[rsnr_col], r"-?\d+").values,
+            "restype": (_as_list_column(plip_df[restype_col], r"[A-Za-z0-9]+").values
+                        if restype_col in plip_df.columns else [[]] * len(plip_df)),
+        })
+        contacts = contacts[contacts["resnr"].map(len) > 0]
+        if contacts.empty:
+            continue
+        contacts["restype"] = [restypes if len(restypes) == len(resnrs) else [""] * len(resnrs)
+                               for resnrs, restypes in zip(contacts["resnr"], contacts["restype"])]
+        contacts = contacts.explode(["resnr", "restype"])
+        contacts["Interaction"] = label
+        frames.append(contacts)
+    if not frames:
+        return pd.DataFrame(columns=["Name", "Residue", "Interaction", "Count"])
+    contacts = pd.concat(frames, ignore_index=True)
+    contacts["resnr"] = contacts["resnr"].astype(int)
+    contacts["Residue"] = contacts["restype"].fillna("").astype(str) + contacts["resnr"].astype(str)
+    return contacts.groupby(["Name", "resnr", "Residue", "Interaction"], sort=False).size().rename("Count").reset_index()
+
+
+def residue_frequency(contacts, num_ligands, max_residues=MAX_RESIDUES):
+    """Percentage of ligands making each interaction type with each residue, for the most contacted residues."""
+    per_ligand = contacts.drop_duplicates(["Name", "resnr", "Interaction"])
+    frequency = per_ligand.groupby(["resnr", "Residue", "Interaction"]).size().rename("Ligands").reset_index()
+    top = (per_ligand.drop_duplicates(["Name", "resnr"]).groupby("resnr").size()
+           .sort_values(ascending=False).head(max_residues).index)
+    frequency = frequency[frequency["resnr"].isin(top)].sort_values("resnr")
+    frequency["Percent"] = (100 * frequency["Ligands"] / max(num_ligands, 1)).round(1)
+    return frequency
+
+
+def interaction_matrix(plip_df):
+    """Ligand × interaction type count matrix from the num_* columns."""
+    columns = {label: cols[0] for label, cols in INTERACTION_TYPES.items() if cols[0] in plip_df.columns}
+    matrix = plip_df[list(columns.values())].apply(pd.to_numeric, errors="coerce").fillna(0)
+    matrix.columns = list(columns)
+    matrix.index = plip_df["Name"].values
+    return matrix
+
+
+def cluster_ligands(matrix, num_clusters=NUM_CLUSTERS, iterations=25, seed=0):
+    """
+    Group ligands with similar interaction profiles with k-means on log-scaled counts. Deterministic
+    for a given table (k-means++ seeding with a fixed seed). Returns one cluster label per ligand.
+    """
+    values = np.log1p(matrix.to_numpy(dtype=float))
+    num_clusters = max(1, min(num_clusters, len(np.unique(values, axis=0))))
+    rng = np.random.RandomState(seed)
+    centers = values[[rng.randint(len(values))]]
+    while len(centers) < num_clusters:
+        dist_sq = ((values[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2).min(axis=1)
+        centers = np.vstack([centers, values[rng.choice(len(values), p=dist_sq / dist_sq.sum())]])
+    for _ in range(iterations):
+        labels = ((values[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2).argmin(axis=1)
+        new_centers = np.array([values[labels == k].mean(axis=0) if (labels == k).any() else centers[k]
+                                for k in range(num_clusters)])
+        if np.allclose(new_centers, centers):
+            break
+        centers = new_centers
+    # Number clusters by size, largest first
+    order = np.argsort(-np.bincount(labels, minlength=num_clusters), kind="stable")
+    return np.argsort(order)[labels] + 1
+
+
+def cluster_profiles(matrix, labels):
+    """Mean interaction counts per ligand cluster, in long form."""
+    profiles = matrix.groupby(labels).mean().round(2)
+    sizes = pd.Series(labels).value_counts()
+    profiles.index = [f"Cluster {k} ({sizes[k]})" for k in profiles.index]
+    return profiles.rename_axis("Cluster").reset_index().melt("Cluster", var_name="Interaction", value_name="Mean count")
+
+
+
+##############################################################################################################################
+""" Rendering """
+
+def _heatmap(data, y, y_title, value, value_title, y_sort, x_order):
+    height = max(200, 22 * data[y].nunique())
+    base = alt.Chart(data).encode(
+        x=alt.X("Interaction:N", sort=x_order, title=None, axis=alt.Axis(orient="top", labelAngle=-30)),
+        y=alt.Y(f"{y}:N", sort=y_sort, title=y_title),
+    )
+    cells = base.mark_rect(stroke="white", strokeWidth=0.5).encode(
+        color=alt.Color(f"{value}:Q", title=value_title, scale=alt.Scale(scheme=HEATMAP_SCHEME)),
+        tooltip=list(data.columns),
+    )
+    labels = base.mark_text(fontSize=11).encode(
+        text=alt.Text(f"{value}:Q"),
+        color=alt.condition(alt.datum[value] > data[value].max() / 2, alt.value("white"), alt.value("black")),
+    )
+    return (cells + labels).properties(height=height, background="transparent")
+
+
+def plot_heatmap(plip_df):
+    """
+    Interaction heatmap of a PLIP run. All modes are aggregated with pandas groupbys, so the chart size
+    (and its render time) is bounded by MAX_RESIDUES / NUM_CLUSTERS / MAX_LIGANDS rows regardless of
+    the number of ligands, with a drill-down to the ligands behind a row.
+    """
+    mode = st.radio("Heatmap", HEATMAP_MODES, horizontal=True, key="plip_heatmap_mode")
+    x_order = [label for label, cols in INTERACTION_TYPES.items() if cols[0] in plip_df.columns]
+
+    if mode == HEATMAP_MODES[0]:
+        contacts = residue_contacts(plip_df)
+        if contacts.empty:
+            st.info("No protein-ligand interactions found.")
+            return
+        frequency = residue_frequency(contacts, len(plip_df))
+        residue_order = frequency.drop_duplicates("resnr")["Residue"].tolist()
+        st.altair_chart(_heatmap(frequency[["Residue", "Interaction", "Ligands", "Percent"]], "Residue", "Residue",
+                                 "Percent", "% of ligands", residue_order, x_order), use_container_width=True)
+        residue = st.selectbox("Show ligands interacting with residue", residue_order, key="plip_heatmap_residue")
+        drill = contacts[contacts["Residue"] == residue].pivot_table(index="Name", columns="Interaction",
+                                                                     values="Count", aggfunc="sum", fill_value=0)
+        st.dataframe(drill.reset_index(), use_container_width=True, hide_index=True)
+
+    elif mode == HEATMAP_MODES[1]:
+        matrix = interaction_matrix(plip_df)
+        labels = cluster_ligands(matrix)
+        profiles = cluster_profiles(matrix, labels)
+        st.altair_chart(_heatmap(profiles, "Cluster", "Ligand cluster (size)", "Mean count", "Mean count",
+                                 profiles["Cluster"].unique().tolist(), x_order), use_container_width=True)
+        cluster = st.selectbox("Show ligands of cluster", sorted(set(labels)), key="plip_heatmap_cluster")
+        members = matrix[labels == cluster].astype(int)
+        st.dataframe(members.rename_axis("Name").reset_index(), use_container_width=True, hide_index=True)
+
+    else:
+        matrix = interaction_matrix(plip_df).head(MAX_LIGANDS).astype(int)
+        data = matrix.rename_axis("Name").reset_index().melt("Name", var_name="Interaction", value_name="Count")
+        st.caption(f"Showing the first {len(matrix)} of {len(plip_df)} ligands, use the other modes for the whole run.")
+        st.altair_chart(_heatmap(data, "Name", "Ligand", "Count", "Count", matrix.index.tolist(), x_order),
+                        use_container_width=True)
@@ -0,0 +1,26 @@
+import os
+import hashlib
+import streamlit as st
+import streamlit.components.v1 as components
+
+
+FRONTEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ligand_viewer_frontend")
+
+_ligand_viewer = components.declare_component("ligand_viewer", path=FRONTEND_DIR)
+
+
+
+##############################################################################################################################
+""" Persistent 3D viewer """
+
+def ligand_viewer(receptor_pdb, ligand_sdf, residue_colors, cartoon, height=600, key="ligand_viewer"):
+    """
+    3Dmol viewer that keeps the receptor in the browser. The receptor PDB is only sent when the viewer does
+    not hold it yet (first draw, another experiment or receptor detail, a reloaded page); selecting another
+    ligand pushes just its SDF and the colors of its interacting residues.
+    """
+    receptor_key = hashlib.sha1(receptor_pdb.encode()).hexdigest()
+    has_receptor = st.session_state.get(key) == receptor_key
+    _ligand_viewer(receptor_key=receptor_key, receptor=None if has_receptor else receptor_pdb, ligand=ligand_sdf,
+                   residues=list(residue_colors), residue_colors={str(res): color for res, color in residue_colors.items()},
+                   cartoon=cartoon, height=height, key=key, default=None)
@@ -14,12 +14,25 @@ class StructureReport:
     def __init__(self, mol: PDBComplex, outputprefix: str = 'report'):
         self.mol = mol
         self.excluded = self.mol.excluded
-        self.xmlreport = self.construct_xml_tree()
-        self.txtreport = self.construct_txt_file()
-        self.get_bindingsite_data()
+        self._xmlreport = None
+        self._txtreport = None
         self.outpath = mol.output_path
         self.outputprefix = outputprefix
 
+    @property
+    def xmlreport(self):
+        """XML report tree, only constructed when first needed"""
+        if self._xmlreport is None:
+            self.get_bindingsite_data()
+        return self._xmlreport
+
+    @property
+    def txtreport(self):
+        """TXT report lines, only constructed when first needed"""
+        if self._txtreport is None:
+            self.get_bindingsite_data()
+        return self._txtreport
+
     def construct_xml_tree(self):
         """Construct the basic XML tree"""
         report = et.Element('report')
@@ -78,18 +91,32 @@ class StructureReport:
 
     def get_bindingsite_data(self):
         """Get the additional data for the binding sites"""
+        self._xmlreport = self.construct_xml_tree()
+        self._txtreport = self.construct_txt_file()
         for i, site in enumerate(sorted(self.mol.interaction_sets)):
             s = self.mol.interaction_sets[site]
-            bindingsite = BindingSiteReport(s).generate_xml()
+            bsreport = BindingSiteReport(s)
+            bindingsite = bsreport.generate_xml()
             bindingsite.set('id', str(i + 1))
             bindingsite.set('has_interactions', 'False')
-            self.xmlreport.insert(i + 1, bindingsite)
-            for itype in BindingSiteReport(s).generate_txt():
-                self.txtreport.append(itype)
+            self._xmlreport.insert(i + 1, bindingsite)
+            for itype in bsreport.generate_txt():
+                self._txtreport.append(itype)
             if not s.no_interactions:
                 bindingsite.set('has_interactions', 'True')
             else:
-                self.txtreport.append('No interactions detected.')
+                self._txtreport.append('No interactions detected.')
+
+    def records(self):
+        """Typed records (plain dicts) for all binding sites, without building the XML or TXT reports"""
+        records = []
+        for i, site in enumerate(sorted(self.mol.interaction_sets)):
+            s = self.mol.interaction_sets[site]
+            record = BindingSiteReport(s).generate_records()
+            record['id'] = i + 1
+            record['has_interactions'] = not s.no_interactions
+            records.append(record)
+        return records
 
     def write_xml(self, as_string=False):
         """Write the XML report"""
@@ -351,6 +378,69 @@ class BindingSiteReport:
             form += '\n'
         return form
 
+    # Features holding numbers formatted as text for the TXT/XML reports
+    FLOAT_FEATURES = {'DIST', 'DIST_H-A', 'DIST_D-A', 'DIST_A-W', 'DIST_D-W', 'DON_ANGLE', 'ACC_ANGLE',
+                      'WATER_ANGLE', 'CENTDIST', 'ANGLE', 'OFFSET', 'RMS'}
+    INTERACTION_SECTIONS = (('hydrophobic_interactions', 'hydrophobic'),
+                            ('hydrogen_bonds', 'hbond'),
+                            ('water_bridges', 'waterbridge'),
+                            ('salt_bridges', 'saltbridge'),
+                            ('pi_stacks', 'pistacking'),
+                            ('pi_cation_interactions', 'pication'),
+                            ('halogen_bonds', 'halogen'),
+                            ('metal_complexes', 'metal'))
+
+    def smiles_to_pdb_mapping(self):
+        """Mapping of SMILES atom numbering to PDB atom numbering in the format used by the XML report"""
+        if self.ligand.atomorder is None:
+            return ''
+        bsid = ':'.join([self.ligand.hetid, self.ligand.chain, str(self.ligand.position)])
+        smiles_to_pdb_map = [(key, self.ligand.Mapper.mapid(self.ligand.can_to_pdb[key], mtype='protein', bsid=bsid))
+                             for key in self.ligand.can_to_pdb]
+        return ','.join([str(mapping[0]) + ':' + str(mapping[1]) for mapping in smiles_to_pdb_map])
+
+    @classmethod
+    def typed_contact(cls, features, single_contact):
+        """Returns one contact as a dict with lowercase feature names and native Python types"""
+        contact = {}
+        for feature, value in zip(features, single_contact):
+            if feature in ('LIG_IDX_LIST', 'PROT_IDX_LIST'):
+                value = [int(idx) for idx in str(value).split(',')] if value != '' else []
+            elif feature.endswith('COO'):
+                value = tuple(float(c) for c in value)
+            elif feature in cls.FLOAT_FEATURES:
+                value = float(value)
+            contact[feature.lower()] = value
+        return contact
+
+    def generate_records(self):
+        """Generates typed records for a single binding site.
+
+        The records carry the same information as the XML report (identifiers, SMILES mapping and one list of
+        contacts per interaction type, in the same order), so they can be consumed in-process without
+        serializing to and parsing from XML.
+        """
+        record = {'bsid': self.bsid,
+                  'longname': self.longname,
+                  'ligtype': self.ligtype,
+                  'hetid': self.ligand.hetid,
+                  'chain': self.ligand.chain,
+                  'position': self.ligand.position,
+                  'composite': len(self.lig_members) > 1,
+                  'smiles': self.ligand.smiles,
+                  'inchikey': self.ligand.inchikey,
+                  'smiles_to_pdb': self.smiles_to_pdb_mapping(),
+                  'interacting_chains': list(self.interacting_chains),
+                  'bs_residues': list(self.bs_res),
+                  'interactions': {}}
+        for element_name, prefix in self.INTERACTION_SECTIONS:
+            features = getattr(self, '%s_features' % prefix)
+            # Same unique order as in the XML report
+            interaction_information = sorted(getattr(self, '%s_info' % prefix), key=itemgetter(0, 2, -2))
+            record['interactions'][element_name] = [self.typed_contact(features, single_contact)
+                                                    for single_contact in interaction_information]
+        return record
+
     def generate_txt(self):
         """Generates an flat text report for a single binding site"""
 
@@ -502,13 +592,6 @@ class BindingSiteReport:
         # Mappings
         mappings = et.SubElement(report, 'mappings')
         smiles_to_pdb = et.SubElement(mappings, 'smiles_to_pdb')  # SMILES numbering to PDB file numbering (atoms)
-        bsid = ':'.join([self.ligand.hetid, self.ligand.chain, str(self.ligand.position)])
-        if self.ligand.atomorder is not None:
-            smiles_to_pdb_map = [(key, self.ligand.Mapper.mapid(self.ligand.can_to_pdb[key],
-                                                                mtype='protein', bsid=bsid)) for key in
-                                 self.ligand.can_to_pdb]
-            smiles_to_pdb.text = ','.join([str(mapping[0]) + ':' + str(mapping[1]) for mapping in smiles_to_pdb_map])
-        else:
-            smiles_to_pdb.text = ''
+        smiles_to_pdb.text = self.smiles_to_pdb_mapping()
 
         return report
@@ -0,0 +1,154 @@
+import os
+import argparse
+import numpy as np
+import pandas as pd
+
+IFP_FILE = "interaction_fingerprints.npz"
+_loaded = {}
+
+# interaction types of plip_result.csv, one fingerprint bit per residue and type. rsnr_halogen_bonds repeats the
+# halogen_bond elements of rsnr_halogen, so it is left out to count each halogen bond once.
+INTERACTION_TYPES = ('hydrophobic', 'hydrogen', 'water_bridge', 'salt_bridge', 'halogen', 'pi_stacks',
+                     'pi_cation_interactions', 'metal_complexes')
+
+if hasattr(np, 'bitwise_count'):
+    def _popcount_rows(packed):
+        return np.bitwise_count(packed).sum(axis=1, dtype=np.int64)
+else:
+    _POPCOUNT_TABLE = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+    def _popcount_rows(packed):
+        return _POPCOUNT_TABLE[packed.view(np.uint8)].sum(axis=1, dtype=np.int64)
+
+
+def _residue_numbers(column):
+    """one row per (pose, residue number) of an rsnr_* column holding lists or their CSV repr."""
+    if column.map(lambda v: isinstance(v, (list, tuple, np.ndarray))).all():
+        residues = column.map(list)
+    else:
+        residues = column.fillna('').astype(str).str.findall(r'-?\d+')
+    residues = residues.reset_index(drop=True).explode().dropna()
+    return residues.index.to_numpy(), residues.astype(np.int64).to_numpy()
+
+
+class InteractionFingerprints:
+    """bit-packed residue x interaction type fingerprints of all poses of a PLIP run.
+
+    Bits only exist for the (residue, type) pairs observed in the run, rows are packed into 64-bit words
+    so that a Tanimoto search over all poses is one vectorised AND plus popcount.
+    """
+
+    def __init__(self, names, bits, packed):
+        self.names = np.asarray(names, dtype=str)
+        self.bits = [(int(resnr), str(itype)) for resnr, itype in bits]
+        self.packed = np.ascontiguousarray(packed, dtype=np.uint64)
+        self.counts = _popcount_rows(self.packed)
+        self._index = {name: i for i, name in enumerate(self.names)}
+
+    @classmethod
+    def from_results(cls, results):
+        """build the fingerprints from plip_result rows (a dataframe or a list of dicts)."""
+        df = pd.DataFrame(results)
+        contacts = []
+        for itype in INTERACTION_TYPES:
+            column = 'rsnr_%s' % itype
+            if column in df.columns:
+                rows, resnrs = _residue_numbers(df[column])
+                contacts.append(pd.DataFrame({'row': rows, 'resnr': resnrs, 'type': itype}))
+        contacts = pd.concat(contacts, ignore_index=True) if contacts else pd.DataFrame(columns=['row', 'resnr', 'type'])
+        bits = sorted(set(zip(contacts['resnr'].astype(int), contacts['type'])))
+        bit_index = pd.MultiIndex.from_tuples(bits, names=['resnr', 'type']) if bits else None
+
+        dense = np.zeros((len(df), max(len(bits), 1)), dtype=bool)
+        if bits:
+            cols = bit_index.get_indexer(pd.MultiIndex.from_arrays([contacts['resnr'].astype(int), contacts['type']]))
+            dense[contacts['row'].to_numpy(dtype=np.int64), cols] = True
+        words = (dense.shape[1] + 63) // 64
+        packed = np.packbits(dense, axis=1, bitorder='little')
+        packed = np.pad(packed, ((0, 0), (0, words * 8 - packed.shape[1])))
+        return cls(df['Name'].astype(str).values, bits, packed.view(np.uint64))
+
+    def save(self, path):
+        np.savez_compressed(path, names=self.names, packed=self.packed,
+                            bit_resnr=np.array([b[0] for b in self.bits], dtype=np.int64),
+                            bit_type=np.array([b[1] for b in self.bits], dtype=str))
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data['names'], zip(data['bit_resnr'], data['bit_type']), data['packed'])
+
+    def fingerprint(self, name):
+        """packed fingerprint of a pose."""
+        if name not in self._index:
+            raise KeyError('No interaction fingerprint for %s' % name)
+        return self.packed[self._index[name]]
+
+    def interactions(self, name):
+        """(residue, interaction type) pairs set in the fingerprint of a pose."""
+        row = np.unpackbits(self.fingerprint(name).view(np.uint8), bitorder='little')[:len(self.bits)]
+        return [self.bits[i] for i in np.flatnonzero(row)]
+
+    def tanimoto(self, query):
+        """Tanimoto similarity of a packed query fingerprint to every pose."""
+        common = _popcount_rows(self.packed & query)
+        union = self.counts + _popcount_rows(query[None, :]) - common
+        return np.divide(common, union, out=np.zeros(len(common)), where=union > 0)
+
+    def search(self, reference, top_k=10, include_reference=False):
+        """top-k poses binding most like the reference pose, as a dataframe sorted by similarity."""
+        similarity = self.tanimoto(self.fingerprint(reference))
+        if not include_reference:
+            similarity[self._index[reference]] = -1
+        top_k = min(top_k, len(similarity))
+        top = np.argpartition(-similarity, top_k - 1)[:top_k] if top_k else np.array([], dtype=int)
+        top = top[np.lexsort((self.names[top], -similarity[top]))]
+        top = top[similarity[top] >= 0]
+        return pd.DataFrame({'Name': self.names[top], 'Tanimoto': similarity[top].round(3),
+                             'Interactions': self.counts[top]})
+
+
+def write_fingerprints(results, directory):
+    """build the fingerprints of a PLIP run and store them next to plip_result.csv."""
+    fingerprints = InteractionFingerprints.from_results(results)
+    fingerprints.save(os.path.join(directory, IFP_FILE))
+    return fingerprints
+
+
+def load_fingerprints(directory):
+    """load the stored fingerprints of a PLIP run, building them from plip_result.csv if needed.
+
+    Loaded fingerprints are kept in memory until the stored file changes.
+    """
+    path = os.path.join(directory, IFP_FILE)
+    result_path = os.path.join(directory, "plip_result.csv")
+    if not os.path.exists(path) or (os.path.exists(result_path) and
+                                    os.path.getmtime(path) < os.path.getmtime(result_path)):
+        write_fingerprints(pd.read_csv(result_path), directory)
+
+    key = os.path.abspath(path)
+    mtime = os.stat(path).st_mtime_ns
+    if key not in _loaded or _loaded[key][0] != mtime:
+        _loaded[key] = (mtime, InteractionFingerprints.load(path))
+    return _loaded[key][1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search PLIP interaction fingerprints for poses binding like a reference.")
+    parser.add_argument("-d", "--dir", required=True, help="PLIP output directory (containing plip_result.csv)")
+    parser.add_argument("-r", "--reference", required=True, help="Name of the reference ligand")
+    parser.add_argument("-k", "--top_k", type=int, default=10, help="Number of similar poses to report")
+    parser.add_argument("-o", "--output", help="Also write the hits to this CSV file")
+    args = parser.parse_args()
+
+    fingerprints = load_fingerprints(args.dir)
+    hits = fingerprints.search(args.reference, args.top_k)
+    print("Reference %s: %s" % (args.reference, ", ".join("%d %s" % (resnr, itype) for resnr, itype
+                                                          in fingerprints.interactions(args.reference))))
+    print(hits.to_string(index=False))
+    if args.output:
+        hits.to_csv(args.output, index=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+import os
+import json
+import time
+import argparse
+import platform
+import tempfile
+import subprocess
+import numpy as np
+from contextlib import contextmanager
+
+from basic import config
+from openbabel import pybel
+from exchange.report import StructureReport
+from structure import preparation
+from structure.preparation import PDBComplex, PDBParser, LigandFinder
+
+PLIP_DIR = os.path.dirname(os.path.abspath(__file__))
+TEST_PDB_DIR = os.path.join(PLIP_DIR, "test", "pdb")
+DEFAULT_RECEPTOR = os.path.abspath(os.path.join(PLIP_DIR, "..", "..", "..", "..", "cli", "agandock-cli",
+                                                "agandock_cli", "inputs", "minD_APO_C1.pdb"))
+# Detectors of structure/detection.py, called by PLInteraction through the names imported into preparation
+DETECTORS = ("hydrophobic_interactions", "hbonds", "pistacking", "pication", "saltbridge", "halogen",
+             "water_bridges", "metal_complexation")
+POSE_LIGANDS = ["CC(=O)Nc1ccc(O)cc1", "O=C(Nc1ccccc1)c1cccs1", "CN1CCN(CC1)c1ccccc1C(=O)O",
+                "Oc1ccc(cc1)-c1nc2ccccc2[nH]1", "NS(=O)(=O)c1ccc(Cl)cc1"]
+
+
+##############################################################################################################################
+# Instrumentation
+
+class Timings:
+    """per-call wall times of the instrumented PLIP functions, by label."""
+
+    def __init__(self):
+        self.calls = {}
+
+    def add(self, label, seconds):
+        self.calls.setdefault(label, []).append(seconds)
+
+    def timed(self, label, function):
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.add(label, time.perf_counter() - start)
+        return wrapper
+
+    def summary(self):
+        summary = {}
+        for label, calls in self.calls.items():
+            calls = np.array(calls)
+            summary[label] = {"calls": len(calls), "total_s": round(float(calls.sum()), 4),
+                              "mean_ms": round(1000 * float(calls.mean()), 3),
+                              "median_ms": round(1000 * float(np.median(calls)), 3),
+                              "p95_ms": round(1000 * float(np.percentile(calls, 95)), 3)}
+        return summary
+
+
+@contextmanager
+def instrumented(timings):
+    """time the parser, ligand finder, complex characterisation and every detector in place, restoring them afterwards."""
+    patches = [(PDBParser, "parse_pdb", "PDBParser.parse_pdb"),
+               (LigandFinder, "getligs", "LigandFinder.getligs"),
+               (PDBComplex, "characterize_complex", "PDBComplex.characterize_complex")]
+    patches += [(preparation, name, "detection.%s" % name) for name in DETECTORS]
+    originals = [(owner, name, getattr(owner, name)) for owner, name, _ in patches]
+    for owner, name, label in patches:
+        setattr(owner, name, timings.timed(label, getattr(owner, name)))
+    try:
+        yield timings
+    finally:
+        for owner, name, original in originals:
+            setattr(owner, name, original)
+
+
+def analyze_complex(path, output_path, timings, reports=True):
+    """the work plip_post_process does per structure: load, characterise all ligands, build the records
+    (and optionally the XML/TXT reports)."""
+    start = time.perf_counter()
+    mol = PDBComplex()
+    mol.output_path = output_path
+    mol.load_pdb(path)
+    for ligand in mol.ligands:
+        mol.characterize_complex(ligand)
+    streport = StructureReport(mol)
+    records = timings.timed("StructureReport.records", streport.records)()
+    if reports:
+        timings.timed("StructureReport.get_bindingsite_data", streport.get_bindingsite_data)()
+    timings.add("complex total", time.perf_counter() - start)
+    return records
+
+
+def run_scenario(pdb_files, timings=None, reports=True):
+    timings = timings or Timings()
+    with tempfile.TemporaryDirectory() as output_path, instrumented(timings):
+        start = time.perf_counter()
+        for path in pdb_files:
+            analyze_complex(path, output_path, timings, reports)
+        elapsed = time.perf_counter() - start
+    return {"structures": len(pdb_files), "wall_s": round(elapsed, 3),
+            "structures_per_s": round(len(pdb_files) / elapsed, 3) if elapsed else None,
+            "functions": timings.summary()}
+
+
+##############################################################################################################################
+# Synthetic "one receptor, N poses" complexes
+
+def box_center(receptor):
+    """docking box centre from the receptor's <name>_conf.txt if there is one, else the receptor centroid."""
+    conf = os.path.splitext(receptor)[0] + "_conf.txt"
+    if os.path.exists(conf):
+        with open(conf) as f:
+            values = dict(line.replace(" ", "").strip().split("=", 1) for line in f if "=" in line)
+        if all(key in values for key in ("center_x", "center_y", "center_z")):
+            return np.array([float(values["center_x"]), float(values["center_y"]), float(values["center_z"])])
+    with open(receptor) as f:
+        coords = [(float(l[30:38]), float(l[38:46]), float(l[46:54])) for l in f if l.startswith("ATOM")]
+    return np.mean(coords, axis=0)
+
+
+def _random_rotation(rng):
+    q = rng.normal(size=4)
+    a, b, c, d = q / np.linalg.norm(q)
+    return np.array([[a * a + b * b - c * c - d * d, 2 * (b * c - a * d), 2 * (b * d + a * c)],
+                     [2 * (b * c + a * d), a * a - b * b + c * c - d * d, 2 * (c * d - a * b)],
+                     [2 * (b * d - a * c), 2 * (c * d + a * b), a * a - b * b - c * c + d * d]])
+
+
+def synthetic_poses(receptor, num_poses, directory, seed=0):
+    """write num_poses complexes of the receptor with ligand poses randomly placed around the box centre,
+    in the layout of the docking pipeline's complexes (protein ATOM records + ligand HETATM records)."""
+    rng = np.random.RandomState(seed)
+    center = box_center(receptor)
+    with open(receptor) as f:
+        protein_block = "".join(line for line in f if line.startswith("ATOM"))
+    ligands = []
+    for smiles in POSE_LIGANDS:
+        mol = pybel.readstring("smi", smiles)
+        mol.make3D()
+        lines = [line for line in mol.write("pdb").splitlines() if line.startswith(("ATOM", "HETATM"))]
+        coords = np.array([(float(l[30:38]), float(l[38:46]), float(l[46:54])) for l in lines])
+        ligands.append((lines, coords - coords.mean(axis=0)))
+
+    paths = []
+    for i in range(num_poses):
+        lines, coords = ligands[i % len(ligands)]
+        placed = coords @ _random_rotation(rng).T + center + rng.normal(scale=1.5, size=3)
+        hetatm = ["HETATM" + line[6:30] + "%8.3f%8.3f%8.3f" % tuple(xyz) + line[54:] for line, xyz in zip(lines, placed)]
+        path = os.path.join(directory, "pose%d.pdb" % (i + 1))
+        with open(path, "w") as f:
+            f.write(protein_block + "\n".join(hetatm) + "\nEND\n")
+        paths.append(path)
+    return paths
+
+
+##############################################################################################################################
+# Reporting
+
+def collect_pdb_files(paths):
+    pdb_files = []
+    for path in paths:
+        if os.path.isdir(path):
+            pdb_files += sorted(os.path.join(path, f) for f in os.listdir(path) if f.endswith(".pdb"))
+        elif os.path.exists(path):
+            pdb_files.append(path)
+    return pdb_files
+
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PLIP_DIR,
+                                capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = ""
+    return {"python": platform.python_version(), "platform": platform.platform(), "openbabel": pybel.ob.OBReleaseVersion(),
+            "commit": commit, "date": time.strftime("%Y-%m-%dT%H:%M:%S")}
+
+
+def format_results(results, baseline=None):
+    """one line per scenario and function, with the change of the mean against a baseline run if given."""
+    lines = ["%-22s %-38s %7s %11s %11s %11s %9s" % ("scenario", "function", "calls", "mean_ms", "median_ms", "p95_ms", "vs base")]
+    for scenario, result in results["scenarios"].items():
+        base = (baseline or {}).get("scenarios", {}).get(scenario, {}).get("functions", {})
+        for label, stats in sorted(result["functions"].items(), key=lambda item: -item[1]["total_s"]):
+            ratio = ""
+            if label in base and base[label]["mean_ms"]:
+                ratio = "%.2fx" % (stats["mean_ms"] / base[label]["mean_ms"])
+            lines.append("%-22s %-38s %7d %11.3f %11.3f %11.3f %9s" % (scenario, label, stats["calls"], stats["mean_ms"],
+                                                                     stats["median_ms"], stats["p95_ms"], ratio))
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the PLIP stages on a set of complexes and on one receptor with N poses.")
+    parser.add_argument("--pdb", nargs="*", default=[TEST_PDB_DIR],
+                        help="Complex PDB files or directories (default: test/pdb)")
+    parser.add_argument("--receptor", default=DEFAULT_RECEPTOR, help="Receptor PDB for the synthetic N poses scenario")
+    parser.add_argument("-n", "--poses", type=int, default=50, help="Number of synthetic poses (0 to skip)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the synthetic pose placement")
+    parser.add_argument("--no-reports", action="store_true", help="Only build the typed records, not the XML/TXT reports")
+    parser.add_argument("-o", "--output", default="plip_benchmark.json", help="JSON file for the results")
+    parser.add_argument("-b", "--baseline", help="Earlier results JSON to compare the mean times against")
+    args = parser.parse_args()
+
+    config.QUIET = True
+    results = {"environment": environment(), "scenarios": {}}
+    pdb_files = collect_pdb_files(args.pdb)
+    if pdb_files:
+        results["scenarios"]["complexes"] = run_scenario(pdb_files, reports=not args.no_reports)
+    if args.poses and os.path.exists(args.receptor):
+        with tempfile.TemporaryDirectory() as pose_dir:
+            poses = synthetic_poses(args.receptor, args.poses, pose_dir, args.seed)
+            results["scenarios"]["one_receptor_%d_poses" % args.poses] = run_scenario(poses, reports=not args.no_reports)
+    if not results["scenarios"]:
+        parser.error("no complexes found, pass --pdb and/or --receptor")
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print(format_results(results, baseline))
+    print("Results written to %s" % args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,11 @@ import pandas as pd
 import os
 import argparse
 
+from basic import logger
+from interaction_fingerprint import write_fingerprints
+
+logger = logger.get_logger()
+
 def get_hydrophobic(root):
     hydrophobic_interactions = []
     for interaction in root.iter('hydrophobic_interaction'):
@@ -270,39 +275,88 @@ def get_metal_complexes(root):
     df = pd.DataFrame(metal_complexes)
     return df
 
-def parse_xml_file(filepath):
-    """return processed dataframe from a xml file."""
+MANIFEST_FILE = "plip_manifest.csv"
+LIGAND_LONGNAMES = ("UNL", "UNK")
+
+
+def select_bindingsite(root, longnames=LIGAND_LONGNAMES):
+    """return the bindingsite element of the docked ligand, looked up by longname."""
+    bindingsites = {bs.findtext('identifiers/longname'): bs for bs in root.iter('bindingsite')}
+    for longname in longnames:
+        if longname in bindingsites:
+            return bindingsites[longname]
+    return root
+
+
+def parse_xml_file(filepath, name=None, longnames=LIGAND_LONGNAMES):
+    """return processed dataframe from a xml file.
+
+    The ligand name is taken from ``name`` (as recorded in the PLIP manifest) and falls
+    back to the name of the directory holding the report.
+    """
     # Parse the XML file
     print(filepath)
     tree = ET.parse(filepath)
-    root = tree.getroot()
-    for i in root.iter('bindingsite'):
-        if i.find('.//longname').text=='UNL':
-            print("Found UNL")
-            root = i
-        elif i.find('.//longname').text=='UNK':
-            print("Found UNK")
-            root = i
-
-    df_hydrophobic = get_hydrophobic(root)
-    df_hydrogen = get_hydrogen(root)
-    df_water_bridge = get_water_bridge(root)
-    df_salt_bridge = get_salt_bridge(root)
-    df_halogen = get_halogen(root)
-    df_pi_stacks = get_pi_stacks(root)
-    df_pi_cation_interactions = get_pi_cation_interactions(root)
-    df_halogen_bonds = get_halogen_bonds(root)
-    df_metal_complexes = get_metal_complexes(root)
+    root = select_bindingsite(tree.getroot(), longnames)
+
+    name = name if name is not None else os.path.basename(os.path.dirname(os.path.abspath(filepath)))
+    frames = {'hydrophobic': get_hydrophobic(root),
+              'hydrogen': get_hydrogen(root),
+              'water_bridge': get_water_bridge(root),
+              'salt_bridge': get_salt_bridge(root),
+              'halogen': get_halogen(root),
+              'pi_stacks': get_pi_stacks(root),
+              'pi_cation_interactions': get_pi_cation_interactions(root),
+              'halogen_bonds': get_halogen_bonds(root),
+              'metal_complexes': get_metal_complexes(root)}
+    return summarize_interactions(name, root.find('.//smiles').text, root.find('.//smiles_to_pdb').text, frames)
+
+
+def records_to_frames(record):
+    """return the per-interaction dataframes for a binding site record from StructureReport.records()."""
+    interactions = record['interactions']
+    halogen = pd.DataFrame(interactions['halogen_bonds'])
+    return {'hydrophobic': pd.DataFrame(interactions['hydrophobic_interactions']),
+            'hydrogen': pd.DataFrame(interactions['hydrogen_bonds']).rename(
+                columns={'dist_h-a': 'dist_ha', 'dist_d-a': 'dist_da'}),
+            'water_bridge': pd.DataFrame(interactions['water_bridges']),
+            'salt_bridge': pd.DataFrame(interactions['salt_bridges']),
+            'halogen': halogen,
+            'pi_stacks': pd.DataFrame(interactions['pi_stacks']),
+            'pi_cation_interactions': pd.DataFrame(interactions['pi_cation_interactions']),
+            'halogen_bonds': halogen,
+            'metal_complexes': pd.DataFrame(interactions['metal_complexes'])}
+
+
+def parse_records(records, name, longnames=LIGAND_LONGNAMES):
+    """return processed data for the docked ligand from in-memory binding site records."""
+    by_longname = {record['longname']: record for record in records}
+    record = next((by_longname[longname] for longname in longnames if longname in by_longname), None)
+    if record is None:
+        print(f"Warning: no binding site named {'/'.join(longnames)} for {name}")
+        return None
+    return summarize_interactions(name, record['smiles'], record['smiles_to_pdb'], records_to_frames(record))
+
+
+def summarize_interactions(name, smiles, smiles_to_pdb_map, frames):
+    """return one result row from the per-interaction dataframes of a binding site."""
+    df_hydrophobic = frames['hydrophobic']
+    df_hydrogen = frames['hydrogen']
+    df_water_bridge = frames['water_bridge']
+    df_salt_bridge = frames['salt_bridge']
+    df_halogen = frames['halogen']
+    df_pi_stacks = frames['pi_stacks']
+    df_pi_cation_interactions = frames['pi_cation_interactions']
+    df_halogen_bonds = frames['halogen_bonds']
+    df_metal_complexes = frames['metal_complexes']
 
     data = dict()
-    data['Name'] = filepath.split('/')[4]
-
-    smiles_to_pdb_map = root.find('.//smiles_to_pdb').text 
+    data['Name'] = name
     data['smiles_to_pdb_map'] = smiles_to_pdb_map
-    
+    data['SMILES'] = smiles
+
     all_rsnr = []
     atom_ids = []
-    data['SMILES'] = root.find('.//smiles').text
     if len(df_hydrophobic) != 0:
         data['num_hydrophobic_interactions'] = len(df_hydrophobic)
         data['rsnr_hydrophobic'] = df_hydrophobic['resnr'].values.tolist()
@@ -452,21 +506,69 @@ def parse_xml_file(filepath):
     return data
     
 
-def parse_all_files():
-    parser = argparse.ArgumentParser()
-    parser.add_argument("-d", "--dir", help="Root directory containing subdirectories of XML files", required=True)
-    args = parser.parse_args()
+def read_manifest(directory, manifest_path=None):
+    """return (name, report path) pairs listed in the PLIP manifest, in manifest order.
+
+    Without a manifest every report.xml below ``directory`` is used and named after its folder.
+    """
+    manifest_path = manifest_path or os.path.join(directory, MANIFEST_FILE)
+    if os.path.exists(manifest_path):
+        manifest = pd.read_csv(manifest_path, dtype=str)
+        return [(row['Name'], os.path.join(directory, row['output_dir'], "report.xml"))
+                for _, row in manifest.iterrows()]
+
+    reports = []
+    for root, dirs, files in os.walk(directory):
+        if "report.xml" in files:
+            reports.append((os.path.basename(root), os.path.join(root, "report.xml")))
+    return sorted(reports)
+
+
+def analyze_structures(directory, pdb_dir, manifest_path=None, xml=False, txt=False, pymol=False, pics=False,
+                       maxthreads=1):
+    """run PLIP in-process on every structure in the manifest and return one result row per ligand.
+
+    Interactions are taken straight from the typed binding site records; XML/TXT reports and PyMOL
+    output are only written when requested. Visualizations of all structures go through one
+    long-lived render pool when more than one thread is allowed. A structure that cannot be
+    analyzed is logged and skipped, so one bad complex does not lose the rest of the batch.
+    """
+    from basic import config
+    from plipcmd import process_pdb
+    from visualization.render_pool import RenderPool
+
+    config.XML, config.TXT, config.PYMOL, config.PICS = xml, txt, pymol, pics
+    config.MAXTHREADS = maxthreads
+    manifest = pd.read_csv(manifest_path or os.path.join(directory, MANIFEST_FILE), dtype=str)
+    render_pool = RenderPool(maxthreads) if (pymol or pics) and maxthreads > 1 else None
 
     result_list = []
-    for root, dirs, files in os.walk(args.dir):
-        for f in files:
-            if f == "report.xml":
-                xml_file = os.path.join(root, f)
-                data = parse_xml_file(xml_file)
+    try:
+        for _, entry in manifest.iterrows():
+            outpath = os.path.join(directory, entry['output_dir'])
+            config.OUTPATH = outpath.rstrip('/') + '/'
+            print(entry['pdb_file'])
+            try:
+                streport = process_pdb(os.path.join(pdb_dir, entry['pdb_file']), outpath, render_pool=render_pool)
+                data = parse_records(streport.records(), entry['Name'])
+            except (Exception, SystemExit) as e:  # PLIP exits on structures it cannot read
+                logger.warning(f"skipping {entry['Name']}: PLIP analysis of {entry['pdb_file']} failed ({e!r})")
+                continue
+            if data is not None:
                 result_list.append(data)
-    
+    finally:
+        if render_pool is not None:
+            render_pool.close()
+            render_pool.write_timings(os.path.join(directory, "render_timings.tsv"))
+    return result_list
+
+
+def write_results(result_list, directory):
+    """write plip_result.csv, the per-interaction csv files and the interaction fingerprints."""
     df_result = pd.DataFrame(result_list)
-    df_result.to_csv(os.path.join(args.dir, "plip_result.csv"), index=False)
+    df_result.to_csv(os.path.join(directory, "plip_result.csv"), index=False)
+    if len(df_result):
+        write_fingerprints(df_result, directory)
 
     df = df_result
     df = df.loc[:, ~df.columns.str.contains('idx')]
@@ -483,8 +585,39 @@ def parse_all_files():
     for pattern, filename in patterns.items():
         selected_columns = df.loc[:, df.columns.str.contains(pattern)]
         selected_columns_with_pdb = pd.concat([df[['Name']], selected_columns], axis=1)
-        selected_columns_with_pdb.to_csv(os.path.join(args.dir, filename), index=False)
+        selected_columns_with_pdb.to_csv(os.path.join(directory, filename), index=False)
+
 
+def parse_all_files():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-d", "--dir", help="Root directory containing subdirectories of XML files", required=True)
+    parser.add_argument("-m", "--manifest", help="CSV manifest mapping ligand names to output subdirectories "
+                                                 "(defaults to %s in --dir)" % MANIFEST_FILE)
+    parser.add_argument("-f", "--pdb_dir", help="Run PLIP in-process on the manifest's PDB files in this directory "
+                                                "instead of reading existing XML reports")
+    parser.add_argument("-x", "--xml", action="store_true", help="With --pdb_dir, also write XML reports")
+    parser.add_argument("-t", "--txt", action="store_true", help="With --pdb_dir, also write TXT reports")
+    parser.add_argument("-y", "--pymol", action="store_true", help="With --pdb_dir, also write PyMOL sessions")
+    parser.add_argument("-p", "--pics", action="store_true", help="With --pdb_dir, also write pictures")
+    parser.add_argument("--maxthreads", type=int, default=int(os.environ.get("AGANDOCK_WORKERS") or os.cpu_count()),
+                        help="With --pdb_dir, number of PyMOL render workers shared by all structures "
+                             "(default: the job's CPU allocation, otherwise every core)")
+    args = parser.parse_args()
+
+    if args.pdb_dir:
+        result_list = analyze_structures(args.dir, args.pdb_dir, args.manifest,
+                                         xml=args.xml, txt=args.txt, pymol=args.pymol, pics=args.pics,
+                                         maxthreads=args.maxthreads)
+    else:
+        result_list = []
+        for name, xml_file in read_manifest(args.dir, args.manifest):
+            if not os.path.exists(xml_file):
+                print(f"Warning: no PLIP report for {name} at {xml_file}")
+                continue
+            data = parse_xml_file(xml_file, name=name)
+            result_list.append(data)
+
+    write_results(result_list, args.dir)
 
 
 if __name__ == "__main__":
@@ -19,9 +19,9 @@ from basic import config, logger
 logger = logger.get_logger()
 
 from basic.config import __version__
-from basic.parallel import parallel_fn
 from basic.remote import VisualizerData
 from exchange.report import StructureReport
+from visualization.render_pool import RenderPool
 from exchange.webservices import fetch_pdb
 from structure.preparation import create_folder_if_not_exists, extract_pdbid
 from structure.preparation import tilde_expansion, PDBComplex
@@ -50,8 +50,9 @@ def residue_list(input_string):
             result.append(int(part))
     return result
 
-def process_pdb(pdbfile, outpath, as_string=False, outputprefix='report'):
-    """Analysis of a single PDB file with optional chain filtering."""
+def process_pdb(pdbfile, outpath, as_string=False, outputprefix='report', render_pool=None):
+    """Analysis of a single PDB file with optional chain filtering.
+    Visualizations are queued on render_pool if given, otherwise they are rendered before returning."""
     if not as_string:
         pdb_file_name = pdbfile.split('/')[-1]
         startmessage = f'starting analysis of {pdb_file_name}'
@@ -69,21 +70,22 @@ def process_pdb(pdbfile, outpath, as_string=False, outputprefix='report'):
     # Generate the report files
     streport = StructureReport(mol, outputprefix=outputprefix)
 
-    config.MAXTHREADS = min(config.MAXTHREADS, len(mol.interaction_sets))
-
     ######################################
     # PyMOL Visualization (parallelized) #
     ######################################
 
     if config.PYMOL or config.PICS:
-        from visualization.visualize import visualize_in_pymol
         complexes = [VisualizerData(mol, site) for site in sorted(mol.interaction_sets)
                      if not len(mol.interaction_sets[site].interacting_res) == 0]
-        if config.MAXTHREADS > 1:
-            logger.info(f'generating visualizations in parallel on {config.MAXTHREADS} cores')
-            parfn = parallel_fn(visualize_in_pymol)
-            parfn(complexes, processes=config.MAXTHREADS)
+        processes = min(config.MAXTHREADS, len(complexes))
+        if render_pool is not None:
+            render_pool.submit(complexes)
+        elif processes > 1:
+            logger.info(f'generating visualizations in parallel on {processes} cores')
+            with RenderPool(processes) as pool:
+                pool.submit(complexes)
         else:
+            from visualization.visualize import visualize_in_pymol
             [visualize_in_pymol(plcomplex) for plcomplex in complexes]
 
     if config.XML:  # Generate report in xml format
@@ -92,6 +94,8 @@ def process_pdb(pdbfile, outpath, as_string=False, outputprefix='report'):
     if config.TXT:  # Generate report in txt (rst) format
         streport.write_txt(as_string=config.STDOUT)
 
+    return streport
+
 
 def download_structure(inputpdbid):
     """Given a PDB ID, downloads the corresponding PDB structure.
@@ -135,38 +139,49 @@ def run_analysis(inputstructs, inputpdbids, chains=None):
     logger.info(f'brought to you by: {config.__maintainer__}')
     logger.info(f'please cite: {config.__citation_information__}')
     output_prefix = config.OUTPUTFILENAME
+    num_inputs = len(inputstructs) if inputstructs is not None else len(inputpdbids)
+    # One long-lived pool renders the binding sites of all structures
+    render_pool = None
+    if (config.PYMOL or config.PICS) and num_inputs > 1 and config.MAXTHREADS > 1:
+        render_pool = RenderPool(config.MAXTHREADS)
 
-    if inputstructs is not None:  # Process PDB file(s)
-        num_structures = len(inputstructs)  # @question: how can it become more than one file? The tilde_expansion function does not consider this case.
-        inputstructs = remove_duplicates(inputstructs)
-        read_from_stdin = False
-        for inputstruct in inputstructs:
-            if inputstruct == '-':  # @expl: when user gives '-' as input, pdb file is read from stdin
-                inputstruct = sys.stdin.read()
-                read_from_stdin = True
-                if config.RAWSTRING:
-                    if sys.version_info < (3,):
-                        inputstruct = bytes(inputstruct).decode('unicode_escape')  # @expl: in Python2, the bytes object is just a string.
-                    else:
-                        inputstruct = bytes(inputstruct, 'utf8').decode('unicode_escape')
-            else:
-                if os.path.getsize(inputstruct) == 0:
-                    logger.error('empty PDB file')
-                    sys.exit(1)
-                if num_structures > 1:
-                    basename = inputstruct.split('.')[-2].split('/')[-1]
-                    config.OUTPATH = '/'.join([config.BASEPATH, basename])
+    try:
+        if inputstructs is not None:  # Process PDB file(s)
+            num_structures = len(inputstructs)  # @question: how can it become more than one file? The tilde_expansion function does not consider this case.
+            inputstructs = remove_duplicates(inputstructs)
+            read_from_stdin = False
+            for inputstruct in inputstructs:
+                if inputstruct == '-':  # @expl: when user gives '-' as input, pdb file is read from stdin
+                    inputstruct = sys.stdin.read()
+                    read_from_stdin = True
+                    if config.RAWSTRING:
+                        if sys.version_info < (3,):
+                            inputstruct = bytes(inputstruct).decode('unicode_escape')  # @expl: in Python2, the bytes object is just a string.
+                        else:
+                            inputstruct = bytes(inputstruct, 'utf8').decode('unicode_escape')
+                else:
+                    if os.path.getsize(inputstruct) == 0:
+                        logger.error('empty PDB file')
+                        sys.exit(1)
+                    if num_structures > 1:
+                        basename = inputstruct.split('.')[-2].split('/')[-1]
+                        config.OUTPATH = '/'.join([config.BASEPATH, basename])
+                        output_prefix = 'report'
+                process_pdb(inputstruct, config.OUTPATH, as_string=read_from_stdin, outputprefix=output_prefix,
+                            render_pool=render_pool)
+        else:  # Try to fetch the current PDB structure(s) directly from the RCBS server
+            num_pdbids = len(inputpdbids)
+            inputpdbids = remove_duplicates(inputpdbids)
+            for inputpdbid in inputpdbids:
+                pdbpath, pdbid = download_structure(inputpdbid)
+                if num_pdbids > 1:
+                    config.OUTPATH = '/'.join([config.BASEPATH, pdbid[1:3].upper(), pdbid.upper()])
                     output_prefix = 'report'
-            process_pdb(inputstruct, config.OUTPATH, as_string=read_from_stdin, outputprefix=output_prefix)
-    else:  # Try to fetch the current PDB structure(s) directly from the RCBS server
-        num_pdbids = len(inputpdbids)
-        inputpdbids = remove_duplicates(inputpdbids)
-        for inputpdbid in inputpdbids:
-            pdbpath, pdbid = download_structure(inputpdbid)
-            if num_pdbids > 1:
-                config.OUTPATH = '/'.join([config.BASEPATH, pdbid[1:3].upper(), pdbid.upper()])
-                output_prefix = 'report'
-            process_pdb(pdbpath, config.OUTPATH, outputprefix=output_prefix)
+                process_pdb(pdbpath, config.OUTPATH, outputprefix=output_prefix, render_pool=render_pool)
+    finally:
+        # Also on errors (sys.exit on unreadable input included), so no render worker is left behind
+        if render_pool is not None:
+            render_pool.close()
 
     if (pdbid is not None or inputstructs is not None) and config.BASEPATH is not None:
         if config.BASEPATH in ['.', './']:
@@ -0,0 +1,31 @@
+# coding=utf-8
+"""
+Protein-Ligand Interaction Profiler - Analyze and visualize protein-ligand interactions in PDB files.
+test_benchmark.py - Checks that the PLIP performance suite times every stage it reports.
+"""
+
+import os
+import tempfile
+import unittest
+
+from plip.plip_benchmark import DEFAULT_RECEPTOR, DETECTORS, run_scenario, synthetic_poses, format_results
+
+
+@unittest.skipUnless(os.path.exists(DEFAULT_RECEPTOR), 'bundled minD_APO_C1 receptor not available')
+class BenchmarkTest(unittest.TestCase):
+
+    def test_one_receptor_n_poses(self):
+        with tempfile.TemporaryDirectory() as pose_dir:
+            poses = synthetic_poses(DEFAULT_RECEPTOR, 3, pose_dir, seed=1)
+            self.assertEqual(sorted(os.listdir(pose_dir)), ['pose1.pdb', 'pose2.pdb', 'pose3.pdb'])
+            result = run_scenario(poses)
+
+        self.assertEqual(result['structures'], 3)
+        functions = result['functions']
+        for label in ['PDBParser.parse_pdb', 'LigandFinder.getligs', 'PDBComplex.characterize_complex',
+                      'StructureReport.records', 'StructureReport.get_bindingsite_data', 'complex total']:
+            self.assertIn(label, functions)
+        for name in DETECTORS:
+            self.assertGreater(functions['detection.%s' % name]['calls'], 0)
+        self.assertEqual(functions['PDBParser.parse_pdb']['calls'], 3)
+        self.assertIn('vs base', format_results({'scenarios': {'poses': result}}))
@@ -0,0 +1,183 @@
+# coding=utf-8
+"""
+Protein-Ligand Interaction Profiler - Analyze and visualize protein-ligand interactions in PDB files.
+test_post_process.py - Unit Tests for the AGANDOCK PLIP post-processor.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import pandas as pd
+
+from plip.exchange.report import BindingSiteReport
+from plip.plip_post_process import analyze_structures, parse_xml_file, parse_records, read_manifest, MANIFEST_FILE
+from plip.interaction_fingerprint import InteractionFingerprints, load_fingerprints
+
+
+class PostProcessTest(unittest.TestCase):
+    """Checks that ligand identity comes from the manifest rather than the report path"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.report = os.path.abspath('./xml/1vsn.report.xml')
+        for ligand in ['lig_b', 'lig_a']:
+            os.makedirs(os.path.join(self.tmpdir, 'deeply', 'nested', ligand))
+            shutil.copy(self.report, os.path.join(self.tmpdir, 'deeply', 'nested', ligand, 'report.xml'))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_name_from_argument(self):
+        """The name passed by the caller is used verbatim."""
+        data = parse_xml_file(self.report, name='compound_42', longnames=('NFT',))
+        self.assertEqual(data['Name'], 'compound_42')
+        self.assertEqual(data['num_hydrogen_bonding_interactions'], 6)
+
+    def test_name_from_report_folder(self):
+        """Without a name, the folder holding the report names the ligand at any depth."""
+        report = os.path.join(self.tmpdir, 'deeply', 'nested', 'lig_a', 'report.xml')
+        data = parse_xml_file(report, longnames=('NFT',))
+        self.assertEqual(data['Name'], 'lig_a')
+
+    def test_manifest_order(self):
+        """Manifest entries are returned in manifest order, independent of completion order."""
+        pd.DataFrame({'Name': ['lig_b', 'lig_a'],
+                      'pdb_file': ['lig_b.pdb', 'lig_a.pdb'],
+                      'output_dir': ['deeply/nested/lig_b', 'deeply/nested/lig_a']}
+                     ).to_csv(os.path.join(self.tmpdir, MANIFEST_FILE), index=False)
+        entries = read_manifest(self.tmpdir)
+        self.assertEqual([name for name, _ in entries], ['lig_b', 'lig_a'])
+        self.assertTrue(all(os.path.exists(path) for _, path in entries))
+
+    def test_walk_without_manifest(self):
+        """Without a manifest, reports are discovered and named after their folder."""
+        entries = read_manifest(self.tmpdir)
+        self.assertEqual([name for name, _ in entries], ['lig_a', 'lig_b'])
+
+
+class RecordsTest(unittest.TestCase):
+    """Checks the typed record path that bypasses the XML reports"""
+
+    def setUp(self):
+        self.hbond = BindingSiteReport.typed_contact(
+            ('RESNR', 'RESTYPE', 'DIST_D-A', 'DONORIDX', 'ACCEPTORIDX', 'LIGCOO'),
+            (56, 'ASN', '3.03', 1947, 812, (1.0, 2.0, 3.0)))
+        self.saltbridge = BindingSiteReport.typed_contact(
+            ('RESNR', 'RESTYPE', 'PROT_IDX_LIST', 'DIST', 'LIG_IDX_LIST'),
+            (167, 'ARG', '756,758,759', '4.20', '1947,1949'))
+        interactions = {key: [] for key in ['hydrophobic_interactions', 'hydrogen_bonds', 'water_bridges',
+                                            'salt_bridges', 'pi_stacks', 'pi_cation_interactions',
+                                            'halogen_bonds', 'metal_complexes']}
+        interactions['hydrogen_bonds'].append(self.hbond)
+        interactions['salt_bridges'].append(self.saltbridge)
+        self.records = [{'longname': 'HOH', 'smiles': 'O', 'smiles_to_pdb': '', 'interactions': {}},
+                        {'longname': 'UNL', 'smiles': 'CCO', 'smiles_to_pdb': '1:1947', 'interactions': interactions}]
+
+    def test_typed_contact(self):
+        """Formatted numbers and atom lists are converted back to native types."""
+        self.assertEqual(self.hbond['dist_d-a'], 3.03)
+        self.assertEqual(self.hbond['ligcoo'], (1.0, 2.0, 3.0))
+        self.assertEqual(self.saltbridge['prot_idx_list'], [756, 758, 759])
+        self.assertEqual(self.saltbridge['dist'], 4.2)
+
+    def test_parse_records(self):
+        """The docked ligand's site is summarized like its XML counterpart."""
+        data = parse_records(self.records, 'lig_a')
+        self.assertEqual(data['Name'], 'lig_a')
+        self.assertEqual(data['SMILES'], 'CCO')
+        self.assertEqual(data['num_hydrogen_bonding_interactions'], 1)
+        self.assertEqual(data['moderate_hydrogen_bonds'], 1)
+        self.assertEqual(data['num_salt_bridges'], 1)
+        self.assertEqual(data['lig_idx_list_salt_bridge'], [1947, 1949])
+        self.assertEqual(data['all_rsnr'], [56, 167])
+
+    def test_missing_ligand_site(self):
+        """Complexes without a docked ligand site yield no row."""
+        self.assertIsNone(parse_records(self.records[:1], 'lig_a'))
+
+
+
+class AnalyzeStructuresTest(unittest.TestCase):
+    """Checks that one structure PLIP cannot analyze does not abort the batch"""
+
+    COMPLEX = ("ATOM      1  N   VAL A  66       4.770   1.030  11.240  1.00  0.00           N\n"
+               "ATOM      2  CA  VAL A  66       3.790   0.550  10.210  1.00  0.00           C\n"
+               "ATOM      3  CB  VAL A  66       2.410   0.380  10.890  1.00  0.00           C\n"
+               "ATOM      4  CG1 VAL A  66       1.400  -0.220   9.950  1.00  0.00           C\n"
+               "ATOM      5  CG2 VAL A  66       2.520  -0.540  12.090  1.00  0.00           C\n"
+               "ATOM      6  C   VAL A  66       3.700   1.600   9.080  1.00  0.00           C\n"
+               "ATOM      7  O   VAL A  66       3.420   2.720   9.410  1.00  0.00           O\n"
+               "HETATM    8  C1  UNL L   1      -2.100  -0.220   9.950  1.00  0.00           C\n"
+               "HETATM    9  C2  UNL L   1      -3.500  -0.220   9.950  1.00  0.00           C\n"
+               "HETATM   10  O3  UNL L   1      -4.200   0.980   9.950  1.00  0.00           O\n"
+               "END\n")
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        with open(os.path.join(self.tmpdir, 'broken.pdb'), 'w') as f:
+            f.write('not a structure\n')
+        with open(os.path.join(self.tmpdir, 'complex.pdb'), 'w') as f:
+            f.write(self.COMPLEX)
+        pd.DataFrame({'Name': ['lig_broken', 'lig_missing', 'lig_ok'],
+                      'pdb_file': ['broken.pdb', 'missing.pdb', 'complex.pdb'],
+                      'output_dir': ['lig_broken', 'lig_missing', 'lig_ok']}
+                     ).to_csv(os.path.join(self.tmpdir, MANIFEST_FILE), index=False)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_broken_structure_is_skipped(self):
+        """Unreadable and missing structures are logged by name and the remaining entries are analyzed."""
+        with self.assertLogs(level='WARNING') as logs:
+            results = analyze_structures(self.tmpdir, self.tmpdir)
+        self.assertEqual([data['Name'] for data in results], ['lig_ok'])
+        self.assertTrue(any('lig_broken' in line for line in logs.output))
+        self.assertTrue(any('lig_missing' in line for line in logs.output))
+
+
+class FingerprintTest(unittest.TestCase):
+    """Checks the bit-packed interaction fingerprints and their Tanimoto search"""
+
+    def setUp(self):
+        self.results = pd.DataFrame({
+            'Name': ['ref', 'same', 'half', 'none'],
+            'rsnr_hydrophobic': ['[10, 12]', '[10, 12]', '[10]', '[]'],
+            'rsnr_hydrogen': ['[12]', '[12]', '[40]', '[]'],
+        })
+
+    def test_bits(self):
+        fingerprints = InteractionFingerprints.from_results(self.results)
+        self.assertEqual(len(fingerprints.bits), 4)
+        self.assertEqual(fingerprints.interactions('ref'), [(10, 'hydrophobic'), (12, 'hydrogen'), (12, 'hydrophobic')])
+        self.assertEqual(fingerprints.counts.tolist(), [3, 3, 2, 0])
+
+    def test_halogen_bond_sets_one_bit(self):
+        """plip_result.csv lists every halogen bond under both rsnr_halogen and rsnr_halogen_bonds"""
+        results = self.results.assign(rsnr_halogen=['[55]', '[]', '[]', '[]'],
+                                      rsnr_halogen_bonds=['[55]', '[]', '[]', '[]'])
+        fingerprints = InteractionFingerprints.from_results(results)
+        self.assertEqual(fingerprints.counts.tolist(), [4, 3, 2, 0])
+        self.assertIn((55, 'halogen'), fingerprints.interactions('ref'))
+        self.assertEqual(fingerprints.search('ref', top_k=1)['Tanimoto'].tolist(), [0.75])
+
+    def test_search(self):
+        hits = InteractionFingerprints.from_results(self.results).search('ref', top_k=3)
+        self.assertEqual(hits['Name'].tolist(), ['same', 'half', 'none'])
+        self.assertEqual(hits['Tanimoto'].tolist(), [1.0, 0.25, 0.0])
+
+    def test_roundtrip(self):
+        tmpdir = tempfile.mkdtemp()
+        try:
+            self.results.to_csv(os.path.join(tmpdir, 'plip_result.csv'), index=False)
+            fingerprints = load_fingerprints(tmpdir)
+            reloaded = InteractionFingerprints.load(os.path.join(tmpdir, 'interaction_fingerprints.npz'))
+            self.assertEqual(reloaded.bits, fingerprints.bits)
+            self.assertEqual(reloaded.packed.tolist(), fingerprints.packed.tolist())
+        finally:
+            shutil.rmtree(tmpdir)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+# coding=utf-8
+"""
+Protein-Ligand Interaction Profiler - Analyze and visualize protein-ligand interactions in PDB files.
+test_render_pool.py - Checks that a failed PyMOL render does not lose the rest of a batch.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from collections import namedtuple
+from unittest import mock
+
+import pandas as pd
+
+from visualization import render_pool
+from visualization.render_pool import RenderPool, render_timing
+from plip.plip_post_process import analyze_structures, MANIFEST_FILE
+import test_post_process
+
+site = namedtuple('site', 'pdbid uid outpath')
+
+
+def start_without_pymol():
+    pass
+
+
+def render_all_but_bad(job):
+    plcomplex, settings = job
+    if plcomplex.uid == 'bad':
+        raise RuntimeError('PyMOL crashed')
+    return render_timing(plcomplex.pdbid, plcomplex.uid, plcomplex.outpath, 0.1)
+
+
+def render_nothing(job):
+    raise RuntimeError('PyMOL crashed')
+
+
+@mock.patch.object(render_pool, 'start_render_worker', start_without_pymol)
+class RenderPoolTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    @mock.patch.object(render_pool, 'render_job', render_all_but_bad)
+    def test_failed_render_is_counted(self):
+        pool = RenderPool(2)
+        pool.submit([site('1abc', 'good', 'a'), site('1abc', 'bad', 'b'), site('1abc', 'fine', 'c')])
+        with self.assertLogs(level='WARNING') as logs:
+            pool.close()
+        self.assertEqual(pool.failures, 1)
+        self.assertEqual([t.uid for t in pool.timings], ['good', 'fine'])
+        self.assertTrue(any('bad' in line for line in logs.output))
+
+        path = os.path.join(self.tmpdir, 'render_timings.tsv')
+        pool.write_timings(path)
+        with open(path) as f:
+            self.assertEqual(len(f.readlines()), 3)
+
+    @mock.patch.object(render_pool, 'render_job', render_nothing)
+    def test_analyzed_structures_survive_failed_renders(self):
+        with open(os.path.join(self.tmpdir, 'complex.pdb'), 'w') as f:
+            f.write(test_post_process.AnalyzeStructuresTest.COMPLEX)
+        pd.DataFrame({'Name': ['lig_ok'], 'pdb_file': ['complex.pdb'], 'output_dir': ['lig_ok']}
+                     ).to_csv(os.path.join(self.tmpdir, MANIFEST_FILE), index=False)
+        with self.assertLogs(level='WARNING') as logs:
+            results = analyze_structures(self.tmpdir, self.tmpdir, pics=True, maxthreads=2)
+        self.assertEqual([data['Name'] for data in results], ['lig_ok'])
+        self.assertTrue(any('could not render' in line for line in logs.output))
+        self.assertTrue(os.path.exists(os.path.join(self.tmpdir, 'render_timings.tsv')))
@@ -0,0 +1,103 @@
+import multiprocessing
+import time
+from collections import namedtuple
+
+from basic import config, logger
+
+logger = logger.get_logger()
+
+# Global settings read by visualize_in_pymol, shipped with every job so that long-lived workers
+# render with the settings that were active when the job was submitted.
+RENDER_SETTINGS = ('PICS', 'PYMOL', 'VERBOSE', 'SILENT', 'PEPTIDES', 'INTRA', 'CHAINS', 'RESIDUES',
+                   'DNARECEPTOR', 'MODEL')
+
+render_timing = namedtuple('render_timing', 'pdbid uid outpath seconds')
+
+
+def start_render_worker():
+    """Starts PyMOL once per worker process, later jobs only reinitialize the session."""
+    from basic.supplemental import start_pymol
+    start_pymol(run=True, options='-pcq', quiet=not config.VERBOSE and not config.SILENT)
+
+
+def render_job(job):
+    """Renders one binding site and returns the time it took."""
+    plcomplex, settings = job
+    for name, value in settings.items():
+        setattr(config, name, value)
+    from visualization.visualize import visualize_in_pymol
+    start = time.perf_counter()
+    visualize_in_pymol(plcomplex)
+    return render_timing(plcomplex.pdbid, plcomplex.uid, plcomplex.outpath, time.perf_counter() - start)
+
+
+class RenderPool:
+    """Long-lived pool of PyMOL workers accepting VisualizerData jobs from any number of complexes.
+
+    Jobs are rendered asynchronously while the caller continues with the next structure; wait() collects
+    the per-image latencies of everything submitted so far. A binding site that fails to render is logged
+    and counted in `failures`, it does not fail the other jobs.
+    """
+
+    def __init__(self, processes=None):
+        self.processes = max(1, processes or multiprocessing.cpu_count())
+        self._pool = multiprocessing.Pool(self.processes, initializer=start_render_worker)
+        self._pending = []
+        self.timings = []
+        self.failures = 0
+
+    def submit(self, complexes):
+        """Queues VisualizerData objects for rendering."""
+        settings = {name: getattr(config, name) for name in RENDER_SETTINGS}
+        for plcomplex in complexes:
+            job = self._pool.apply_async(render_job, ((plcomplex, settings),))
+            self._pending.append((plcomplex.pdbid, plcomplex.uid, job))
+
+    def wait(self):
+        """Blocks until all submitted jobs are rendered and returns the timings of those that succeeded."""
+        pending, self._pending = self._pending, []
+        timings = []
+        for pdbid, uid, job in pending:
+            try:
+                timings.append(job.get())
+            except Exception as e:
+                logger.warning(f'could not render binding site {uid} of {pdbid} ({e!r})')
+                self.failures += 1
+        self.timings.extend(timings)
+        return timings
+
+    def close(self):
+        """Waits for outstanding jobs and shuts the workers down."""
+        try:
+            self.wait()
+        finally:
+            self._pool.close()
+            self._pool.join()
+        self.log_summary()
+
+    def log_summary(self):
+        if self.failures:
+            logger.warning(f'{self.failures} visualizations failed to render')
+        if len(self.timings) == 0:
+            return
+        seconds = sorted(t.seconds for t in self.timings)
+        logger.info(f'rendered {len(seconds)} visualizations on {self.processes} workers, '
+                    f'{sum(seconds) / len(seconds):.2f}s mean / {seconds[len(seconds) // 2]:.2f}s median / '
+                    f'{seconds[-1]:.2f}s max per image')
+
+    def write_timings(self, path):
+        """Writes per-image latencies as tab-separated values."""
+        with open(path, 'w') as f:
+            f.write('pdbid\tuid\toutpath\tseconds\n')
+            for t in self.timings:
+                f.write('%s\t%s\t%s\t%.3f\n' % (t.pdbid, t.uid, t.outpath, t.seconds))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None:
+            self._pool.terminate()
+            self._pool.join()
+        else:
+            self.close()
@@ -103,14 +103,14 @@ def visualize_in_pymol(plcomplex):
     if config.PEPTIDES or config.CHAINS:
         filename = "%s_PeptideChain%s" % (pdbid.upper(), plcomplex.chain)
         if config.PYMOL:
-            vis.save_session(config.OUTPATH, override=filename)
+            vis.save_session(plcomplex.outpath, override=filename)
     elif config.INTRA is not None:
         filename = "%s_IntraChain%s" % (pdbid.upper(), plcomplex.chain)
         if config.PYMOL:
-            vis.save_session(config.OUTPATH, override=filename)
+            vis.save_session(plcomplex.outpath, override=filename)
     else:
         filename = '%s_%s' % (pdbid.upper(), "_".join([hetid, plcomplex.chain, plcomplex.position]))
         if config.PYMOL:
-            vis.save_session(config.OUTPATH)
+            vis.save_session(plcomplex.outpath)
     if config.PICS:
-        vis.save_picture(config.OUTPATH, filename)
+        vis.save_picture(plcomplex.outpath, filename)
@@ -0,0 +1,180 @@
+import os
+import csv
+import json
+import threading
+import numpy as np
+
+from rdkit import Chem
+
+try:
+    from scipy.spatial import cKDTree
+    has_scipy = True
+except ImportError:
+    cKDTree, has_scipy = None, False
+
+from agandock_cli.scripts.coordinate_store import PoseCoordinates
+
+
+SITE_CUTOFF = 6.0            # Å around the docked poses kept at full atomic detail
+RECEPTOR_VIEW_FILE = "receptor_view.pdb"
+GRID_SPACING = 1.0           # Å, docked pose atoms are snapped to this grid before the distance search
+CHUNK_SIZE = 256             # receptor atoms per block of the distance search without scipy
+
+_cache_lock = threading.Lock()
+_payload_cache = {}
+
+
+
+##############################################################################################################################
+""" Trimmed receptor for the 3D viewer """
+
+def _stat_signature(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def read_docking_box(folder):
+    """Return (center, size) of the docking box from the Uni-Dock config saved in an experiment folder."""
+    keys = ("center_x", "center_y", "center_z", "size_x", "size_y", "size_z")
+    for file_name in sorted(os.listdir(folder)):
+        if not file_name.endswith(".txt"):
+            continue
+        values = {}
+        with open(os.path.join(folder, file_name), "r") as f:
+            for line in f:
+                key, _, value = line.partition("=")
+                if key.strip() in keys:
+                    try:
+                        values[key.strip()] = float(value)
+                    except ValueError:
+                        pass
+        if len(values) == len(keys):
+            return np.array([values[k] for k in keys[:3]]), np.array([values[k] for k in keys[3:]])
+    return None
+
+
+def pose_coordinates(sdf_paths):
+    """Heavy-atom coordinates of all docked poses, snapped to GRID_SPACING and deduplicated."""
+    points = []
+    for path in sdf_paths:
+        for mol in Chem.SDMolSupplier(path, sanitize=False, removeHs=False):
+            if mol is None or mol.GetNumConformers() == 0:
+                continue
+            heavy = [atom.GetIdx() for atom in mol.GetAtoms() if atom.GetAtomicNum() > 1]
+            points.append(mol.GetConformer().GetPositions()[heavy])
+    if not points:
+        return np.empty((0, 3))
+    return np.unique(np.round(np.concatenate(points) / GRID_SPACING), axis=0) * GRID_SPACING
+
+
+def stored_pose_coordinates(folder, manifest):
+    """Heavy-atom coordinates of the PLIP ligands from the pose coordinate store, None if it was not built."""
+    try:
+        store = PoseCoordinates.load(folder)
+        with open(manifest, "r") as f:
+            names = [row["Name"] for row in csv.DictReader(f)]
+    except (OSError, KeyError):
+        return None
+    coords, _ = store.select(names, heavy_only=True)
+    if len(coords) == 0:
+        return None
+    return np.unique(np.round(coords.astype(float) / GRID_SPACING), axis=0) * GRID_SPACING
+
+
+def _parse_atoms(pdb_lines):
+    """Residue keys and coordinates of the ATOM/HETATM records."""
+    atom_lines = [line for line in pdb_lines if line.startswith(("ATOM", "HETATM"))]
+    residues = [(line[21], line[22:27]) for line in atom_lines]
+    coords = np.array([[float(line[30:38]), float(line[38:46]), float(line[46:54])] for line in atom_lines])
+    return atom_lines, residues, coords.reshape(-1, 3)
+
+
+def _near_points(coords, points, cutoff):
+    near = np.zeros(len(coords), dtype=bool)
+    if len(points) == 0:
+        return near
+    cutoff = cutoff + GRID_SPACING * np.sqrt(3) / 2  # allow for snapping to the grid
+    if has_scipy:
+        distances, _ = cKDTree(points).query(coords, distance_upper_bound=cutoff)
+        return np.isfinite(distances)
+    # One CHUNK_SIZE x len(points) float32 block per axis instead of a (chunk, points, 3) float64 temporary
+    points = points.astype(np.float32)
+    for start in range(0, len(coords), CHUNK_SIZE):
+        chunk = coords[start:start + CHUNK_SIZE].astype(np.float32)
+        dist_sq = np.zeros((len(chunk), len(points)), dtype=np.float32)
+        for axis in range(3):
+            dist_sq += (chunk[:, None, axis] - points[None, :, axis]) ** 2
+        near[start:start + CHUNK_SIZE] = (dist_sq <= cutoff ** 2).any(axis=1)
+    return near
+
+
+def _near_box(coords, box, cutoff):
+    center, size = box
+    outside = np.maximum(np.abs(coords - center) - size / 2, 0)
+    return (outside ** 2).sum(axis=1) <= cutoff ** 2
+
+
+def trim_receptor(pdb_text, points=None, box=None, cutoff=SITE_CUTOFF):
+    """
+    Keep every atom of the residues with an atom within `cutoff` Å of the docked poses (or of the
+    docking box when no poses are given) and only the CA atom of all other residues.
+    """
+    atom_lines, residues, coords = _parse_atoms(pdb_text.splitlines())
+    if points is not None and len(points):
+        near = _near_points(coords, points, cutoff)
+    elif box is not None:
+        near = _near_box(coords, box, cutoff)
+    else:
+        return pdb_text
+    site = {residue for residue, is_near in zip(residues, near) if is_near}
+    kept = [line for line, residue in zip(atom_lines, residues)
+            if residue in site or line[12:16].strip() == "CA"]
+    return "\n".join(kept) + "\nEND\n"
+
+
+def load_receptor_payload(receptor_pdb_path, pose_dir=None, cutoff=SITE_CUTOFF):
+    """
+    Return the trimmed receptor of an experiment, built once from the receptor and the docked poses
+    (the SDF files below pose_dir) and reused for every ligand. It is cached in-process and stored as
+    receptor_view.pdb in the experiment folder, and rebuilt when the receptor or the PLIP run changes.
+    """
+    folder = os.path.dirname(os.path.abspath(receptor_pdb_path))
+    manifest = os.path.join(folder, "output_plip_files", "plip_manifest.csv")
+    signature = json.dumps({"receptor": _stat_signature(receptor_pdb_path), "poses": _stat_signature(manifest),
+                            "cutoff": cutoff})
+    with _cache_lock:
+        cached = _payload_cache.get(folder)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+
+    view_path = os.path.join(folder, RECEPTOR_VIEW_FILE)
+    header = f"REMARK   1 AGANDOCK VIEW {signature}\n"
+    payload = None
+    if os.path.exists(view_path):
+        with open(view_path, "r") as f:
+            if f.readline() == header:
+                payload = f.read()
+
+    if payload is None:
+        with open(receptor_pdb_path, "r") as f:
+            pdb_text = f.read()
+        points = stored_pose_coordinates(folder, manifest) if pose_dir else None
+        if points is None:
+            pose_files = [os.path.join(root, file) for root, _, files in os.walk(pose_dir)
+                          for file in files if file.endswith(".sdf")] if pose_dir else []
+            points = pose_coordinates(pose_files)
+        payload = trim_receptor(pdb_text, points=points, box=read_docking_box(folder), cutoff=cutoff)
+        tmp_path = f"{view_path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                f.write(header + payload)
+            os.replace(tmp_path, view_path)
+        except OSError:
+            pass  # Read-only experiment folders rebuild the view once per process instead
+
+    with _cache_lock:
+        _payload_cache[folder] = (signature, payload)
+    return payload
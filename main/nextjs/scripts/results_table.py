@@ -0,0 +1,99 @@
+import html
+import math
+import streamlit as st
+
+from scripts.depiction_cache import add_structure_images
+from agandock_cli.scripts.results_io import PAGE_SIZES, filter_results, format_for_display, results_page
+
+
+
+##############################################################################################################################
+""" Paginated results view """
+
+def render_page_html(page_df, first_row, header_color="#6a8f6b", html_columns=("Chemical structure",)):
+    header = "".join(f"<th>{html.escape(str(col))}</th>" for col in page_df.columns)
+    rows = []
+    for i, row in enumerate(page_df.itertuples(index=False), start=first_row):
+        cells = "".join(
+            f"<td>{val if col in html_columns else html.escape(str(val))}</td>"
+            for col, val in zip(page_df.columns, row)
+        )
+        rows.append(f"<tr><td>{i}</td>{cells}</tr>")
+
+    return f"""
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <style>
+            th {{
+                background-color: {header_color};
+                color: white;
+                padding: 8px;
+                position: sticky;
+                top: 0;
+                z-index: 2;
+                font-weight: normal;
+            }}
+            td {{
+                padding: 8px;
+                text-align: center;
+                word-wrap: break-word;
+                overflow-wrap: break-word;
+            }}
+            table {{
+                border-collapse: collapse;
+                width: 100%;
+                background-color: #FFFFFF;
+            }}
+            th, td {{
+                border: 1px solid #ddd;
+            }}
+            td:first-child {{
+                position: sticky;
+                left: 0;
+                background-color: #f4f4f4;
+                z-index: 1;
+            }}
+        </style>
+    </head>
+    <body>
+        <table>
+            <thead><tr><th>#</th>{header}</tr></thead>
+            <tbody>{''.join(rows)}</tbody>
+        </table>
+    </body>
+    </html>
+    """
+
+
+def display_results_table(df, key, depict_structures=True, header_color="#6a8f6b", height=500):
+    """
+    Paginated results view. Filtering, sorting and paging happen here on the server and only the
+    current page (and its structure images) is sent to the browser, so rendering cost does not grow
+    with the size of the library.
+    """
+    col1, col2, col3, col4 = st.columns([3, 2, 1, 1])
+    text_filter = col1.text_input("Filter by name or SMILES", key=f"{key}_filter")
+    sortable = [col for col in df.columns if col != "SMILES"]
+    sort_by = col2.selectbox("Sort by", sortable, key=f"{key}_sort_by",
+                             index=sortable.index("Docking score (kcal/mol)") if "Docking score (kcal/mol)" in sortable else 0)
+    order = col3.selectbox("Order", ["Ascending", "Descending"], key=f"{key}_order")
+    page_size = col4.selectbox("Rows", PAGE_SIZES, index=1, key=f"{key}_page_size")
+
+    filtered = filter_results(df, text_filter)
+    total = len(filtered)
+    num_pages = max(1, math.ceil(total / page_size))
+    page = st.number_input(f"Page (of {num_pages})", min_value=1, max_value=num_pages, value=1, step=1, key=f"{key}_page")
+    page = min(page, num_pages)
+
+    page_df = results_page(filtered, sort_by, order == "Ascending", page, page_size)
+    if depict_structures and "SMILES" in page_df.columns:
+        page_df = add_structure_images(page_df)
+    page_df = format_for_display(page_df)
+
+    first_row = (page - 1) * page_size + 1
+    st.components.v1.html(render_page_html(page_df, first_row, header_color), height=height, scrolling=True)
+    if total:
+        st.caption(f"Showing {first_row}–{first_row + len(page_df) - 1} of {total} compounds")
+    else:
+        st.caption("No compounds match the filter.")
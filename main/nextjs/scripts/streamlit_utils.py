@@ -1,24 +1,39 @@
 import io
 import os
+import ast
 import time
+import uuid
 import pytz
 import base64
 import subprocess
 import pandas as pd
 import numpy as np
 import altair as alt
-import seaborn as sns
 import streamlit as st
-import matplotlib.pyplot as plt
 import streamlit.components.v1 as components
-import scripts.docking_setup as setup
 
 from io import BytesIO
 from py3Dmol import view
 from datetime import datetime
-from matplotlib.patches import FancyBboxPatch
-from scripts.docking_utils import *
+from agandock_cli.scripts.docking_utils import *
 from scripts.visualize import *
+from agandock_cli.scripts.results_io import read_results_table
+from scripts.results_table import display_results_table
+from scripts.experiment_metadata import load_experiment_metadata, load_results_frame
+from agandock_cli.scripts.score_distribution import load_score_distribution
+from scripts.receptor_payload import load_receptor_payload
+from scripts.ligand_viewer import ligand_viewer
+from scripts.interaction_heatmap import plot_heatmap
+from scripts.plip.interaction_fingerprint import load_fingerprints
+from agandock_cli.scripts.pose_archive import open_stage
+from agandock_cli.scripts.experiment_catalogue import list_experiments, rebuild_catalogue
+from agandock_cli.scripts.stage_metrics import stage_breakdown
+from agandock_cli.scripts.pipeline import DOCKING_STEPS, TOP_FRACTION
+from agandock_cli.scripts.job_queue import (DOCKING_COMMANDS, PRIORITIES, submit_job, ensure_worker, get_job, list_jobs,
+                                            read_job_events, job_progress, cancel_job, queue_usage)
+
+JOB_REFRESH_S = 2
+JOB_STATUS_ICONS = {"queued": "⏳", "running": "🔄", "done": "✅", "failed": "❌", "cancelled": "⛔"}
 
 
 def add_custom_header_and_footer(header_and_footer_color, logo_image_path, header_background_path, background_image, title, subtitle, more_info_url):
@@ -359,7 +374,7 @@ def handle_sidebar_inputs():
         "Upload target protein",
         type=["pdb", "pdbqt"],
         accept_multiple_files=True,
-        help="Upload PDB and PDBQT files."
+        help="Upload PDB and PDBQT files. Several receptor conformations, paired by file name, are docked as an ensemble."
     )
 
     # Take user inputs for config values
@@ -391,7 +406,10 @@ def handle_sidebar_inputs():
         config_content = generate_config_file_content(center_x, center_y, center_z, size_x, size_y, size_z)
 
     pdb_file, pdbqt_file, config_file, statuses = process_uploaded_files(uploaded_files, config_content, config_ready)
+    receptors = pair_receptor_files(uploaded_files)
     display_upload_summary(statuses)
+    if len(receptors) > 1:
+        st.sidebar.caption(f"Ensemble docking against {len(receptors)} receptors, with the same pocket and box")
 
     # Select ligand input type
     input_type = st.radio(
@@ -416,7 +434,7 @@ def handle_sidebar_inputs():
             upload_status["smiles_input"] = True
             st.markdown('<p style="font-size:14px; color:green;">SMILES entered ✅</p>', unsafe_allow_html=True)
 
-    return pdb_file, pdbqt_file, config_file, input_type, input_csv, input_smiles
+    return pdb_file, pdbqt_file, config_file, input_type, input_csv, input_smiles, receptors
 
 
 
@@ -461,7 +479,14 @@ def process_uploaded_files(uploaded_files, config_content, config_ready):
         config_file.name = "config.txt"
 
     return pdb_file, pdbqt_file, config_file, statuses
-    
+
+
+def pair_receptor_files(uploaded_files):
+    """(PDB, PDBQT) uploads of the same receptor, matched by file name in upload order."""
+    pdbqt_files = {os.path.splitext(file.name)[0]: file for file in uploaded_files if file.name.endswith(".pdbqt")}
+    return [(file, pdbqt_files[os.path.splitext(file.name)[0]]) for file in uploaded_files
+            if file.name.endswith(".pdb") and os.path.splitext(file.name)[0] in pdbqt_files]
+
 
 def display_upload_summary(statuses):
     upload_summary = f"""
@@ -523,9 +548,8 @@ def molecular_docking(pdb_file, pdbqt_file, config_file, input_type, input_csv,
     ]
 
     if st.button("Run Docking Pipeline", key="run_docking_pipeline"):
-        st.success("Docking pipeline started!")
-        # Example function call (replace with actual implementation)
-        run_docking_pipeline(pdb_file, pdbqt_file, config_file, input_type, input_csv, input_smiles)
+        if submit_docking_job(pdb_file, pdbqt_file, config_file, input_type, input_csv, input_smiles):
+            st.success("Docking job queued!")
 
 # Function to handle data visualization
 def data_visualization():
@@ -536,19 +560,6 @@ def data_visualization():
         st.info("Visualization would be displayed here.")
         # Call visualize_3d_structures() as required
 
-def preprocess_csv(input_csv):
-    """Preprocess the uploaded CSV file."""
-    csv_data = pd.read_csv(input_csv)
-    csv_data = csv_data.dropna()
-    if "SMILES" not in csv_data.columns:
-        st.error("CSV file must contain a 'SMILES' column.")
-        st.stop()
-    if "Name" not in csv_data.columns:
-        csv_data["Name"] = [f"agan{i+1}" for i in range(len(csv_data))]
-    return csv_data[["Name", "SMILES"]]
-
-
-
 def generate_progress_table(steps, current_step):
     """Generates HTML for a horizontal progress bar with steps."""
     completed_color = "#4CAF50"  # Green
@@ -602,149 +613,224 @@ def save_uploaded_file(folder, file):
         f.write(file.read())
     return file_path
 
-def run_docking_pipeline(pdb_file,
-                         pdbqt_file,
-                         config_file,
-                         input_type,
-                         input_csv,
-                         input_smiles,
-                         progress_table_placeholder,
-                         docking_progress_container):
-    
-    start_time = time.time()
+def session_owner():
+    """Default owner of this session's jobs: the logged-in user, else an ID kept for the browser session."""
+    user = getattr(st, "user", None)
+    if user is not None and user.get("is_logged_in"):
+        return user.get("email") or user.get("name")
+    if "session_owner" not in st.session_state:
+        st.session_state.session_owner = f"session-{uuid.uuid4().hex[:8]}"
+    return st.session_state.session_owner
+
+
+def job_settings():
+    """Owner and priority for jobs submitted from this session (owners get a fair share of the host)."""
+    with st.expander("Job queue settings"):
+        st.text_input("Your name", key="job_owner", placeholder=session_owner(),
+                      help="Jobs of different people share the host fairly. Defaults to your login or this browser session.")
+        st.select_slider("Priority", options=list(PRIORITIES), value="normal", key="job_priority")
+
+
+def screening_settings():
+    """Hierarchical screening: a fast search of the whole library, then a detail search of its best ligands."""
+    with st.expander("Screening mode"):
+        st.checkbox("Hierarchical screening", key="hierarchical_screening",
+                    help="Dock every ligand with the fast search, then re-dock the best of them with the detail search")
+        st.number_input("Re-dock the top (%)", min_value=1, max_value=100, value=int(TOP_FRACTION * 100), key="top_percent",
+                        disabled=not st.session_state.get("hierarchical_screening"))
+
+
+def queue_job(command, folder_name, **params):
+    """Submit a job as this session's owner and make sure a worker will pick it up."""
+    job_id = submit_job(command, folder_name, owner=st.session_state.get("job_owner") or session_owner(),
+                        priority=PRIORITIES[st.session_state.get("job_priority", "normal")], **params)
+    ensure_worker()
+    return job_id
+
+
+def show_job_warnings(job):
+    for event in read_job_events(job):
+        if event["kind"] == "message" and event.get("level") == "warning":
+            st.warning(event["message"])
+
+
+@st.fragment(run_every=JOB_REFRESH_S)
+def display_job_status(job_id, running_message):
+    """
+    Status and warnings of an unfinished job, refreshed by the fragment alone so the page stays responsive.
+    The page is rerun once the job is done, to draw its results.
+    """
+    job = get_job(job_id)
+    if job["status"] == "done":
+        st.rerun()
+    if job["status"] in ("queued", "running"):
+        ensure_worker()
+    show_job_warnings(job)
+    if job["status"] == "queued":
+        st.info("Waiting for resources on the shared host...")
+    elif job["status"] == "running":
+        st.info(running_message)
+    else:
+        st.error(job["error"] or f"The job was {job['status']}.")
+
+
+def follow_job(key, running_message):
+    """
+    The job whose ID is kept in st.session_state[key], once it is done. Until then its status is shown by a
+    self-refreshing fragment and None is returned, so neither this run nor a rerun waits for the worker.
+    """
+    job = get_job(st.session_state[key]) if st.session_state.get(key) else None
+    if job is None:
+        return None
+    if job["status"] != "done":
+        display_job_status(job["id"], running_message)
+        return None
+    show_job_warnings(job)
+    return job
+
+
+def display_docking_results(results):
+    """Results table of a finished docking run with its CSV download link."""
+    display_results_table(results, key="docking_results")
+    csv_data = results.to_csv(index=False, float_format='%.2f').encode('utf-8')
+    b64 = base64.b64encode(csv_data).decode()
+    st.markdown(
+        f"<div style='text-align: left; margin-top: 20px; margin-buttom: 20px;'>"
+        f"<a href='data:file/csv;base64,{b64}' download='docking_score.csv' "
+        f"style='background-color: #d8a788; color: black; text-decoration: none; padding: 10px 20px; border-radius: 5px; font-size: 14px;'>"
+        f"Download (.csv)</a>"
+        f"</div>",
+        unsafe_allow_html=True,
+    )
+
+
+def new_experiment_folder():
+    """Create agandock_<date>_<time>, suffixed when another user submitted in the same second."""
     india_tz = pytz.timezone("Asia/Kolkata")
-    current_time = datetime.now(india_tz)
-    folder_name = current_time.strftime("agandock_%Y%m%d_%H%M%S")
-    os.makedirs(folder_name, exist_ok=True)
+    folder_name = datetime.now(india_tz).strftime("agandock_%Y%m%d_%H%M%S")
+    candidate, n = folder_name, 1
+    while True:
+        try:
+            os.makedirs(candidate)
+            return candidate
+        except FileExistsError:
+            n += 1
+            candidate = f"{folder_name}_{n}"
+
+
+def submit_docking_job(pdb_file, pdbqt_file, config_file, input_type, input_csv, input_smiles, receptors=None):
+    """
+    Save the uploads into a new experiment folder and queue its docking run. Returns the job ID.
+    Several (PDB, PDBQT) receptor pairs are docked as an ensemble sharing the configuration file.
+    """
+    if not (pdb_file and pdbqt_file and config_file):
+        st.error("Please upload the receptor PDB and PDBQT files and a configuration file.")
+        return None
 
-    st.markdown("""
-        <style>
-            #progress-bar {
-                position: sticky;
-                top: 0; /* Stick to the top of the page */
-                background: #f9f9f9; /* Background for the sticky bar */
-                padding: 10px 0; /* Add padding for spacing */
-                z-index: 1000; /* Ensure it stays on top */
-            }
-        </style>
-    """, unsafe_allow_html=True)
+    if receptors and len(receptors) > 1 and st.session_state.get("hierarchical_screening"):
+        st.error("Hierarchical screening docks a single receptor, please upload one PDB/PDBQT pair.")
+        return None
 
-    steps = ["Preprocess Input", "Convert SMILES to SDF", "Convert SDF to PDBQT", "Verify PDBQT Files", "Perform Docking"]
-    progress_table_placeholder = st.empty()
+    folder_name = new_experiment_folder()
+    if receptors and len(receptors) > 1:
+        # The receptors' own experiment folders are created under receptors/ by the run
+        upload_folder = os.path.join(folder_name, "pipeline_files", "receptor_uploads")
+        os.makedirs(upload_folder)
+        config_file_path = save_uploaded_file(upload_folder, config_file)
+        receptor_paths = [[save_uploaded_file(upload_folder, pdb), save_uploaded_file(upload_folder, pdbqt), config_file_path]
+                          for pdb, pdbqt in receptors]
+        input_csv_path = save_uploaded_file(folder_name, input_csv) if input_type == "Multiple SMILES" and input_csv else None
+        return queue_job("ensemble", folder_name, receptors=receptor_paths, input_type=input_type, input_csv=input_csv_path,
+                         input_smiles=input_smiles)
 
-    def update_progress(step_index):
-        """Updates the progress table dynamically."""
-        html_table = generate_progress_table(steps, step_index)
-    
-        # Clear and update the placeholder with the new HTML
-        progress_table_placeholder.empty()  # Clears the placeholder's content
-        with progress_table_placeholder:
-            components.html(f"""
-                <div id="progress-bar">
-                    {html_table}
-                </div>
-            """, height=120, scrolling=True)
-
-    # Save uploaded files to local paths
     pdb_file_path = save_uploaded_file(folder_name, pdb_file)
     pdbqt_file_path = save_uploaded_file(folder_name, pdbqt_file)
     config_file_path = save_uploaded_file(folder_name, config_file)
+    input_csv_path = save_uploaded_file(folder_name, input_csv) if input_type == "Multiple SMILES" and input_csv else None
+
+    if st.session_state.get("hierarchical_screening"):
+        return queue_job("hierarchical", folder_name, pdb_file_path=pdb_file_path, pdbqt_file_path=pdbqt_file_path,
+                         config_file_path=config_file_path, input_type=input_type, input_csv=input_csv_path,
+                         input_smiles=input_smiles, top_fraction=st.session_state.get("top_percent", TOP_FRACTION * 100) / 100)
+    return queue_job("docking", folder_name, pdb_file_path=pdb_file_path, pdbqt_file_path=pdbqt_file_path,
+                     config_file_path=config_file_path, input_type=input_type, input_csv=input_csv_path,
+                     input_smiles=input_smiles)
 
-    # Steps for the docking pipeline
-    for step_index, step_name in enumerate(steps):
-        
-        with docking_progress_container:
-            # Show the spinner for each step
-            with st.spinner(f"Executing: {step_name}"):
-                
-                if step_index == 0:
-                    # Step 1: Preprocess Input
-                    if input_type == "Multiple SMILES" and input_csv:
-                        csv_data = preprocess_csv(input_csv)
-                        input_csv_path = os.path.abspath(os.path.join(folder_name, "input_smiles.csv"))
-                        csv_data.to_csv(input_csv_path, index=False)
-                    elif input_type == "Single SMILES" and input_smiles:
-                        input_csv_path = os.path.abspath(os.path.join(folder_name, "input_smiles.csv"))
-                        pd.DataFrame({"Name": ["agan1"], "SMILES": [input_smiles]}).to_csv(input_csv_path, index=False)
-                    else:
-                        st.error("Please provide valid input for either Multiple SMILES or Single SMILES.")
-                        st.stop()
-
-                    num_rows = pd.read_csv(input_csv_path).shape[0]
-                    update_progress(step_index)
-
-                elif step_index == 1:
-                    # Step 2: Convert SMILES to SDF
-                    df_no_salt = process_smiles_csv(folder_name, input_csv_path)
-                    convert_smiles_to_sdf_parallel(folder_name, df_no_salt, num_conformations=10)
-                    update_progress(step_index)
-
-                elif step_index == 2:
-                    # Step 3: Convert SDF to PDBQT
-                    subprocess.run(["/bin/bash", "scripts/1_sdf_to_mol2.sh", folder_name],
-                                   stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-                    format_mol2_files(folder_name)
-                    subprocess.run(["/bin/bash", "scripts/2_mol2_to_pdbqt.sh", folder_name],
-                                   stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-                    update_progress(step_index)
-
-                elif step_index == 3:
-                    # Step 4: Verify PDBQT Files
-                    subprocess.run(["/bin/bash", "scripts/3_pdbqt_to_smiles.sh", folder_name],
-                                   stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-                    check_pdbqt_files(folder_name, input_csv_path)
-                    if input_type == "Multiple SMILES":
-                        copy_correct_pdbqt_files(folder_name, input_csv_path)
-                    else:
-                        copy_correct_pdbqt_file(folder_name, input_csv_path)
-                    update_progress(step_index)
-
-                elif step_index == 4:
-                    # Step 5: Perform Docking
-                    num_batches = create_ligands_path_batchwise(folder_name)
-                    ligand_batches = [f"unidock_pdbqt_batch_{i+1}.txt" for i in range(num_batches)]
-                    output_result_base = os.path.abspath(os.path.join(folder_name, "pipeline_files", "6_pdbqt_out"))
-                    os.makedirs(output_result_base, exist_ok=True)
-                    for i, ligands_batch_file in enumerate(ligand_batches):
-                        ligands_path = os.path.join(folder_name, "pipeline_files", ligands_batch_file)
-                        batch_output_logs = os.path.abspath(os.path.join(folder_name, "pipeline_files", f"unidock_output_batch_{i+1}.txt"))
-                        open(batch_output_logs, 'w').close()
-                        unidock_command = (
-                            f"unidock "
-                            f"--receptor {pdbqt_file_path} "
-                            f"--gpu_batch $(cat {ligands_path}) "
-                            f"--search_mode detail "
-                            f"--scoring vina "
-                            f"--config {config_file_path} "
-                            f"--dir {output_result_base} "
-                            f">> {batch_output_logs} 2>&1"
-                        )
-                        os.system(unidock_command)
-
-                    affinity_from_pdbqt_files(folder_name)
-                    extract_model1(folder_name)
-                    subprocess.run(["/bin/bash", "scripts/4_pdbqt_to_sdf.sh", folder_name],
-                                   stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-                    update_progress(step_index)
-
-                    end_time = time.time()
-                    elapsed_time_seconds = round((end_time - start_time), 2)
-                    os.makedirs(os.path.join(folder_name, "pipeline_files", "execution_time"), exist_ok=True)
-                    file_path = os.path.join(folder_name, "pipeline_files/execution_time/total_execution_time.txt")
-                    with open(file_path, "w") as file:
-                        file.write(f"{elapsed_time_seconds}")
-                    
-                    final_output_without_pb(folder_name, input_csv_path, elapsed_time_seconds)
-
-                    final_csv = os.path.join(folder_name, 'output.csv')
-                    form_protein_ligands_complexes(folder_name, final_csv)
-
-                    st.markdown(f'<p style="font-size:16px; color:#887b56; margin-top:20px;">Results are saved in <span style="color: #4973f2; font-size: 18px;"><b>{folder_name}</b></span></p>', unsafe_allow_html=True)
 
+@st.fragment(run_every=JOB_REFRESH_S)
+def display_docking_jobs():
+    """
+    Docking jobs of the shared queue and the progress of the followed one, read from its event log.
+    The fragment refreshes itself, so a rerun or reconnect never loses a running job.
+    """
+    jobs = list_jobs(command=DOCKING_COMMANDS, limit=20)
+    if not jobs:
+        st.info("No docking jobs have been submitted yet.")
+        return
+    if any(job["status"] in ("queued", "running") for job in jobs):
+        ensure_worker()
+
+    india_tz = pytz.timezone("Asia/Kolkata")
+    usage = queue_usage()
+    st.caption(f"Host: {usage['used']['cpus']} of {usage['budget']['cpus']} CPUs and {usage['used']['gpus']} of "
+               f"{usage['budget']['gpus']} GPUs in use, {usage['running']} jobs running, {usage['queued']} queued")
+    priority_names = {value: name for name, value in PRIORITIES.items()}
+    jobs_by_id = {job["id"]: job for job in jobs}
+    st.dataframe(pd.DataFrame({
+        "Job": list(jobs_by_id),
+        "Experiment": [os.path.basename(job["folder"]) for job in jobs],
+        "Owner": [job["owner"] or "" for job in jobs],
+        "Priority": [priority_names.get(job["priority"], job["priority"]) for job in jobs],
+        "Status": [f"{JOB_STATUS_ICONS[job['status']]} {job['status']}" for job in jobs],
+        "CPUs": [job["cpus"] for job in jobs],
+        "Submitted": [datetime.fromtimestamp(job["submitted"], india_tz).strftime("%d %b %H:%M:%S") for job in jobs],
+    }), hide_index=True, use_container_width=True)
+
+    if st.session_state.get("followed_job") not in jobs_by_id:
+        st.session_state.followed_job = jobs[0]["id"]
+    job_id = st.selectbox("Follow job", list(jobs_by_id), key="followed_job",
+                          format_func=lambda i: f"{i} ({os.path.basename(jobs_by_id[i]['folder'])})")
+    job = jobs_by_id[job_id]
+    progress = job_progress(read_job_events(job))
+    components.html(f"""
+        <div id="progress-bar">
+            {generate_progress_table(DOCKING_STEPS, progress["step_done"])}
+        </div>
+    """, height=120, scrolling=True)
+
+    if job["status"] == "queued":
+        st.info("Waiting for resources on the shared host...")
+    elif job["status"] == "running":
+        st.info(f"Executing: {progress['step']}")
+    elif job["status"] == "failed":
+        st.error(job["error"])
+    elif job["status"] == "cancelled":
+        st.warning("The job was cancelled.")
+    if job["status"] in ("queued", "running") and st.button("Cancel job", key=f"cancel_{job_id}"):
+        cancel_job(job_id)
+
+    # Results are drawn by the full page, rerun it once when the followed job finishes
+    previous = st.session_state.get("followed_job_status")
+    st.session_state.followed_job_status = (job_id, job["status"])
+    if previous is not None and previous[0] == job_id and previous[1] != job["status"] and job["status"] == "done":
+        st.rerun()
+
+
+def display_job_results(job_id):
+    """Results of a finished docking job."""
+    job = get_job(job_id) if job_id else None
+    if job is None or job["status"] != "done":
+        return
+    display_docking_results(load_results_frame(os.path.join(job["folder"], "output.csv")))
+    st.markdown(f'<p style="font-size:16px; color:#887b56; margin-top:20px;">Results are saved in <span style="color: #4973f2; font-size: 18px;"><b>{os.path.basename(job["folder"])}</b></span></p>', unsafe_allow_html=True)
+    if job["command"] == "ensemble":
+        st.caption("Each receptor's poses are in its own experiment folder under receptors/, ready for PoseBusters and PLIP.")
+    elif job["command"] == "hierarchical":
+        st.caption("These are the detail tier's poses; the fast tier results of every ligand are in tiers/fast.")
     st.write("")
     st.write("")
     st.write("")
-    
+
 
 
 
@@ -752,56 +838,32 @@ def run_docking_pipeline(pdb_file,
 """ Tab 1: Data Analysis code """
 
 def load_folder_data(selected_folder):
-    """Load data for the selected folder."""
-    input_csv_path = os.path.join(selected_folder, "input_smiles.csv")
-    df_input = pd.read_csv(input_csv_path)
-
-    salts_csv_path = os.path.join(selected_folder, "salted_compounds.csv")
-    df_salt = pd.read_csv(salts_csv_path)
-
-    time_taken_path = os.path.join(selected_folder, "pipeline_files/execution_time/total_execution_time.txt")
-    with open(time_taken_path, "r") as file:
-        time_taken = file.read().strip()
+    """Load the summary of the selected folder (cached, see scripts.experiment_metadata)."""
+    return load_experiment_metadata(selected_folder)
 
-    pdbqt_in = os.path.join(selected_folder, "pipeline_files/3_pdbqt")
-    pdbqt_out = os.path.join(selected_folder, "pipeline_files/5_pdbqt_for_docking")
-    num_pdbqt_in = len([f for f in os.listdir(pdbqt_in) if os.path.isfile(os.path.join(pdbqt_in, f))])
-    num_pdbqt_out = len([f for f in os.listdir(pdbqt_out) if os.path.isfile(os.path.join(pdbqt_out, f))])
 
-    return df_input, df_salt, time_taken, num_pdbqt_in, num_pdbqt_out
-
-
-def display_summary(df_input, df_salt, time_taken, num_pdbqt_in, num_pdbqt_out):
+def display_summary(num_input, num_salts, time_taken, num_pdbqt_in, num_pdbqt_out):
     """Display summary of loaded data."""
     st.markdown(f"""
-        <p style="font-size:16px; color:#887b56;">Total compounds loaded: <span style="color: #4973f2; font-size: 20px;"><b>{len(df_input)}</b></span></p>
-        <p style="font-size:16px; color:#887b56;">Salts removed: <span style="color: #4973f2; font-size: 20px;"><b>{len(df_salt)}</b></span></p>
+        <p style="font-size:16px; color:#887b56;">Total compounds loaded: <span style="color: #4973f2; font-size: 20px;"><b>{num_input}</b></span></p>
+        <p style="font-size:16px; color:#887b56;">Salts removed: <span style="color: #4973f2; font-size: 20px;"><b>{num_salts}</b></span></p>
         <p style="font-size:16px; color:#887b56;">No. of compounds removed in PDBQT verification: <span style="color: #4973f2; font-size: 20px;"><b>{num_pdbqt_in - num_pdbqt_out}</b></span></p>
     """, unsafe_allow_html=True)
 
 
-def create_histogram(df, time_taken):
-    """Create and display a histogram of docking scores."""
+def create_histogram(distribution, time_taken):
+    """Display the histogram of docking scores precomputed for the experiment (see agandock_cli.scripts.score_distribution)."""
     st.markdown(f"""
         <p style="font-size:16px; color:#887b56; margin-top:0px;">Docking process for
-        <span style="color: #4973f2; font-size: 20px;"><b>{len(df)}</b></span> compounds completed successfully in
+        <span style="color: #4973f2; font-size: 20px;"><b>{distribution.total}</b></span> compounds completed successfully in
         <span style="color: #4973f2; font-size: 20px;"><b>{time_taken}</b></span> seconds.</p>
+        <p style="font-size:16px; color:#887b56;">Median docking score:
+        <span style="color: #4973f2; font-size: 20px;"><b>{distribution.score_at_quantile(0.5):.2f}</b></span>, best 10% below
+        <span style="color: #4973f2; font-size: 20px;"><b>{distribution.score_at_quantile(0.1):.2f}</b></span> kcal/mol.</p>
         <p style="font-size:18px; color:#593c22; font-weight:bold;">Histogram of Docking Scores</p>
     """, unsafe_allow_html=True)
 
-    docking_scores = df["Docking score (kcal/mol)"]
-    bin_edges = list(range(int(docking_scores.min()) - 1, int(docking_scores.max()) + 2))
-    bins = pd.cut(docking_scores, bins=bin_edges, right=False, include_lowest=True)
-    bin_counts = bins.value_counts().sort_index()
-
-    histogram_data = pd.DataFrame({
-        "Range": [f"{int(interval.left)} to {int(interval.right)}" for interval in bin_counts.index],
-        "Left": [interval.left for interval in bin_counts.index],
-        "Right": [interval.right for interval in bin_counts.index],
-        "Count": bin_counts.values
-    })
-
-    histogram_data = histogram_data.query("Count > 0").sort_values(by=["Left"]).drop(columns=["Left", "Right"])
+    histogram_data = distribution.histogram_frame().drop(columns=["Left"])
 
     range_order = histogram_data["Range"].tolist()
     max_count = histogram_data["Count"].max()
@@ -838,12 +900,31 @@ def create_histogram(df, time_taken):
     st.altair_chart(combined_chart, use_container_width=False)
 
 
-def select_affinity_range(df):
+def display_stage_timings(selected_folder):
+    """Wall time, CPU time, peak memory and throughput of each pipeline stage (see agandock_cli.scripts.stage_metrics)."""
+    breakdown = stage_breakdown(selected_folder)
+    if breakdown.empty:
+        return
+    with st.expander("Timing breakdown by stage"):
+        chart = alt.Chart(breakdown).mark_bar(color="#4973f2").encode(
+            x=alt.X("wall_s:Q", title="Wall time (s)"),
+            y=alt.Y("stage:N", sort=breakdown["stage"].tolist(), title=None),
+            tooltip=["stage", "wall_s", "cpu_s", "peak_rss_mb", "items_per_s", "share"]
+        ).properties(height=max(150, 28 * len(breakdown)), background="transparent")
+        st.altair_chart(chart, use_container_width=True)
+        table = breakdown[["stage", "status", "wall_s", "share", "cpu_s", "peak_rss_mb", "items_in", "items_out", "items_per_s"]]
+        st.dataframe(table.rename(columns={
+            "stage": "Stage", "status": "Status", "wall_s": "Wall time (s)", "share": "% of total",
+            "cpu_s": "CPU time (s)", "peak_rss_mb": "Stage peak RSS (MB)", "items_in": "Items in",
+            "items_out": "Items out", "items_per_s": "Items/s"}), use_container_width=True, hide_index=True)
+
+
+def select_affinity_range(distribution):
     """Select affinity range for PoseBusters."""
 
     st.markdown('<p style="margin-bottom: 10px; margin-left: 0px; font-size: 20px; font-weight: bold; color: #593c22;">Select the Docking Score range to run Posebusters</p>', unsafe_allow_html=True)
     
-    min_affinity, max_affinity = df['Docking score (kcal/mol)'].min(), df['Docking score (kcal/mol)'].max()
+    min_affinity, max_affinity = distribution.min, distribution.max
     col1, _, col2, _ = st.columns([0.12, 0.1, 0.12, 0.66])
     
     with col1:
@@ -877,9 +958,7 @@ def select_affinity_range(df):
         return None, None
 
 
-    df_selected = df[(df['Docking score (kcal/mol)'] >= lower_range) & 
-                     (df['Docking score (kcal/mol)'] <= higher_range)]
-    selected_count = len(df_selected)
+    selected_count = distribution.count_between(lower_range, higher_range)
 
     st.markdown(f"""<p style="margin-top: -10px; font-size:16px; color:#887b56;
                      ">Total compounds selected for PoseBusters filtration: <span style="color: #4973f2;  
@@ -888,19 +967,66 @@ def select_affinity_range(df):
     return lower_range, higher_range
 
 
-def handle_posebusters(selected_folder, df, lower_range, higher_range):
-    """Run PoseBusters filtration and process results."""
-    with st.spinner(f"Running PoseBusters filtration on selected compounds..."):
-        extraction_based_on_threshold_for_pb(selected_folder, lower_range, higher_range)
-        script_path = os.path.join("scripts", "5_posebusters_filter.sh")
-        pdb_file_path = next((os.path.join(selected_folder, file_name) 
-                              for file_name in os.listdir(selected_folder) 
-                              if file_name.endswith(".pdb")), None)
-        subprocess.run(["/bin/bash", script_path, selected_folder, pdb_file_path],
-                       text=True)
-        process_pb_csv(selected_folder)
-        final_output_with_pb(selected_folder, passes=19)
-        st.success("PoseBusters filtration completed successfully.")
+def display_posebusters_results(passed, failed):
+    """Compounds which pass and fail PoseBusters, each with a CSV download link."""
+    st.markdown(f"""<p style="margin-top: 0px; font-size:16px; color:#887b56;
+                             ">Compounds filtered out by Posebusters: <span style="color: #4973f2;  
+                              font-size: 20px;"><b>{len(failed)}</b></span></p>""", unsafe_allow_html=True)
+
+    st.markdown('<p style="margin-bottom: 10px; margin-left: 0px; font-size: 15px; font-weight: bold; color: #593c22;">Compounds which pass PoseBusters filtration.</p>', unsafe_allow_html=True)
+
+    display_results_table(passed, key="pb_passed", height=300)
+
+    # Prepare download link for CSV
+    csv_data = passed.to_csv(index=False, float_format='%.2f').encode('utf-8')
+    b64 = base64.b64encode(csv_data).decode()
+    st.markdown(
+        f"<div style='text-align: left; margin-top: 20px; margin-bottom: 20px;'>"
+        f"<a href='data:file/csv;base64,{b64}' download='output_with_pb.csv' "
+        f"style='background-color: #d8a788; color: black; text-decoration: none; padding: 10px 20px; border-radius: 5px; font-size: 14px;'>"
+        f"Download (.csv)</a>"
+        f"</div>",
+        unsafe_allow_html=True,
+    )
+
+    # Create an expander for the compounds that failed PoseBusters filtration
+    with st.expander("Analysis of compounds which failed PoseBusters"):
+        st.markdown('<p style="margin-bottom: 10px; margin-left: 0px; font-size: 15px; font-weight: bold; color: #593c22;">Compounds which fail PoseBusters filtration.</p>', unsafe_allow_html=True)
+        
+        display_results_table(failed, key="pb_failed", height=200)
+
+        csv_data = failed.to_csv(index=False, float_format='%.2f').encode('utf-8')
+        b64 = base64.b64encode(csv_data).decode()
+        st.markdown(
+            f"<div style='text-align: left; margin-top: 20px; margin-bottom: 20px;'>"
+            f"<a href='data:file/csv;base64,{b64}' download='output_with_pb.csv' "
+            f"style='background-color: #d8a788; color: black; text-decoration: none; padding: 10px 20px; border-radius: 5px; font-size: 14px;'>"
+            f"Download (.csv)</a>"
+            f"</div>",
+            unsafe_allow_html=True,
+        )
+
+
+def handle_posebusters(selected_folder, lower_range, higher_range):
+    """Queue PoseBusters filtration of the selected compounds; display_posebusters_job follows it."""
+    st.session_state[f"posebusters_job_{selected_folder}"] = queue_job("posebusters", selected_folder, lower_range=lower_range,
+                                                                       higher_range=higher_range)
+
+
+def display_posebusters_job(selected_folder):
+    """Progress of the experiment's PoseBusters job, then its results."""
+    key = f"posebusters_job_{selected_folder}"
+    if key not in st.session_state:
+        return
+    st.write("")
+    st.write("")
+    st.write("")
+    job = follow_job(key, "Running PoseBusters filtration on selected compounds...")
+    if job is None:
+        return
+    display_posebusters_results(load_results_frame(os.path.join(selected_folder, "output_with_pb.csv")),
+                                load_results_frame(os.path.join(selected_folder, "output_without_pb.csv")))
+    st.success("PoseBusters filtration completed successfully.")
 
 
 
@@ -908,25 +1034,13 @@ def handle_posebusters(selected_folder, df, lower_range, higher_range):
 ##############################################################################################################################
 """ Tab 2: PLIP Analysis code """
 
-def create_histogram_for_plip(df, time_taken):
-    """Create and display a histogram of docking scores."""
+def create_histogram_for_plip(distribution, time_taken):
+    """Display the histogram of docking scores precomputed for the experiment (see agandock_cli.scripts.score_distribution)."""
     st.markdown(f"""
         <p style="font-size:18px; color:#006064; font-weight:bold;">Histogram of Docking Scores</p>
     """, unsafe_allow_html=True)
 
-    docking_scores = df["Docking score (kcal/mol)"]
-    bin_edges = list(range(int(docking_scores.min()) - 1, int(docking_scores.max()) + 2))
-    bins = pd.cut(docking_scores, bins=bin_edges, right=False, include_lowest=True)
-    bin_counts = bins.value_counts().sort_index()
-
-    histogram_data = pd.DataFrame({
-        "Range": [f"{int(interval.left)} to {int(interval.right)}" for interval in bin_counts.index],
-        "Left": [interval.left for interval in bin_counts.index],
-        "Right": [interval.right for interval in bin_counts.index],
-        "Count": bin_counts.values
-    })
-
-    histogram_data = histogram_data.query("Count > 0").sort_values(by=["Left"]).drop(columns=["Left", "Right"])
+    histogram_data = distribution.histogram_frame().drop(columns=["Left"])
 
     range_order = histogram_data["Range"].tolist()
     max_count = histogram_data["Count"].max()
@@ -963,12 +1077,12 @@ def create_histogram_for_plip(df, time_taken):
     st.altair_chart(combined_chart, use_container_width=False)
 
 
-def select_affinity_range_for_plip(df):
+def select_affinity_range_for_plip(distribution):
     """Select affinity range for PoseBusters."""
 
     st.markdown('<p style="margin-bottom: 10px; margin-left: 0px; font-size: 20px; font-weight: bold; color: #006064;">Select the Docking Score range to run PLIP</p>', unsafe_allow_html=True)
     
-    min_affinity, max_affinity = df['Docking score (kcal/mol)'].min(), df['Docking score (kcal/mol)'].max()
+    min_affinity, max_affinity = distribution.min, distribution.max
     col1, _, col2, _ = st.columns([0.12, 0.1, 0.12, 0.66])
     
     with col1:
@@ -1001,9 +1115,7 @@ def select_affinity_range_for_plip(df):
         st.warning("Lower range must be less than higher range.")
         return None, None
 
-    df_selected = df[(df['Docking score (kcal/mol)'] >= lower_range) & 
-                     (df['Docking score (kcal/mol)'] <= higher_range)]
-    selected_count = len(df_selected)
+    selected_count = distribution.count_between(lower_range, higher_range)
 
     st.markdown(f"""<p style="margin-top: -10px; font-size:16px; color:#887b56;
                      ">Total compounds selected for PLIP analysis: <span style="color: #4973f2;  
@@ -1013,180 +1125,12 @@ def select_affinity_range_for_plip(df):
 
 
 
-def extraction_based_on_threshold_for_plip(selected_folder, df, lower_range, higher_range):
-    protein_ligand_complexes_folder = os.path.join(selected_folder, "plc")
-    plc_all_ligands_folder = os.path.join(selected_folder, "plc_all_ligands")
-
-    if os.path.exists(plc_all_ligands_folder):
-        shutil.rmtree(plc_all_ligands_folder)
-    
-    os.makedirs(plc_all_ligands_folder)
-
-    df_output = df
-
-    df_filtered = df_output[(df_output['Docking score (kcal/mol)'] >= lower_range) &
-                            (df_output['Docking score (kcal/mol)'] <= higher_range)]
-    
-    selected_ligands = df_filtered['Name'].tolist()
-    
-    for ligand in selected_ligands:
-        pdb_file_name = f"{ligand}.pdb"
-        pdb_source_path = os.path.join(protein_ligand_complexes_folder, pdb_file_name)
-        
-        if os.path.exists(pdb_source_path):
-            pdb_destination_path = os.path.join(plc_all_ligands_folder, pdb_file_name)
-            shutil.copy(pdb_source_path, pdb_destination_path)
-            print(f"Copied {pdb_file_name} to {plc_all_ligands_folder}")
-        else:
-            print(f"Warning: {pdb_file_name} not found in {protein_ligand_complexes_folder}")
-    
-    return plc_all_ligands_folder  
-
-
-def run_plip(selected_folder, plc_all_ligands):
-    
-    plip_path = os.path.abspath("scripts/plip") 
-    pdb_path = os.path.abspath(f"{selected_folder}/plc_all_ligands") 
-    output_path = os.path.abspath(f"{selected_folder}/output_plip_files")
-
-    if os.path.exists(output_path):
-        shutil.rmtree(output_path)
-        
-    os.makedirs(output_path, exist_ok=True)
-    os.environ["PYTHONPATH"] = plip_path
-
-    pdb_files = [f for f in os.listdir(pdb_path) if f.endswith(".pdb")]
-    for pdb_file in pdb_files:
-        input_file = os.path.join(pdb_path, pdb_file)
-        pdb_output_dir = os.path.join(output_path, os.path.splitext(pdb_file)[0])
-        os.makedirs(pdb_output_dir, exist_ok=True)
-
-        plip_cmd_path = os.path.join(plip_path, "plipcmd.py")
-        command = ["python3", plip_cmd_path, "-f", input_file, "-yvxt", "-o", pdb_output_dir]
-        result = subprocess.run(command, cwd=pdb_path, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-
-    post_process_command = ["python3", os.path.join(plip_path, "plip_post_process.py"), "-d", output_path]
-    subprocess.run(post_process_command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-
-    return output_path 
-
-
-def generate_plip_tables_html(filtered_df):
-    colgroup_html = ''.join(
-        f'<col>' for _ in filtered_df.columns
-    )
-
-    table_html = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <script src="https://cdnjs.cloudflare.com/ajax/libs/tablesort/5.2.1/tablesort.min.js"></script>
-        <style>
-            th {{
-                cursor: pointer;
-                background-color: #006064;
-                color: white;
-                padding: 8px;
-                position: sticky;
-                top: 0;
-                z-index: 10; 
-                font-weight: normal; 
-            }}
-            td {{
-                padding: 8px;
-                text-align: center;
-                word-wrap: break-word;
-                overflow-wrap: break-word;
-            }}
-            table {{
-                border-collapse: collapse;
-                width: 100%;
-                table-layout: auto;
-                background-color: #FFFFFF;
-            }}
-            th, td {{
-                border: 1px solid #ddd;
-            }}
-            /* Sticky headers for the first two columns */
-            th.sticky-left, td.sticky-left {{
-                position: sticky;
-                left: 0;
-                z-index: 5; 
-                background-color: #f3f3f3;
-            }}
-            th.sticky-left:nth-child(2), td.sticky-left:nth-child(2) {{
-                left: calc(15px + 10px); 
-            }}
-            th.sticky-top-left {{
-                z-index: 15; 
-            }}
-            th.sticky-top-left:nth-child(2) {{
-                z-index: 14;
-            }}
-        </style>
-    </head>
-    <body>
-        <div class="table-container">
-            <table id="sortable-table">
-                <colgroup>
-                    {colgroup_html}
-                </colgroup>
-                <thead>
-                    <tr>
-                        <th class="sticky-left sticky-top-left" style="background-color: #006064;">#</th>
-                        <th class="sticky-left sticky-top-left" style="background-color: #006064;">Name</th>
-                        {''.join(f'<th style="background-color: #006064;">{col}</th>' for col in filtered_df.columns[1:])}
-                    </tr>
-                </thead>
-                <tbody>
-                    {''.join(
-                        f'<tr><td class="sticky-left">{i}</td>'
-                        f'<td class="sticky-left">{row[0]}</td>'
-                        + ''.join(f'<td>{val}</td>' for val in row[1:])
-                        + '</tr>'
-                        for i, row in enumerate(filtered_df.values, start=0)
-                    )}
-                </tbody>
-            </table>
-        </div>
-        <script>
-            new Tablesort(document.getElementById('sortable-table'));
-        </script>
-    </body>
-    </html>
-    """
-    return table_html
-
-
-def plot_heatmap(df):
-    data = df.set_index('Name')
-    
-    fig_width = 10
-    fig_height = max(len(data.index) * 0.5, 5)
-    
-    plt.figure(figsize=(fig_width, fig_height))
-    ax = sns.heatmap(data, 
-                     cmap=["#e0f7fa", "#b2ebf2", "#80deea", "#4dd0e1", "#26c6da", "#00bcd4", 
-                          "#00acc1", "#0097a7", "#00838f", "#006064"],
-                     annot=True, fmt=".0f", linewidths=0.1, linecolor='white', 
-                     square=False, cbar=False, xticklabels=data.columns, yticklabels=data.index)
-    
-    ax.xaxis.set_ticks_position('top')
-    plt.xticks(rotation=45, ha='left')
-    plt.yticks(rotation=0, ha='right')
-    plt.ylabel('Entities', fontsize=14)
-    plt.tight_layout()
-    plt.gcf().patch.set_alpha(0)
-    st.pyplot(plt)
-
-    
-
 def display_plip_data(selected_folder, output_path):
     st.write("##### PLIP Results")
     csv_files = []
     for root, dirs, files in os.walk(output_path):
         for file in files:
-            if file.endswith(".csv"):
+            if file.endswith(".csv") and file != "plip_manifest.csv":
                 csv_files.append(os.path.join(root, file))
 
     if not csv_files:
@@ -1200,7 +1144,7 @@ def display_plip_data(selected_folder, output_path):
     if selected_file_name:
         selected_file_path = csv_dict[selected_file_name]
         if selected_file_name == "plip_result":
-            df = pd.read_csv(selected_file_path)
+            df = read_results_table(selected_file_path)
             num_columns = [col for col in df.columns if col.startswith('num_')]
             if 'Name' in df.columns:
                 columns_to_show = ['Name'] + num_columns
@@ -1208,10 +1152,10 @@ def display_plip_data(selected_folder, output_path):
                 columns_to_show = num_columns 
             df = df[columns_to_show]
         else:
-            df = pd.read_csv(selected_file_path)
+            df = read_results_table(selected_file_path)
 
-        scrollable_table_html = generate_plip_tables_html(df)
-        st.components.v1.html(scrollable_table_html, height=300, scrolling=True)
+        display_results_table(df, key=f"plip_{selected_file_name}", depict_structures=False,
+                              header_color="#006064", height=300)
 
         original_csv_data = pd.read_csv(selected_file_path).to_csv(index=False).encode('utf-8')
         b64 = base64.b64encode(original_csv_data).decode()
@@ -1225,16 +1169,38 @@ def display_plip_data(selected_folder, output_path):
             unsafe_allow_html=True)
 
         if selected_file_name == "plip_result":
-            plot_heatmap(df)
+            plot_heatmap(read_results_table(selected_file_path))
+            display_similar_poses(output_path)
 
 
-def handle_plip(selected_folder, df, lower_range, higher_range):
-    st.write("")
-    st.write("")
-    st.write("")
-    plc_all_ligands = extraction_based_on_threshold_for_plip(selected_folder, df, lower_range, higher_range)
-    output_path = run_plip(selected_folder, plc_all_ligands)
-    return output_path
+def display_similar_poses(output_path):
+    """Top-k poses whose interaction fingerprint (residue × interaction type bits) is closest to a reference."""
+    fingerprints = load_fingerprints(output_path)
+    if len(fingerprints.names) < 2:
+        return
+    st.markdown('<p style="margin-top: 20px; font-size: 18px; font-weight: bold; color: #006064;">Poses binding like a reference ligand</p>', unsafe_allow_html=True)
+    col1, col2 = st.columns([0.7, 0.3])
+    reference = col1.selectbox("Reference ligand", fingerprints.names.tolist(), key="ifp_reference")
+    top_k = col2.number_input("Number of poses", min_value=1, max_value=min(100, len(fingerprints.names) - 1),
+                              value=min(10, len(fingerprints.names) - 1), step=1, key="ifp_top_k")
+    interactions = fingerprints.interactions(reference)
+    st.caption(f"{reference}: " + (", ".join(f"{resnr} {itype.replace('_', ' ')}" for resnr, itype in interactions)
+                                   or "no interactions"))
+    st.dataframe(fingerprints.search(reference, int(top_k)), use_container_width=True, hide_index=True)
+
+
+def handle_plip(selected_folder, use_pb_filtered_ligands, lower_range, higher_range):
+    """Queue PLIP on the selected ligands (with PyMOL sessions for the viewer); plip_job_output follows it."""
+    st.session_state[f"plip_job_{selected_folder}"] = queue_job("plip", selected_folder, lower_range=lower_range,
+                                                                higher_range=higher_range,
+                                                                use_pb_filtered_ligands=use_pb_filtered_ligands,
+                                                                pymol_sessions=True)
+
+
+def plip_job_output(selected_folder):
+    """Output folder of the experiment's PLIP job once it is done, None while it runs (its progress is shown)."""
+    job = follow_job(f"plip_job_{selected_folder}", "Running PLIP analysis...")
+    return os.path.join(job["folder"], "output_plip_files") if job else None
 
 
 
@@ -1397,9 +1363,15 @@ from py3Dmol import view
 from IPython.display import display, HTML
 
 
-def get_agandock_folders(base_path="."):
-    """Retrieve Agandock experiment folders."""
-    return [f for f in os.listdir(base_path) if os.path.isdir(f) and f.startswith("agandock")]
+def get_agandock_folders(base_path=".", search=None):
+    """
+    Retrieve Agandock experiment folders below base_path from the experiment catalogue, newest first.
+    Folders written before the catalogue existed are indexed once, the first time nothing is found.
+    """
+    experiments = list_experiments(search=search, base_path=base_path)
+    if not experiments and not search and rebuild_catalogue(base_path):
+        experiments = list_experiments(base_path=base_path)
+    return [os.path.relpath(row["path"], base_path) for row in experiments]
 
 
 def get_receptor_pdb_path(selected_folder):
@@ -1411,25 +1383,20 @@ def get_receptor_pdb_path(selected_folder):
 
 def get_plip_and_sdf_paths(selected_folder):
     output_plip_path = os.path.join(selected_folder, "output_plip_files")
-    sdf_out_path = os.path.join(selected_folder, "pipeline_files", "9_sdf_out")
-    if not os.path.exists(output_plip_path) or not os.path.exists(sdf_out_path):
+    sdf_poses = open_stage(selected_folder, "9_sdf_out")
+    if not os.path.exists(output_plip_path) or not len(sdf_poses):
         st.error("Please first run PLIP for a given experiment.")
         return None, None
-    return output_plip_path, sdf_out_path
+    return output_plip_path, sdf_poses
 
-def process_and_copy_matching_files(output_plip_path, sdf_out_path):
+def process_and_copy_matching_files(output_plip_path, sdf_poses):
     plip_folders = [f for f in os.listdir(output_plip_path) if os.path.isdir(os.path.join(output_plip_path, f))]
-    sdf_files = [f for f in os.listdir(sdf_out_path) if f.endswith('_out.sdf')]
-    
-    for folder_name in plip_folders:
-        matching_sdf = [sdf for sdf in sdf_files if sdf.startswith(folder_name + "_")]
-        if matching_sdf:
-            source_sdf_path = os.path.join(sdf_out_path, matching_sdf[0])
-            destination_folder = os.path.join(output_plip_path, folder_name)
-            destination_sdf_path = os.path.join(destination_folder, matching_sdf[0])
 
-            os.makedirs(destination_folder, exist_ok=True)
-            shutil.copy(source_sdf_path, destination_sdf_path)
+    for folder_name, content in sdf_poses.items(plip_folders):
+        destination_sdf_path = os.path.join(output_plip_path, folder_name, f"{folder_name}_out.sdf")
+        if not os.path.exists(destination_sdf_path):
+            with open(destination_sdf_path, "w") as f:
+                f.write(content)
 
 def collect_ligand_files(output_plip_path):
     ligand_files = [
@@ -1493,10 +1460,10 @@ def generate_unique_colors(num_colors):
     return colors
 
 
-def visualize_3d_structures(output_plip_path, receptor_pdb_path, ligand_file_path):
+def visualize_3d_structures(output_plip_path, receptor_pdb_path, ligand_file_path, trimmed_receptor=True):
     try:
         plip_result_file = os.path.join(output_plip_path, "plip_result.csv")
-        plip_results = pd.read_csv(plip_result_file)
+        plip_results = load_results_frame(plip_result_file)
         df_all_residues = plip_results[['Name', 'all_rsnr']]
 
         ligand_name = os.path.basename(ligand_file_path).replace('_out.sdf', '')
@@ -1506,36 +1473,29 @@ def visualize_3d_structures(output_plip_path, receptor_pdb_path, ligand_file_pat
             st.error(f"No residues found for the selected ligand {ligand_name}.")
             return
         
-        residues_to_highlight = eval(selected_residues[0])  
+        residues_to_highlight = ast.literal_eval(selected_residues[0])
         residue_colors = generate_unique_colors(len(residues_to_highlight))
         residues_color_map = dict(zip(residues_to_highlight, residue_colors))
 
         col1, col2 = st.columns([0.85, 0.15])
 
         with col1:
-            viewer = py3Dmol.view(width=940, height=600)
-
-            with open(receptor_pdb_path, 'r') as protein_file:
-                receptor_data = protein_file.read()
-            viewer.addModel(receptor_data, 'pdb')
-
-            viewer.setStyle({'model': 0}, {'cartoon': {'color': 'lightgrey'}})
-
-            for res, color in residues_color_map.items():
-                viewer.setStyle({'resi': res}, {'stick': {'color': color}})
+            if trimmed_receptor:
+                # Binding site at full detail plus a CA trace, built once per experiment and reused
+                # for every ligand (see scripts.receptor_payload)
+                receptor_data = load_receptor_payload(receptor_pdb_path, pose_dir=output_plip_path)
+                cartoon = {'color': 'lightgrey', 'style': 'trace'}
+            else:
+                with open(receptor_pdb_path, 'r') as protein_file:
+                    receptor_data = protein_file.read()
+                cartoon = {'color': 'lightgrey'}
 
             with open(ligand_file_path, 'r') as ligand_file:
                 ligand_data = ligand_file.read()
-            viewer.addModel(ligand_data, 'sdf')
-
-            viewer.setStyle({'model': 1}, {'stick': {'colorscheme': 'greenCarbon'}})
-
-            viewer.setBackgroundColor('white')
-            viewer.zoomTo()
 
-            viewer_html = viewer._make_html()
-
-            st.components.v1.html(viewer_html, height=600, width=940)
+            # The browser keeps the receptor, switching ligands only sends the ligand (see scripts.ligand_viewer)
+            ligand_viewer(receptor_data, ligand_data, {int(res): color for res, color in residues_color_map.items()},
+                          cartoon, height=600)
 
         with col2:
             label_html = "<div style='font-family:sans-serif; margin-top:20px;'>"
@@ -1558,11 +1518,18 @@ def visualize_3d_structures(output_plip_path, receptor_pdb_path, ligand_file_pat
 def visualize_data(output_plip_path, receptor_pdb_path, ligand_folder_path, selected_ligand_file):
     """Prepare and show visualization for the selected receptor and ligand files."""
     ligand_file_path = os.path.join(ligand_folder_path, selected_ligand_file)
-    if receptor_pdb_path and st.button("Show Visualization", key="visualization_button"):
-        with st.spinner("Preparing visualization..."):
-            visualize_3d_structures(output_plip_path, receptor_pdb_path, ligand_file_path)
-    elif not receptor_pdb_path:
+    receptor_mode = st.radio("Receptor detail", ("Binding site and CA trace", "Full receptor"), horizontal=True,
+                             key="receptor_detail")
+    if not receptor_pdb_path:
         st.error("Please upload the receptor PDB file to visualize the structure.")
+        return
+    # Stay open once shown, so picking another ligand updates the same viewer
+    if st.button("Show Visualization", key="visualization_button"):
+        st.session_state["show_visualization"] = True
+    if st.session_state.get("show_visualization"):
+        with st.spinner("Preparing visualization..."):
+            visualize_3d_structures(output_plip_path, receptor_pdb_path, ligand_file_path,
+                                    trimmed_receptor=receptor_mode == "Binding site and CA trace")
 
 
 # def get_ligand_files(ligand_folder_path):
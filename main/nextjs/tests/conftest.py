@@ -0,0 +1,11 @@
+import os
+import sys
+
+# The app imports its modules as scripts.* from main/nextjs. It expects agandock_cli to be installed
+# (pip install -e cli/agandock-cli); the tests fall back to the checkout's package so they run without it.
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, APP_DIR)
+try:
+    import agandock_cli
+except ImportError:
+    sys.path.insert(1, os.path.join(APP_DIR, "..", "..", "cli", "agandock-cli"))
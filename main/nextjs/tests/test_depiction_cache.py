@@ -0,0 +1,44 @@
+import os
+import pytest
+
+from scripts import depiction_cache
+from scripts.depiction_cache import depict, structure_image_html
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(depiction_cache, "DEPICTION_CACHE_DIR", str(tmp_path))
+    depiction_cache._depict_canonical.cache_clear()
+    yield tmp_path
+    depiction_cache._depict_canonical.cache_clear()
+
+
+def cached_files(directory):
+    return sorted(os.path.join(root, name) for root, _, names in os.walk(directory) for name in names)
+
+
+def test_depictions_are_keyed_by_canonical_smiles_and_size(cache_dir):
+    png = depict("CCO")
+    assert png.startswith(b"\x89PNG")
+    assert depict("OCC") == png
+    assert len(cached_files(cache_dir)) == 1
+
+    depict("CCO", size=(300, 150))
+    assert depict("CCO", fmt="svg").lstrip().startswith(b"<")
+    assert len(cached_files(cache_dir)) == 3
+
+    assert depict("not a smiles") is None and depict(None) is None
+    assert structure_image_html("not a smiles") is None
+    with pytest.raises(ValueError):
+        depict("CCO", fmt="gif")
+
+
+def test_depictions_are_served_from_disk_after_a_restart(cache_dir):
+    depict("c1ccccc1")
+    path, = cached_files(cache_dir)
+    with open(path, "wb") as f:
+        f.write(b"stored")
+
+    assert depict("c1ccccc1") != b"stored"  # Still memoised in this process
+    depiction_cache._depict_canonical.cache_clear()
+    assert depict("c1ccccc1") == b"stored"
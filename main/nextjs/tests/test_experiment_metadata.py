@@ -0,0 +1,64 @@
+import os
+import json
+import pandas as pd
+import pytest
+
+from scripts import experiment_metadata
+from scripts.experiment_metadata import EXPERIMENT_MANIFEST, load_experiment_metadata, load_results_frame
+
+
+@pytest.fixture
+def experiment(tmp_path, monkeypatch):
+    monkeypatch.setattr(experiment_metadata, "_metadata_cache", {})
+    monkeypatch.setattr(experiment_metadata, "_frame_cache", {})
+    pd.DataFrame({"SMILES": ["CCO", "CCN", "CCC"]}).to_csv(tmp_path / "input_smiles.csv", index=False)
+    pd.DataFrame({"SMILES": ["[Na+].[Cl-]"]}).to_csv(tmp_path / "salted_compounds.csv", index=False)
+    for directory, count in (("pipeline_files/3_pdbqt", 2), ("pipeline_files/5_pdbqt_for_docking", 1)):
+        os.makedirs(tmp_path / directory)
+        for n in range(count):
+            (tmp_path / directory / f"lig_{n}.pdbqt").write_text("")
+    os.makedirs(tmp_path / "pipeline_files/execution_time")
+    (tmp_path / "pipeline_files/execution_time/total_execution_time.txt").write_text("12.5\n")
+    return tmp_path
+
+
+def test_summary_is_stored_in_a_manifest(experiment):
+    data = load_experiment_metadata(str(experiment))
+    assert tuple(data) == (3, 1, "12.5", 2, 1)
+    with open(experiment / EXPERIMENT_MANIFEST) as f:
+        assert json.load(f)["summary"]["num_pdbqt_in"] == 2
+
+    # A new process reads the manifest instead of recounting
+    with open(experiment / EXPERIMENT_MANIFEST) as f:
+        manifest = json.load(f)
+    manifest["summary"]["num_input"] = 1000
+    with open(experiment / EXPERIMENT_MANIFEST, "w") as f:
+        json.dump(manifest, f)
+    experiment_metadata._metadata_cache.clear()
+    assert load_experiment_metadata(str(experiment)).num_input == 1000
+
+
+def test_summary_is_recomputed_when_a_tracked_file_changes(experiment):
+    assert load_experiment_metadata(str(experiment)).num_pdbqt_out == 1
+    (experiment / "pipeline_files/5_pdbqt_for_docking/lig_1.pdbqt").write_text("")
+    stamp = os.path.getmtime(experiment / "pipeline_files/5_pdbqt_for_docking") + 10
+    os.utime(experiment / "pipeline_files/5_pdbqt_for_docking", (stamp, stamp))
+    assert load_experiment_metadata(str(experiment)).num_pdbqt_out == 2
+
+    (experiment / "pipeline_files/execution_time/total_execution_time.txt").write_text("99.0\n")
+    assert load_experiment_metadata(str(experiment)).time_taken == "99.0"
+
+
+def test_results_frame_is_reread_when_the_file_changes(experiment):
+    csv_path = str(experiment / "output.csv")
+    pd.DataFrame({"Name": ["a", "b"]}).to_csv(csv_path, index=False)
+    frame = load_results_frame(csv_path)
+    frame.loc[0, "Name"] = "changed"
+    assert load_results_frame(csv_path)["Name"].tolist() == ["a", "b"]  # Callers get their own copy
+
+    pd.DataFrame({"Name": ["a", "b", "c"]}).to_csv(csv_path, index=False)
+    stamp = os.path.getmtime(csv_path) + 10
+    os.utime(csv_path, (stamp, stamp))  # Newer than the Parquet twin written by the first read
+    assert load_results_frame(csv_path)["Name"].tolist() == ["a", "b", "c"]
+    with pytest.raises(FileNotFoundError):
+        load_results_frame(str(experiment / "missing.csv"))
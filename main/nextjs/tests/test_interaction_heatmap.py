@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+
+from scripts.interaction_heatmap import (residue_contacts, residue_frequency, interaction_matrix, cluster_ligands,
+                                         cluster_profiles)
+
+
+# plip_result.csv stores the residue lists as their repr
+PLIP = pd.DataFrame({
+    "Name": ["lig_1", "lig_2", "lig_3"],
+    "num_hydrophobic_interactions": [2, 1, 0],
+    "rsnr_hydrophobic": ["[45, 45]", "[45]", "[]"],
+    "restype_hydrophobic": ["['LEU', 'LEU']", "['LEU']", "[]"],
+    "num_hydrogen_bonding_interactions": [1, 0, 3],
+    "rsnr_hydrogen": ["[102]", "[]", "[102, -3, 7]"],
+    "restype_hydrogen": ["['SER']", "[]", "['SER', 'ALA', 'THR']"],
+})
+
+
+def test_contacts_are_exploded_per_ligand_residue_and_type():
+    contacts = residue_contacts(PLIP)
+    rows = set(contacts[["Name", "Residue", "Interaction", "Count"]].itertuples(index=False, name=None))
+    assert rows == {("lig_1", "LEU45", "Hydrophobic", 2), ("lig_2", "LEU45", "Hydrophobic", 1),
+                    ("lig_1", "SER102", "Hydrogen bond", 1), ("lig_3", "SER102", "Hydrogen bond", 1),
+                    ("lig_3", "ALA-3", "Hydrogen bond", 1), ("lig_3", "THR7", "Hydrogen bond", 1)}
+
+    frequency = residue_frequency(contacts, len(PLIP), max_residues=2)
+    assert frequency[["resnr", "Interaction", "Ligands", "Percent"]].values.tolist() == [
+        [45, "Hydrophobic", 2, 66.7], [102, "Hydrogen bond", 2, 66.7]]
+    assert residue_contacts(PLIP[["Name"]]).empty
+
+    # Residue types that do not line up with the numbers are dropped, not shifted
+    misaligned = PLIP.assign(restype_hydrogen=["['SER']", "[]", "['SER']"])
+    assert residue_contacts(misaligned).query("Name == 'lig_3'")["Residue"].tolist() == ["102", "-3", "7"]
+
+
+def test_ligands_with_the_same_profile_share_a_cluster():
+    plip = pd.DataFrame({
+        "Name": [f"lig_{n}" for n in range(6)],
+        "num_hydrophobic_interactions": [5, 5, 5, 0, 0, 1],
+        "num_hydrogen_bonding_interactions": [0, 0, 0, 4, 4, 4],
+    })
+    matrix = interaction_matrix(plip)
+    assert matrix.columns.tolist() == ["Hydrophobic", "Hydrogen bond"]
+    assert matrix.index.tolist() == plip["Name"].tolist()
+
+    labels = cluster_ligands(matrix, num_clusters=2)
+    assert labels.tolist() == [1, 1, 1, 2, 2, 2] or labels.tolist() == [2, 2, 2, 1, 1, 1]
+    np.testing.assert_array_equal(cluster_ligands(matrix, num_clusters=2), labels)  # Deterministic
+    assert len(set(cluster_ligands(matrix, num_clusters=50))) == 3  # At most one cluster per distinct profile
+
+    profiles = cluster_profiles(matrix, labels)
+    assert set(profiles["Cluster"]) == {"Cluster 1 (3)", "Cluster 2 (3)"}
+    assert len(profiles) == 4
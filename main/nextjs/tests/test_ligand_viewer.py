@@ -0,0 +1,28 @@
+import pytest
+
+from scripts import ligand_viewer as viewer
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    calls = []
+    monkeypatch.setattr(viewer.st, "session_state", {})
+    monkeypatch.setattr(viewer, "_ligand_viewer", lambda **args: calls.append(args))
+    return calls
+
+
+def show(ligand, receptor="RECEPTOR A"):
+    viewer.ligand_viewer(receptor, ligand, {45: "#ff0000", 102: "#00ff00"}, {"color": "lightgrey"})
+
+
+def test_receptor_is_only_sent_until_the_browser_holds_it(calls):
+    show("LIGAND 1")
+    assert calls[-1]["receptor"] == "RECEPTOR A"
+    assert calls[-1]["residues"] == [45, 102] and calls[-1]["residue_colors"] == {"45": "#ff0000", "102": "#00ff00"}
+
+    viewer.st.session_state["ligand_viewer"] = calls[-1]["receptor_key"]  # Reported back by the browser
+    show("LIGAND 2")
+    assert calls[-1]["receptor"] is None and calls[-1]["ligand"] == "LIGAND 2"
+
+    show("LIGAND 2", receptor="RECEPTOR B")
+    assert calls[-1]["receptor"] == "RECEPTOR B"
@@ -0,0 +1,55 @@
+import os
+import numpy as np
+
+from scripts import receptor_payload
+from scripts.receptor_payload import RECEPTOR_VIEW_FILE, trim_receptor, load_receptor_payload
+
+
+def atom(serial, name, resname, resnr, x):
+    return f"ATOM  {serial:5d} {name:<4} {resname:3} A{resnr:4d}    {x:8.3f}{0.0:8.3f}{0.0:8.3f}  1.00  0.00"
+
+
+# Two residues 30 Å apart along x
+RECEPTOR = "\n".join([
+    atom(1, "N", "ALA", 1, 0.0), atom(2, "CA", "ALA", 1, 1.0), atom(3, "CB", "ALA", 1, 2.0),
+    atom(4, "N", "GLY", 2, 30.0), atom(5, "CA", "GLY", 2, 31.0), atom(6, "C", "GLY", 2, 32.0),
+]) + "\nEND\n"
+
+
+def kept_atoms(pdb_text):
+    return [(line[17:20], line[12:16].strip()) for line in pdb_text.splitlines() if line.startswith("ATOM")]
+
+
+def test_only_the_binding_site_keeps_its_side_chains():
+    trimmed = trim_receptor(RECEPTOR, points=np.array([[3.0, 0.0, 0.0]]))
+    assert kept_atoms(trimmed) == [("ALA", "N"), ("ALA", "CA"), ("ALA", "CB"), ("GLY", "CA")]
+
+    box = (np.array([31.0, 0.0, 0.0]), np.array([2.0, 2.0, 2.0]))
+    assert kept_atoms(trim_receptor(RECEPTOR, box=box)) == [("ALA", "CA"), ("GLY", "N"), ("GLY", "CA"), ("GLY", "C")]
+    assert trim_receptor(RECEPTOR) == RECEPTOR
+
+
+def test_payload_is_stored_and_rebuilt_when_the_receptor_changes(tmp_path, monkeypatch):
+    monkeypatch.setattr(receptor_payload, "_payload_cache", {})
+    receptor_path = tmp_path / "receptor.pdb"
+    receptor_path.write_text(RECEPTOR)
+    (tmp_path / "receptor_config.txt").write_text(
+        "center_x = 0\ncenter_y = 0\ncenter_z = 0\nsize_x = 2\nsize_y = 2\nsize_z = 2\n")
+
+    payload = load_receptor_payload(str(receptor_path))
+    assert kept_atoms(payload) == [("ALA", "N"), ("ALA", "CA"), ("ALA", "CB"), ("GLY", "CA")]
+    assert (tmp_path / RECEPTOR_VIEW_FILE).read_text().endswith(payload)
+
+    receptor_path.write_text(RECEPTOR.replace("GLY", "SER"))
+    stamp = os.path.getmtime(receptor_path) + 10
+    os.utime(receptor_path, (stamp, stamp))
+    assert ("SER", "CA") in kept_atoms(load_receptor_payload(str(receptor_path)))
+
+
+def test_site_search_matches_all_pairs_distances():
+    rng = np.random.default_rng(0)
+    coords, points = rng.uniform(0, 40, (3000, 3)), rng.uniform(10, 30, (500, 3))
+    near = receptor_payload._near_points(coords, points, 4.0)
+    cutoff = 4.0 + receptor_payload.GRID_SPACING * np.sqrt(3) / 2
+    expected = (np.linalg.norm(coords[:, None, :] - points[None, :, :], axis=2) <= cutoff).any(axis=1)
+    assert near.tolist() == expected.tolist()